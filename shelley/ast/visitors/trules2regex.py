@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from shelley.ast.visitors.triggers import TriggersVisitor
 from shelley.ast.triggers import Trigger, Triggers
@@ -13,26 +13,61 @@ from shelley.ast.rules import (
 from karakuri.regular import Regex, Char, Concat, Union, NIL, Star
 
 
+class RegexTable:
+    """
+    Hash-conses regular expressions: structurally equal expressions built by
+    the same table are the same object. A node is identified by its kind and
+    by the identity of its (already shared) children, so building a node takes
+    constant time regardless of its size.
+    """
+
+    def __init__(self) -> None:
+        self.nodes: Dict[Tuple[Any, ...], Regex[str]] = dict()
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def _get(self, key: Tuple[Any, ...], make) -> Regex[str]:
+        result = self.nodes.get(key, None)
+        if result is None:
+            self.nodes[key] = result = make()
+        return result
+
+    def char(self, char: str) -> Regex[str]:
+        return self._get(("char", char), lambda: Char(char))
+
+    def concat(self, left: Regex[str], right: Regex[str]) -> Regex[str]:
+        return self._get(("concat", id(left), id(right)), lambda: Concat(left, right))
+
+    def union(self, left: Regex[str], right: Regex[str]) -> Regex[str]:
+        return self._get(("union", id(left), id(right)), lambda: Union(left, right))
+
+    def star(self, child: Regex[str]) -> Regex[str]:
+        return self._get(("star", id(child)), lambda: Star(child))
+
+
 class TRules2RegexVisitor(TriggersVisitor):
     regex_dict: Dict[str, Regex]
     current_regex: Regex[str]
+    table: RegexTable
 
-    def __init__(self) -> None:
+    def __init__(self, table: Optional[RegexTable] = None) -> None:
         self.regex_dict = dict()
         self.current_regex = NIL
+        self.table = RegexTable() if table is None else table
 
     def visit_trigger_rule_fired(self, element: TriggerRuleFired) -> None:
         self.current_regex = NIL
 
     def visit_trigger_rule_event(self, element: TriggerRuleEvent) -> None:
-        self.current_regex = Char(str(element))
+        self.current_regex = self.table.char(str(element))
 
     def visit_trigger_rule_sequence(self, element: TriggerRuleSequence) -> None:
         element.left_trigger_rule.accept(self)
         left = self.current_regex
         element.right_trigger_rule.accept(self)
         right = self.current_regex
-        self.current_regex = Concat(left, right)
+        self.current_regex = self.table.concat(left, right)
 
     def visit_trigger_rule_choice(self, element: TriggerRuleChoice) -> None:
 
@@ -45,7 +80,7 @@ class TRules2RegexVisitor(TriggersVisitor):
         for choice in element.choices[1:]:
             choice.accept(self)
             next_r = self.current_regex
-            result = Union(result, next_r)
+            result = self.table.union(result, next_r)
 
         self.current_regex = result
 
@@ -53,7 +88,7 @@ class TRules2RegexVisitor(TriggersVisitor):
 
         assert element is not None
         element.loop.accept(self)
-        self.current_regex = Star(self.current_regex)
+        self.current_regex = self.table.star(self.current_regex)
 
     def visit_trigger(self, element: Trigger) -> None:
         element.trigger_rule.accept(self)
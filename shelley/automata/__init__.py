@@ -1,4 +1,5 @@
 import logging
+from abc import ABC, abstractmethod
 from typing import (
     List,
     Dict,
@@ -17,7 +18,9 @@ from typing import (
     TypeVar,
     FrozenSet,
     Sequence,
+    Deque,
 )
+from collections import deque
 from karakuri.regular import (
     NFA,
     nfa_to_regex,
@@ -31,12 +34,23 @@ from karakuri.regular import (
 from dataclasses import dataclass, field
 from karakuri import hml, regular
 from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 
 # https://stackoverflow.com/questions/7370801/measure-time-elapsed-in-python
 from timeit import default_timer as timer
 from datetime import timedelta
 
 from shelley.automata import errors
+from shelley.automata.budget import Budget
+from shelley.automata.graph import (
+    AdjacencyIndex,
+    DeadEndCycle,
+    ExplicitNFA,
+    analyze,
+)
+from shelley.automata.inclusion import EpsilonClosure, check_inclusion
+from shelley.automata.minimize import REJECT, IntDFA, hopcroft, minimize_dfa
+from shelley.automata.triggers import TriggerCache, determinize_triggers
 
 logger = logging.getLogger("shelleyc")
 
@@ -58,14 +72,26 @@ class Device:
 @dataclass
 class CheckedDevice:
     nfa: NFA[Any, str]
+    _dfa: Optional[DFA[Any, str]] = field(
+        init=False, default=None, repr=False, compare=False
+    )
+
+    @property
+    def dfa(self) -> DFA[Any, str]:
+        """
+        The minimized DFA of the device, computed once and shared by every
+        component of this type (see instantiate_dfa).
+        """
+        if self._dfa is None:
+            self._dfa = minimize_dfa(nfa_to_dfa(self.nfa))
+        return self._dfa
 
 
 TKnownDevices = Callable[[str], CheckedDevice]
 
 
-@dataclass(frozen=True)
 class DecodedState:
-    pass
+    __slots__ = ()
 
 
 class ReplaceHandler(SubstHandler[str]):
@@ -165,6 +191,31 @@ def build_external_behavior(
     )
 
 
+def minimize_behavior(nfa: NFA[Any, str]) -> Dict[str, Any]:
+    """
+    The minimal DFA of a behavior, in the format of NFA.as_dict, with a
+    canonical numbering: states are numbered in breadth-first order from the
+    start state (0), visiting the operations in sorted order, and the states
+    that cannot reach an accepting state (the sink) are dropped. The sink is
+    kept (as the last state) when some operation only leads to it, since
+    dictionaries do not record the alphabet. Behaviors with the same language
+    give the same dictionary.
+
+    :param nfa: the behavior (e.g., built by build_external_behavior)
+    :return: the canonical minimal behavior
+    """
+    minimal = hopcroft(IntDFA.from_nfa(nfa))
+    result = minimal.as_dict()
+    if len(set(edge["char"] for edge in result["edges"])) < len(minimal.alphabet):
+        sink = len(minimal)
+        rows = minimal.transitions + ((REJECT,) * len(minimal.alphabet),)
+        for src, row in enumerate(rows):
+            for char, dst in zip(minimal.alphabet, row):
+                if dst == REJECT:
+                    result["edges"].append(dict(src=src, char=char, dst=sink))
+    return result
+
+
 def instantiate(nfa: NFA, prefix: str) -> NFA:
     """
     The NFA definition of a device doesn't have a prefixed alphabet. However, when declaring components,
@@ -192,6 +243,30 @@ def instantiate(nfa: NFA, prefix: str) -> NFA:
     )
 
 
+def instantiate_dfa(dfa: DFA, prefix: str) -> DFA:
+    """
+    Prefixes the alphabet of a DFA, like instantiate does for NFAs. The states
+    (and the transitions) are those of the given DFA, so instances of the same
+    device type share a single determinization.
+
+    :param dfa: the DFA (device) we want to prefix with
+    :param prefix: the instantiation name of the DFA (device)
+    :return: prefixed DFA
+    """
+    old_tsx_func = dfa.transition_func
+    offset = len(prefix)
+
+    def transition_func(src, char):
+        return old_tsx_func(src, char[offset:])
+
+    return DFA(
+        alphabet=set(prefix + x for x in dfa.alphabet),
+        transition_func=transition_func,
+        start_state=dfa.start_state,
+        accepted_states=dfa.accepted_states,
+    )
+
+
 @dataclass
 class Component:
     name: str
@@ -202,6 +277,10 @@ class Component:
     def alphabet(self):
         return self.behavior.alphabet
 
+    @property
+    def dfa(self) -> DFA[Any, str]:
+        return instantiate_dfa(self.system.dfa, self.name + ".")
+
     def __post_init__(self):
         self.behavior = instantiate(self.system.nfa, self.name + ".")
 
@@ -217,26 +296,143 @@ def encode_behavior(
     return regex_to_nfa(encoded_regex, alphabet)
 
 
-@dataclass(frozen=True, order=True)
-class MacroState(DecodedState):
-    state: AbstractSet[str]
-    event: Optional[str] = None
+class StateTable:
+    """
+    Interns the states of a micro behavior. Equal states are the same object,
+    so comparing two states of the same table is an identity check, and each
+    state computes its hash only once. The components of a state (macro state,
+    event, micro state) are numbered, and a state is identified by the tuple of
+    the numbers of its components (its key).
+    """
 
+    def __init__(self) -> None:
+        self.ids: Dict[Any, int] = dict()
+        self.states: Dict[Tuple[int, ...], DecodedState] = dict()
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def get_id(self, value: Any) -> int:
+        idx = self.ids.get(value, None)
+        if idx is None:
+            self.ids[value] = idx = len(self.ids)
+        return idx
+
+    def macro(self, state: Any, event: Optional[str] = None) -> "MacroState":
+        key = (self.get_id(state), self.get_id(event))
+        result = self.states.get(key, None)
+        if result is None:
+            self.states[key] = result = MacroState(state, event, _table=self, _key=key)
+        return cast(MacroState, result)
+
+    def micro(self, macro: Any, event: str, micro: Any) -> "MicroState":
+        key = (self.get_id(macro), self.get_id(event), self.get_id(micro))
+        result = self.states.get(key, None)
+        if result is None:
+            self.states[key] = result = MicroState(
+                macro, event, micro, _table=self, _key=key
+            )
+        return cast(MicroState, result)
+
+
+class _InternedState(DecodedState, ABC):
+    __slots__ = ("_table", "_key", "_hash")
+    _table: Optional[StateTable]
+    _key: Tuple[Any, ...]
+    _hash: int
 
-@dataclass(frozen=True, order=True)
-class MicroState(DecodedState):
-    # The next macro state
-    macro: AbstractSet[str]
-    # The event that we are processing
-    event: str
-    # The current micro state
-    micro: AbstractSet[str]
+    @abstractmethod
+    def _fields(self) -> Tuple[Any, ...]:
+        pass
 
-    def advance_micro(self, micro: AbstractSet[str]) -> "MicroState":
-        return MicroState(macro=self.macro, event=self.event, micro=micro)
+    def _init(self, table: Optional[StateTable], key: Optional[Tuple[int, ...]]):
+        fields = self._fields()
+        self._table = table
+        self._key = fields if key is None else key
+        self._hash = hash(fields)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if type(other) is not type(self):
+            return NotImplemented
+        if self._table is not None and self._table is other._table:
+            # both are interned by the same table
+            return False
+        return self._hash == other._hash and self._fields() == other._fields()
+
+    def __lt__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._fields() < other._fields()
+
+    def __reduce__(self):
+        # the copy is not interned
+        return (type(self), self._fields())
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={value!r}" for (name, value) in zip(self.__slots__, self._fields())
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+class MacroState(_InternedState):
+    __slots__ = ("state", "event")
+
+    def __init__(
+        self,
+        state: Any,
+        event: Optional[str] = None,
+        *,
+        _table: Optional[StateTable] = None,
+        _key: Optional[Tuple[int, ...]] = None,
+    ):
+        # The state of the external behavior
+        self.state = state
+        # The event that led to this state
+        self.event = event
+        self._init(_table, _key)
+
+    def _fields(self) -> Tuple[Any, ...]:
+        return (self.state, self.event)
+
+
+class MicroState(_InternedState):
+    __slots__ = ("macro", "event", "micro")
+
+    def __init__(
+        self,
+        macro: Any,
+        event: str,
+        micro: Any,
+        *,
+        _table: Optional[StateTable] = None,
+        _key: Optional[Tuple[int, ...]] = None,
+    ):
+        # The next macro state
+        self.macro = macro
+        # The event that we are processing
+        self.event = event
+        # The current micro state
+        self.micro = micro
+        self._init(_table, _key)
+
+    def _fields(self) -> Tuple[Any, ...]:
+        return (self.macro, self.event, self.micro)
+
+    def advance_micro(self, micro: Any) -> "MicroState":
+        if self._table is None:
+            return MicroState(self.macro, self.event, micro)
+        return self._table.micro(self.macro, self.event, micro)
 
     def advance_macro(self) -> MacroState:
-        return MacroState(self.macro, self.event)
+        if self._table is None:
+            return MacroState(self.macro, self.event)
+        return self._table.macro(self.macro, self.event)
 
 
 def is_macro_state(st) -> bool:
@@ -281,6 +477,154 @@ class AmbiguityFailure:
         return cls(micro_trace, macro_traces)
 
 
+AMBIGUITY_DFA = "dfa"
+AMBIGUITY_PRODUCT = "product"
+AMBIGUITY_ENGINES = (AMBIGUITY_DFA, AMBIGUITY_PRODUCT)
+
+TStatePair = Tuple[DecodedState, DecodedState]
+
+
+def find_ambiguity(nfa: NFA[DecodedState, str]) -> Optional[AmbiguityFailure]:
+    """
+    Searches the product of the micro behavior with itself for the shortest
+    micro trace that reaches two distinct macro states. Unlike determinizing
+    the micro behavior, this is polynomial on the number of micro states.
+
+    Epsilon transitions advance one side of the product (and cost nothing),
+    the other transitions advance both sides.
+    """
+    start: TStatePair = (nfa.start_state, nfa.start_state)
+    parents: Dict[TStatePair, Optional[TStatePair]] = {start: None}
+    chars: Dict[TStatePair, Optional[str]] = {start: None}
+    dist: Dict[TStatePair, int] = {start: 0}
+    to_visit: Deque[TStatePair] = deque([start])
+    alphabet = sorted(nfa.alphabet)
+
+    def relax(src: TStatePair, dst: TStatePair, char: Optional[str]) -> None:
+        cost = dist[src] + (0 if char is None else 1)
+        old = dist.get(dst, None)
+        if old is None or cost < old:
+            dist[dst] = cost
+            parents[dst] = src
+            chars[dst] = char
+            if char is None:
+                to_visit.appendleft(dst)
+            else:
+                to_visit.append(dst)
+
+    while len(to_visit) > 0:
+        pair = to_visit.popleft()
+        (left, right) = pair
+        if is_macro_state(left) and is_macro_state(right) and left != right:
+            return _ambiguity_from_path(pair, parents, chars)
+        for dst in nfa.transition_func(left, None):
+            relax(pair, (dst, right), None)
+        for dst in nfa.transition_func(right, None):
+            relax(pair, (left, dst), None)
+        for char in alphabet:
+            left_dsts = nfa.transition_func(left, char)
+            if len(left_dsts) == 0:
+                continue
+            right_dsts = nfa.transition_func(right, char)
+            for left_dst in left_dsts:
+                for right_dst in right_dsts:
+                    relax(pair, (left_dst, right_dst), char)
+    return None
+
+
+def _ambiguity_from_path(
+    pair: TStatePair,
+    parents: Mapping[TStatePair, Optional[TStatePair]],
+    chars: Mapping[TStatePair, Optional[str]],
+) -> AmbiguityFailure:
+    path: List[TStatePair] = []
+    node: Optional[TStatePair] = pair
+    while node is not None:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+    micro_trace = tuple(c for c in (chars[x] for x in path) if c is not None)
+    macro_traces: Tuple[List[str], List[str]] = ([], [])
+    for prev, curr in zip(path, path[1:]):
+        for side in (0, 1):
+            st = curr[side]
+            if st != prev[side] and isinstance(st, MacroState):
+                assert st.event is not None
+                macro_traces[side].append(st.event)
+    return AmbiguityFailure(
+        micro_trace, (tuple(macro_traces[0]), tuple(macro_traces[1]))
+    )
+
+
+TDecodeNode = Tuple[DecodedState, Any]
+# the position of the previous node, the previous node, and the macro event
+TDecodeParent = Optional[Tuple[int, TDecodeNode, Optional[str]]]
+
+
+def decode_micro_trace(
+    nfa: NFA[DecodedState, str], system: NFA[Any, str], seq: Sequence[str]
+) -> Optional[MacroTrace]:
+    """
+    Finds a macro trace of the micro trace seq that the external behavior
+    (system) accepts. Rather than enumerating the derivations of seq (which
+    grow exponentially with nondeterministic triggers), tracks the reachable
+    pairs of (micro state, system state) after each prefix of seq, so it takes
+    polynomial time on the length of seq.
+    """
+    closure = EpsilonClosure(system)
+
+    def step(node: TDecodeNode, dst: DecodedState):
+        (_, sys_st) = node
+        if isinstance(dst, MacroState) and dst.event is not None:
+            # entering a macro state runs its event on the system
+            for sys_dst in closure.of_set(system.transition_func(sys_st, dst.event)):
+                yield (dst, sys_dst), dst.event
+        else:
+            yield (dst, sys_st), None
+
+    layers: List[Dict[TDecodeNode, TDecodeParent]] = []
+
+    def add_closure(layer: Dict[TDecodeNode, TDecodeParent]) -> None:
+        pos = len(layers)
+        to_visit: Deque[TDecodeNode] = deque(layer)
+        while len(to_visit) > 0:
+            node = to_visit.popleft()
+            for dst in nfa.transition_func(node[0], None):
+                for (succ, event) in step(node, dst):
+                    if succ not in layer:
+                        layer[succ] = (pos, node, event)
+                        to_visit.append(succ)
+        layers.append(layer)
+
+    add_closure(
+        dict(((nfa.start_state, st), None) for st in closure(system.start_state))
+    )
+    for char in seq:
+        pos = len(layers) - 1
+        layer: Dict[TDecodeNode, TDecodeParent] = dict()
+        for node in layers[pos]:
+            for dst in nfa.transition_func(node[0], char):
+                for (succ, event) in step(node, dst):
+                    if succ not in layer:
+                        layer[succ] = (pos, node, event)
+        if len(layer) == 0:
+            return None
+        add_closure(layer)
+
+    for node in layers[-1]:
+        if system.accepted_states(node[1]):
+            events: List[str] = []
+            parent = layers[-1][node]
+            while parent is not None:
+                (pos, node, event) = parent
+                if event is not None:
+                    events.append(event)
+                parent = layers[pos][node]
+            events.reverse()
+            return tuple(events)
+    return None
+
+
 S = TypeVar("S")
 A = TypeVar("A")
 
@@ -339,31 +683,104 @@ def pad_trace(trace: Tuple[A, ...], alphabet: Collection[A]) -> NFA[Any, A]:
     )
 
 
+class TransitionMemo:
+    """
+    Memoizes the successors of a transition function. At most max_size
+    entries are kept; the oldest entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        transition_func: Callable[[Any, Optional[str]], AbstractSet[Any]],
+        max_size: int = 2**20,
+    ):
+        self.transition_func = transition_func
+        self.max_size = max_size
+        self.table: Dict[Tuple[Any, Optional[str]], FrozenSet[Any]] = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, src: Any, char: Optional[str]) -> FrozenSet[Any]:
+        key = (src, char)
+        result = self.table.get(key, None)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        # shared by every later lookup, so callers must not be able to mutate it
+        result = frozenset(self.transition_func(src, char))
+        if len(self.table) >= self.max_size:
+            del self.table[next(iter(self.table))]
+        self.table[key] = result
+        return result
+
+
 @dataclass
 class MicroBehavior:
     nfa: NFA[DecodedState, str]
     system: NFA[Any, str]
     skip_checks: bool
     check_ambiguity: bool = field(default=False)
-    dfa: DFA[Any, str] = field(init=False)
+    transitions: Optional[TransitionMemo] = field(default=None)
+    ambiguity_engine: str = field(default=AMBIGUITY_DFA)
+    # the explored integration, when materialized (nfa is then backed by it)
+    graph: Optional[ExplicitNFA] = field(default=None, repr=False)
+    # the budget of the checks, if any (nfa is then watched by it)
+    budget: Optional[Budget] = field(default=None, repr=False)
     failure: Optional[AmbiguityFailure] = field(init=False)
     is_valid: bool = field(init=False)
     validation_time: timedelta = field(init=False)
+    _dfa: Optional[DFA[Any, str]] = field(init=False, default=None, repr=False)
+    _epsilon_free: Optional[ExplicitNFA] = field(init=False, default=None, repr=False)
+    # the number of states and edges of the micro behavior (see epsilon_free)
+    explored_size: Tuple[int, int] = field(init=False, default=(0, 0), repr=False)
+
+    @property
+    def dfa(self) -> DFA[Any, str]:
+        if self._dfa is None:
+            self._dfa = self._determinize()
+        return self._dfa
+
+    def _determinize(self) -> DFA[Any, str]:
+        dfa = nfa_to_dfa(self.nfa)
+        return dfa if self.budget is None else self.budget.watch_dfa(dfa)
+
+    @property
+    def epsilon_free(self) -> ExplicitNFA:
+        """
+        The micro behavior without the epsilon moves between macro and micro
+        states. It has the same language, but not the same derivations, so
+        the ambiguity check and the decoding of traces use nfa instead.
+        """
+        if self._epsilon_free is None:
+            graph = AdjacencyIndex(self.nfa) if self.graph is None else self.graph
+            self.explored_size = (len(graph), graph.num_all_edges())
+            self._epsilon_free = graph.remove_epsilon()
+        return self._epsilon_free
 
     def __post_init__(self) -> None:
+        if self.ambiguity_engine not in AMBIGUITY_ENGINES:
+            raise ValueError(f"Unknown ambiguity engine: {self.ambiguity_engine}")
         self.validation_time = timedelta()
         if not self.skip_checks:
             start = timer()
-            self.dfa = nfa_to_dfa(self.nfa)
+            if self.budget is not None:
+                self.budget.phase = "ambiguity"
+            if self.ambiguity_engine == AMBIGUITY_DFA:
+                # the product engine only determinizes on demand (when reporting errors)
+                self._dfa = self._determinize()
             if self.check_ambiguity:
                 logger.debug("Checking ambiguity")
-                err_trace = self.dfa.find_shortest_path(is_macro_ambiguous)
-                self.is_valid = err_trace is None
-                self.failure = (
-                    None
-                    if err_trace is None  # is valid
-                    else AmbiguityFailure.make(dfa=self.dfa, micro_trace=err_trace)
-                )
+                if self.ambiguity_engine == AMBIGUITY_PRODUCT:
+                    self.failure = find_ambiguity(self.nfa)
+                else:
+                    err_trace = self.dfa.find_shortest_path(is_macro_ambiguous)
+                    self.failure = (
+                        None
+                        if err_trace is None  # is valid
+                        else AmbiguityFailure.make(dfa=self.dfa, micro_trace=err_trace)
+                    )
+                self.is_valid = self.failure is None
                 self.validation_time = get_elapsed_time(start)
             else:
                 logger.debug("Skip ambiguity check")
@@ -372,16 +789,12 @@ class MicroBehavior:
                 self.validation_time = timedelta()
 
     def convert_micro_to_macro(self, seq: Sequence[str]) -> MacroTrace:
-        for der in self.nfa.get_derivations(seq):
-            rest: List[str] = []
-            for st in der:
-                if isinstance(st, MacroState) and st.event is not None:
-                    rest.append(st.event)
-            # Some traces have no macro traces; and this would be an invalid
-            # trace. We therefore need to ensure the found macro-trace exists
-            if rest in self.system:
-                return tuple(rest)
-        raise ValueError(f"{errors.TRIGGER_INVALID_MICRO2MACRO(seq)}")
+        # Some traces have no macro traces; and this would be an invalid
+        # trace. We therefore need to ensure the found macro-trace exists
+        result = decode_micro_trace(self.nfa, self.system, seq)
+        if result is None:
+            raise ValueError(f"{errors.TRIGGER_INVALID_MICRO2MACRO(seq)}")
+        return result
 
     def get_traces_from_component_trace(
         self, component_alpha: Collection[str], component_seq: MicroTrace
@@ -402,6 +815,10 @@ class MicroBehavior:
         alphabet: Set[str],
         skip_checks: bool = False,
         check_ambiguity: bool = False,
+        ambiguity_engine: str = AMBIGUITY_DFA,
+        trigger_cache: Optional[TriggerCache] = None,
+        materialize: bool = False,
+        budget: Optional[Budget] = None,
     ) -> "MicroBehavior":
         """
         Micro behavior
@@ -413,10 +830,14 @@ class MicroBehavior:
         :param triggers: device triggers as REGEX
         :param alphabet: the alphabet from all shuffled components
         (should be equivalent to the alphabet from all triggers)
+        :param trigger_cache: reuse the triggers determinized by previous compilations
+        :param materialize: explore the micro behavior once into an explicit
+        graph, shared by every check that walks the micro behavior
+        :param budget: stop the checks (with BudgetExceeded) when the micro
+        behavior, or an automaton derived from it, exceeds the budget
         :return:
         """
         assert isinstance(external_behavior, NFA)
-        det_triggers: Dict[str, DFA[Any, str]] = dict()
         for k, rule in triggers.items():
             rule_alpha = set(regular.get_alphabet(rule))
             rule_alpha = rule_alpha - alphabet
@@ -424,9 +845,12 @@ class MicroBehavior:
                 raise ValueError(
                     f"{errors.UNDECLARED_OPERATION_IN_SUBSYSTEM(k, rule_alpha)}"
                 )
-            det_triggers[k] = nfa_to_dfa(regex_to_nfa(rule, alphabet))
+        det_triggers: Dict[str, DFA[Any, str]] = determinize_triggers(
+            triggers, alphabet, trigger_cache
+        )
         # det_triggers and triggers are so close together, make sure we don't mistype
         del triggers
+        states = StateTable()
 
         def tsx(src: DecodedState, char: Optional[str]) -> AbstractSet[DecodedState]:
             if isinstance(src, MacroState):
@@ -437,7 +861,7 @@ class MicroBehavior:
                 for evt in external_behavior.alphabet:
                     for dst in external_behavior.transition_func(src.state, evt):
                         result.add(
-                            MicroState(
+                            states.micro(
                                 macro=dst,
                                 event=evt,
                                 micro=det_triggers[evt].start_state,
@@ -467,39 +891,154 @@ class MicroBehavior:
             for t_dfa in det_triggers.values():
                 alphabet.update(t_dfa.alphabet)
 
+        # shared by every automaton derived from the micro behavior
+        transitions = TransitionMemo(tsx)
         nfa = NFA[DecodedState, str](
             alphabet=alphabet,
-            transition_func=tsx,
-            start_state=MacroState(external_behavior.start_state),
+            transition_func=transitions,
+            start_state=states.macro(external_behavior.start_state),
             accepted_states=is_final,
         )
-        return cls(nfa, external_behavior, skip_checks, check_ambiguity)
+        if budget is not None:
+            nfa = budget.watch_nfa(nfa)
+        graph = None
+        if materialize:
+            graph = ExplicitNFA(nfa)
+            nfa = graph.as_nfa()
+        return cls(
+            nfa,
+            external_behavior,
+            skip_checks,
+            check_ambiguity,
+            transitions=transitions,
+            ambiguity_engine=ambiguity_engine,
+            graph=graph,
+            budget=budget,
+        )
+
+
+def find_bounded_usage_error(
+    micro: NFA[Any, str], component: DFA[Any, str], bound: int
+) -> Optional[MicroTrace]:
+    """
+    Explores the micro traces with at most `bound` characters (calls to
+    subsystems) breadth-first, together with the state of the component
+    (the projection of the trace so far), and without determinizing the micro
+    behavior. A state of the search is visited once, at its smallest depth.
+
+    :return: the shortest micro trace whose projection is not empty and is
+    rejected by the component, or None if there is none within the bound
+    """
+    TNode = Tuple[Any, Any, bool]  # micro state, component state, used
+    alphabet = sorted(micro.alphabet)
+    component_alphabet = component.alphabet
+    start: TNode = (micro.start_state, component.start_state, False)
+    parents: Dict[TNode, Optional[Tuple[TNode, Optional[str]]]] = {start: None}
+
+    def get_trace(node: TNode) -> MicroTrace:
+        trace: List[str] = []
+        parent = parents[node]
+        while parent is not None:
+            node, char = parent
+            if char is not None:
+                trace.append(char)
+            parent = parents[node]
+        trace.reverse()
+        return tuple(trace)
+
+    layer: List[TNode] = [start]
+    for depth in range(bound + 1):
+        # epsilon moves stay in the same layer
+        to_visit = list(layer)
+        while len(to_visit) > 0:
+            node = to_visit.pop()
+            for dst in micro.transition_func(node[0], None):
+                succ = (dst, node[1], node[2])
+                if succ not in parents:
+                    parents[succ] = (node, None)
+                    layer.append(succ)
+                    to_visit.append(succ)
+        for node in layer:
+            (st, comp_st, used) = node
+            if (
+                used
+                and micro.accepted_states(st)
+                and not component.accepted_states(comp_st)
+            ):
+                return get_trace(node)
+        if depth == bound:
+            break
+        next_layer: List[TNode] = []
+        for node in layer:
+            (st, comp_st, used) = node
+            for char in alphabet:
+                for dst in micro.transition_func(st, char):
+                    if char in component_alphabet:
+                        succ = (dst, component.transition_func(comp_st, char), True)
+                    else:
+                        succ = (dst, comp_st, used)
+                    if succ not in parents:
+                        parents[succ] = (node, char)
+                        next_layer.append(succ)
+        if len(next_layer) == 0:
+            break
+        layer = next_layer
+    return None
 
 
 @dataclass
 class ComponentUsageFailure:
-    projected: DFA[Any, str]
-    component: DFA[Any, str]
+    # Both are None when checked with an antichain or bounded (see make)
+    projected: Optional[DFA[Any, str]]
+    component: Optional[DFA[Any, str]]
     component_name: str
+    # The smallest error, when already known
+    smallest_error: Optional[MicroTrace] = None
+    # A micro trace of the smallest error, when already known (bounded checks)
+    micro_trace: Optional[MicroTrace] = None
     is_valid: bool = field(init=False)
     validation_time: timedelta = field(init=False)
 
     def __post_init__(self) -> None:
         start = timer()
 
-        if len(list(self.projected.end_states)) == 0:
-            raise ValueError(errors.UNUSABLE_COMPONENT_TEXT(self.component_name))
+        if self.projected is None:
+            self.is_valid = self.smallest_error is None
+        else:
+            if len(list(self.projected.end_states)) == 0:
+                raise ValueError(errors.UNUSABLE_COMPONENT_TEXT(self.component_name))
 
-        self.is_valid = self.component.contains(self.projected)
+            assert self.component is not None
+            self.is_valid = self.component.contains(self.projected)
 
         self.validation_time = get_elapsed_time(start)
 
+    def _has_dfas(self, other: "ComponentUsageFailure") -> bool:
+        return (
+            self.projected is not None
+            and self.component is not None
+            and other.projected is not None
+            and other.component is not None
+        )
+
+    def _same_error(self, other: "ComponentUsageFailure") -> bool:
+        # without DFAs (antichain, bounded), compare the counterexamples
+        return (
+            self.is_valid == other.is_valid
+            and self.smallest_error == other.smallest_error
+        )
+
     def __equals__(self, other: Any) -> bool:
         if other is None or not isinstance(other, ComponentUsageFailure):
             return False
+        if not self._has_dfas(other):
+            return self._same_error(other)
         return self.projected == other.projected and self.component == other.component
 
     def is_equivalent_to(self, other: "ComponentUsageFailure") -> bool:
+        if not self._has_dfas(other):
+            return self._same_error(other)
+        assert self.projected is not None and self.component is not None
         return self.projected.is_equivalent_to(
             other.projected
         ) and self.component.is_equivalent_to(other.component)
@@ -507,6 +1046,8 @@ class ComponentUsageFailure:
     @property
     def invalid(self) -> DFA[Any, str]:
         """Returns the set of invalid traces."""
+        if self.projected is None or self.component is None:
+            raise ValueError("Checked with an antichain, no DFA available.")
         return self.projected.subtract(self.component)
 
     def get_smallest_error(self) -> MicroTrace:
@@ -515,6 +1056,8 @@ class ComponentUsageFailure:
         """
         if self.is_valid:
             raise ValueError("Can only be called if projection is invalid.")
+        if self.smallest_error is not None:
+            return self.smallest_error
         component_seq: Optional[MicroTrace] = self.invalid.get_shortest_string()
         assert component_seq is not None
         return component_seq
@@ -526,17 +1069,73 @@ class ComponentUsageFailure:
         component: NFA[Any, str],
         component_name: str,
         optional: bool = True,
+        antichain: bool = False,
+        component_dfa: Optional[DFA[Any, str]] = None,
+        budget: Optional[Budget] = None,
+        bounded: Optional[int] = None,
     ) -> "ComponentUsageFailure":
         """
         Restrict the language of a micro behavior using a component's alphabet
+
+        :param antichain: check the inclusion without determinizing the
+        projected micro behavior (stops at the first counterexample)
+        :param component_dfa: the determinized component (see Component.dfa),
+        otherwise the component is determinized here
+        :param budget: stop the check (with BudgetExceeded) when it is exceeded
+        :param bounded: only check the micro traces with at most this many
+        characters (see find_bounded_usage_error); a valid result is then
+        only valid up to the bound, and unusable components are not reported
         """
-        projected: DFA[Any, str] = nfa_to_dfa(project_nfa(micro, component.alphabet))
+        if budget is not None:
+            budget.phase = f"usage of {component_name}"
+        if bounded is not None:
+            start = timer()
+            if component_dfa is None:
+                component_dfa = nfa_to_dfa(component)
+            micro_trace = find_bounded_usage_error(micro, component_dfa, bounded)
+            usage = cls(
+                projected=None,
+                component=None,
+                component_name=component_name,
+                smallest_error=None
+                if micro_trace is None
+                else tuple(x for x in micro_trace if x in component.alphabet),
+                micro_trace=micro_trace,
+            )
+            usage.validation_time = get_elapsed_time(start)
+            return usage
+        projected_nfa = project_nfa(micro, component.alphabet)
+        if budget is not None:
+            projected_nfa = budget.watch_nfa(projected_nfa)
+        if antichain:
+            start = timer()
+            result = check_inclusion(
+                projected_nfa,
+                component,
+                nonempty=optional,
+            )
+            if not result.accepts_any:
+                raise ValueError(errors.UNUSABLE_COMPONENT_TEXT(component_name))
+            usage = cls(
+                projected=None,
+                component=None,
+                component_name=component_name,
+                smallest_error=result.counterexample,
+            )
+            usage.validation_time = get_elapsed_time(start)
+            return usage
+
+        projected: DFA[Any, str] = nfa_to_dfa(projected_nfa)
+        if budget is not None:
+            projected = budget.watch_dfa(projected)
         if optional:
             nil = DFA[Any, str].make_nil(projected.alphabet)
             projected = projected.subtract(nil)
 
+        if component_dfa is None:
+            component_dfa = nfa_to_dfa(component)
         return cls(
-            component=nfa_to_dfa(component),
+            component=component_dfa,
             projected=projected,
             component_name=component_name,
         )
@@ -605,6 +1204,16 @@ class TriggerIntegrationFailure:
         # We compute the smallest error
         dec_seq: Optional[MicroTrace] = invalid.get_shortest_string()
         assert dec_seq is not None, f"{errors.TRIGGER_NONE_SMALLEST_ERROR}"
+        return cls.from_micro_trace(dec_seq, micro, known_devices, components)
+
+    @classmethod
+    def from_micro_trace(
+        cls,
+        dec_seq: MicroTrace,
+        micro: MicroBehavior,
+        known_devices: TKnownDevices,
+        components: Dict[str, str],
+    ) -> "TriggerIntegrationFailure":
         # There should be a unique macro trace
         macro_trace = micro.convert_micro_to_macro(dec_seq)
         # We demutex by device
@@ -612,7 +1221,7 @@ class TriggerIntegrationFailure:
         for component, seq in demultiplex(dec_seq).items():
             ch_dev = known_devices(components[component])
             if not ch_dev.nfa.accepts(seq):
-                invalid = nfa_to_dfa(ch_dev.nfa).minimize()
+                invalid = ch_dev.dfa
                 idx = invalid.get_divergence_index(seq)
                 assert idx is not None, f"{errors.TRIGGER_NONE_INDEX}"
                 errs[component] = (tuple(seq), idx)
@@ -630,6 +1239,11 @@ class TriggerIntegrationFailure:
     ) -> "TriggerIntegrationFailure":
         if usage.is_valid:
             raise ValueError(f"{errors.TRIGGER_UNEXPECTED_VALID_INTEGRATION(usage)}")
+        if usage.micro_trace is not None:
+            # found without determinizing the micro behavior (bounded check)
+            return cls.from_micro_trace(
+                usage.micro_trace, micro, known_devices, components
+            )
         # 1. Get an invalid usage
         component_seq = usage.get_smallest_error()
         # 2. Get the component's alphabet
@@ -651,6 +1265,7 @@ class TriggerIntegrationFailure:
 class UnusableOperationsFailure:
     unusable_operations: FrozenSet[str]
     sink_operations: FrozenSet[str]
+    dead_end_cycles: Tuple[DeadEndCycle, ...] = ()
 
     def __str__(self):
         unusable_msg = f"{errors.UNUSABLE_OPERATIONS_TEXT}\n"
@@ -662,6 +1277,8 @@ class UnusableOperationsFailure:
             unusable_msg += (
                 f"{errors.UNUSABLE_OPERATIONS_NO_YIELD_POINT(self.sink_operations)}\n"
             )
+        for cycle in self.dead_end_cycles:
+            unusable_msg += f"{errors.UNUSABLE_OPERATIONS_DEAD_END_CYCLE(cycle)}\n"
 
         return unusable_msg
 
@@ -669,6 +1286,78 @@ class UnusableOperationsFailure:
 TFailure = Union[TriggerIntegrationFailure, AmbiguityFailure, UnusableOperationsFailure]
 
 
+@dataclass
+class UsageCheck:
+    """
+    The inputs of the usage check of a component, in a form that can be sent
+    to another process (NFAs are given as dictionaries, see NFA.as_dict).
+    """
+
+    external_behavior: Dict[str, Any]
+    triggers: Dict[str, Regex[str]]
+    alphabet: Set[str]
+    component_name: str
+    component: Dict[str, Any]
+    antichain: bool = False
+    trigger_cache: Optional[TriggerCache] = None
+    materialize: bool = False
+    budget: Optional[Budget] = None
+
+    def run(self) -> Tuple[Optional[MicroTrace], timedelta]:
+        """
+        :return: the smallest error (None if the usage is valid) and the validation time
+        """
+        micro = MicroBehavior.make(
+            NFA.from_dict(self.external_behavior),
+            self.triggers,
+            self.alphabet,
+            skip_checks=True,
+            trigger_cache=self.trigger_cache,
+            materialize=self.materialize,
+            budget=self.budget,
+        )
+        component = Component(
+            self.component_name, CheckedDevice(NFA.from_dict(self.component))
+        )
+        usage = ComponentUsageFailure.make(
+            micro=micro.epsilon_free.as_nfa(),
+            component=component.behavior,
+            component_name=component.name,
+            antichain=self.antichain,
+            budget=self.budget,
+        )
+        error = None if usage.is_valid else usage.get_smallest_error()
+        return error, usage.validation_time
+
+
+def _run_usage_check(check: UsageCheck) -> Tuple[Optional[MicroTrace], timedelta]:
+    return check.run()
+
+
+def check_usages_parallel(
+    checks: List[UsageCheck], jobs: int
+) -> Dict[str, ComponentUsageFailure]:
+    """
+    Runs the usage checks in a pool of processes. The results are merged in the
+    order of the checks, so that the reported failure is the same as in a
+    sequential run.
+    """
+    usages: Dict[str, ComponentUsageFailure] = dict()
+    with ProcessPoolExecutor(max_workers=min(jobs, len(checks))) as pool:
+        for check, (error, validation_time) in zip(
+            checks, pool.map(_run_usage_check, checks)
+        ):
+            usage = ComponentUsageFailure(
+                projected=None,
+                component=None,
+                component_name=check.component_name,
+                smallest_error=error,
+            )
+            usage.validation_time = validation_time
+            usages[check.component_name] = usage
+    return usages
+
+
 @dataclass
 class AssembledMicroBehavior:
     usages: Dict[str, ComponentUsageFailure]
@@ -721,23 +1410,83 @@ class AssembledMicroBehavior:
         triggers: Dict[str, Regex[str]],
         skip_checks: bool = False,
         check_ambiguity: bool = False,
+        antichain: bool = False,
+        jobs: int = 1,
+        ambiguity_engine: str = AMBIGUITY_DFA,
+        trigger_cache: Optional[TriggerCache] = None,
+        materialize: bool = False,
+        budget: Optional[Budget] = None,
+        bounded: Optional[int] = None,
     ) -> "AssembledMicroBehavior":
+        """
+        :param jobs: check the usage of the components in this many processes
+        :param ambiguity_engine: how to check ambiguity (see AMBIGUITY_ENGINES)
+        :param trigger_cache: reuse the triggers determinized by previous compilations
+        :param materialize: explore the micro behavior once (see MicroBehavior.make)
+        :param budget: stop the checks when exceeded (see MicroBehavior.make)
+        :param bounded: only check the usages of the micro traces with at most
+        this many calls to subsystems (see ComponentUsageFailure.make); the
+        micro behavior is then never determinized nor fully explored, and the
+        usages are checked in this process
+        """
         if len(components) == 0:
             raise ValueError(errors.INTEGRATION_ERROR_ZERO_COMPONENTS)
+        if bounded is not None:
+            if bounded < 0:
+                raise ValueError(f"Invalid bound: {bounded}")
+            # the DFA engine determinizes the micro behavior upfront
+            ambiguity_engine = AMBIGUITY_PRODUCT
         alphabet: Set[str] = set()
         for c in components.values():
             alphabet.update(c.alphabet)
         micro = MicroBehavior.make(
-            external_behavior, triggers, alphabet, skip_checks, check_ambiguity
+            external_behavior,
+            triggers,
+            alphabet,
+            skip_checks,
+            check_ambiguity,
+            ambiguity_engine=ambiguity_engine,
+            trigger_cache=trigger_cache,
+            materialize=materialize,
+            budget=budget,
         )
         usages = dict()
-        if not skip_checks:
+        if not skip_checks and bounded is None and jobs > 1 and len(components) > 1:
+            external = external_behavior.as_dict()
+            checks = [
+                UsageCheck(
+                    external_behavior=external,
+                    triggers=triggers,
+                    alphabet=alphabet,
+                    component_name=k,
+                    component=c.system.nfa.as_dict(),
+                    antichain=antichain,
+                    trigger_cache=trigger_cache,
+                    materialize=materialize,
+                    budget=budget,
+                )
+                for k, c in components.items()
+            ]
+            usages = check_usages_parallel(checks, jobs)
+        elif not skip_checks:
+            if budget is not None:
+                budget.phase = "integration"
+            # the usages only depend on the language of the micro behavior
+            usage_nfa = (
+                micro.nfa if bounded is not None else micro.epsilon_free.as_nfa()
+            )
             usages = dict(
                 (
                     (
                         k,
                         ComponentUsageFailure.make(
-                            micro=micro.nfa, component=c.behavior, component_name=c.name
+                            micro=usage_nfa,
+                            component=c.behavior,
+                            component_name=c.name,
+                            antichain=antichain,
+                            component_dfa=None if antichain else c.dfa,
+                            budget=budget,
+                            bounded=bounded,
                         ),
                     )
                     for k, c in components.items()
@@ -785,37 +1534,143 @@ def parse_formula(data: Any) -> FormulaOrTrace:
     return hml.Formula.deserialize(data)
 
 
+class _TraceNode:
+    __slots__ = ("children", "keys")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TraceNode"] = dict()
+        self.keys: List[Any] = []
+
+
+class ModelChecker:
+    """
+    Checks traces and HML formulas against the same model. The model is
+    determinized at most once (and only when checking a formula), and traces
+    are checked together, by walking the trie of their prefixes on the fly
+    determinization of the model.
+    """
+
+    def __init__(
+        self,
+        nfa: NFA[Any, str],
+        make_dfa: Optional[Callable[[], DFA[Any, str]]] = None,
+    ):
+        """
+        :param make_dfa: builds the DFA of the model, if it is already known
+        """
+        self.nfa = nfa
+        self._make_dfa = make_dfa
+        self._dfa: Optional[DFA[Any, str]] = None
+        self.closure = EpsilonClosure(nfa)
+        self.post_table: Dict[Tuple[FrozenSet[Any], str], FrozenSet[Any]] = dict()
+
+    @property
+    def dfa(self) -> DFA[Any, str]:
+        if self._dfa is None:
+            if self._make_dfa is None:
+                self._dfa = nfa_to_dfa(self.nfa)
+            else:
+                self._dfa = self._make_dfa()
+        return self._dfa
+
+    def _check_word(self, word: List[str]) -> None:
+        for string in word:
+            if string not in self.nfa.alphabet:
+                raise ValueError(
+                    f"{errors.MODEL_CHECK_UNDECLARED_EVENT_IN_TRACE}: '{string}'"
+                )
+
+    def _post(self, states: FrozenSet[Any], char: str) -> FrozenSet[Any]:
+        key = (states, char)
+        result = self.post_table.get(key, None)
+        if result is None:
+            succ: Set[Any] = set()
+            for st in states:
+                succ.update(self.nfa.transition_func(st, char))
+            self.post_table[key] = result = self.closure.of_set(succ)
+        return result
+
+    def accepts_all(self, words: Mapping[Any, List[str]]) -> Dict[Any, bool]:
+        """
+        Checks if the model accepts each word; common prefixes are only
+        visited once.
+        """
+        root = _TraceNode()
+        for key, word in words.items():
+            self._check_word(word)
+            node = root
+            for char in word:
+                child = node.children.get(char, None)
+                if child is None:
+                    node.children[char] = child = _TraceNode()
+                node = child
+            node.keys.append(key)
+        result: Dict[Any, bool] = dict()
+        to_visit = [(root, self.closure(self.nfa.start_state))]
+        while len(to_visit) > 0:
+            node, states = to_visit.pop()
+            if len(node.keys) > 0:
+                accepted = any(self.nfa.accepted_states(st) for st in states)
+                for key in node.keys:
+                    result[key] = accepted
+            for char, child in node.children.items():
+                to_visit.append((child, self._post(states, char)))
+        return result
+
+    def __call__(self, word_or_formula: FormulaOrTrace) -> bool:
+        if isinstance(word_or_formula, list):
+            return self.accepts_all({0: word_or_formula})[0]
+        prop = nfa_to_dfa(word_or_formula.interpret(self.nfa.alphabet))
+        return not prop.intersection(self.dfa).is_empty()
+
+
 def check_traces(
     mc: Callable[[FormulaOrTrace], bool], tests: Mapping[str, Mapping[str, Any]]
 ) -> None:
-    for key, trace in tests.get("ok", dict()).items():
-        formula = parse_formula(trace)
-        if not mc(formula):
-            raise ValueError(
-                f"{errors.CHECK_TRACES_UNACCEPTED_VALID_TRACE} '{key}': {trace}"
+    """
+    Checks the tests that must hold (ok) and the tests that must not hold
+    (fail), and reports every failed test at once. Traces are checked together
+    when mc is a ModelChecker.
+    """
+    expected: Dict[Tuple[str, str], bool] = dict()
+    formulas: Dict[Tuple[str, str], FormulaOrTrace] = dict()
+    for (kind, value) in (("ok", True), ("fail", False)):
+        for key, trace in tests.get(kind, dict()).items():
+            expected[(kind, key)] = value
+            formulas[(kind, key)] = parse_formula(trace)
+
+    results: Dict[Tuple[str, str], bool] = dict()
+    if isinstance(mc, ModelChecker):
+        results.update(
+            mc.accepts_all(
+                dict(
+                    (k, cast(List[str], f))
+                    for (k, f) in formulas.items()
+                    if isinstance(f, list)
+                )
             )
-
-    for key, trace in tests.get("fail", dict()).items():
-        if mc(parse_formula(trace)):
-            raise ValueError(
-                f"{errors.CHECK_TRACES_UNEXPECTED_INVALID_TRACE} '{key}': {trace}"
+        )
+    for k, f in formulas.items():
+        if k not in results:
+            results[k] = mc(f)
+
+    errs = []
+    for (kind, key), value in expected.items():
+        if results[(kind, key)] != value:
+            msg = (
+                errors.CHECK_TRACES_UNACCEPTED_VALID_TRACE
+                if value
+                else errors.CHECK_TRACES_UNEXPECTED_INVALID_TRACE
             )
+            errs.append(f"{msg} '{key}': {tests[kind][key]}")
+    if len(errs) > 0:
+        raise ValueError("\n".join(errs))
 
 
 def model_check(
     nfa: NFA[Any, str], word_or_formula: Union[List[str], hml.Formula[str]]
 ) -> bool:
-    if isinstance(word_or_formula, list):
-        for string in word_or_formula:
-            if string not in nfa.alphabet:
-                raise ValueError(
-                    f"{errors.MODEL_CHECK_UNDECLARED_EVENT_IN_TRACE}: '{string}'"
-                )
-        return nfa.accepts(word_or_formula)
-    else:
-        prop = nfa_to_dfa(word_or_formula.interpret(nfa.alphabet))
-        model = nfa_to_dfa(nfa)
-        return not prop.intersection(model).is_empty()
+    return ModelChecker(nfa)(word_or_formula)
 
 
 @dataclass(frozen=True)
@@ -823,7 +1678,15 @@ class Timings:
     ambiguity_check_time: Optional[timedelta]
     integration_check_time: Optional[timedelta]
     unusable_operations_time: timedelta
+    transitions_memo_hits: int = 0
+    transitions_memo_misses: int = 0
+    # the size of the integration, before and after removing epsilon moves
+    integration_states: int = 0
+    integration_edges: int = 0
+    epsilon_free_states: int = 0
+    epsilon_free_edges: int = 0
     total_check_time: timedelta = field(init=False)
+    transitions_memo_hit_rate: float = field(init=False)
 
     def __post_init__(self):
         t1 = (
@@ -839,6 +1702,12 @@ class Timings:
         object.__setattr__(
             self, "total_check_time", t1 + t2 + self.unusable_operations_time
         )
+        lookups = self.transitions_memo_hits + self.transitions_memo_misses
+        object.__setattr__(
+            self,
+            "transitions_memo_hit_rate",
+            0.0 if lookups == 0 else self.transitions_memo_hits / lookups,
+        )
 
 
 @dataclass
@@ -851,45 +1720,60 @@ class AssembledDevice:
     is_valid: bool = field(init=False)
     sink_operations: FrozenSet[str] = field(init=False)
     unusable_operations: FrozenSet[str] = field(init=False)
+    dead_end_cycles: Tuple[DeadEndCycle, ...] = field(init=False)
     unusable_operations_time: timedelta = field(init=False)
+    _internal_checker: Optional[ModelChecker] = field(
+        init=False, default=None, repr=False, compare=False
+    )
+    _external_checker: Optional[ModelChecker] = field(
+        init=False, default=None, repr=False, compare=False
+    )
 
     def __post_init__(self):
         self.unusable_operations_time = timedelta()
         if not self.skip_checks:
             start = timer()
-            # Calculate unreachable and sink ops:
-
-            # only includes states that are reachable (and remove start)
-            reachable_states = set(self.external.nfa.states)
-            reachable_states.remove(self.external.nfa.start_state)
-
-            # only includes states that are reachable and not sink (and remove start)
-            reachable_states_without_sink = set(
-                self.external.nfa.remove_sink_states().states
-            )
-            reachable_states_without_sink.remove(self.external.nfa.start_state)
+            # Calculate unreachable and sink ops (the states of the external
+            # behavior are the operations, plus the start state)
+            analysis = analyze(self.external.nfa)
+            start_state = {self.external.nfa.start_state}
 
             # collect unreachable operations
             self.unusable_operations = frozenset(
-                set(self.operations) - reachable_states
+                set(self.operations) - analysis.reachable
             )
 
             # collect sink operations (does not include unreachable states!)
-            self.sink_operations = frozenset(
-                reachable_states - reachable_states_without_sink
-            )
+            self.sink_operations = analysis.sinks - start_state
+            self.dead_end_cycles = analysis.dead_end_cycles
 
             self.unusable_operations_time = get_elapsed_time(start)
 
             if self.failure is None:
                 if len(self.unusable_operations) > 0 or len(self.sink_operations) > 0:
                     self.failure = UnusableOperationsFailure(
-                        self.unusable_operations, self.sink_operations
+                        self.unusable_operations,
+                        self.sink_operations,
+                        self.dead_end_cycles,
                     )
             # End of unreachable ops
             self.is_valid = self.failure is None
 
     def get_timings(self) -> Timings:
+        transitions = None if self.internal is None else self.internal.micro.transitions
+        hits = 0 if transitions is None else transitions.hits
+        misses = 0 if transitions is None else transitions.misses
+        # only the sizes of what the checks explored (0 otherwise): measuring
+        # must not explore the integration
+        sizes = (0, 0, 0, 0)
+        if self.internal is not None:
+            micro = self.internal.micro
+            epsilon_free = micro._epsilon_free
+            if epsilon_free is not None:
+                free_size = (len(epsilon_free), epsilon_free.num_edges)
+                sizes = micro.explored_size + free_size
+            elif micro.graph is not None:
+                sizes = (len(micro.graph), micro.graph.num_all_edges(), 0, 0)
         return Timings(
             ambiguity_check_time=timedelta()
             if self.internal is None or self.internal.micro is None
@@ -898,17 +1782,37 @@ class AssembledDevice:
             if self.internal is None
             else self.internal.validation_time,
             unusable_operations_time=self.unusable_operations_time,
+            transitions_memo_hits=hits,
+            transitions_memo_misses=misses,
+            integration_states=sizes[0],
+            integration_edges=sizes[1],
+            epsilon_free_states=sizes[2],
+            epsilon_free_edges=sizes[3],
         )
 
+    @property
+    def internal_checker(self) -> ModelChecker:
+        if self.internal is None:
+            raise ValueError(f"{errors.MODEL_CHECK_NO_INTERNAL_BEHAVIOR}")
+        if self._internal_checker is None:
+            internal = self.internal
+            # reuse the DFA of the ambiguity check, if any
+            self._internal_checker = ModelChecker(internal.nfa, lambda: internal.dfa)
+        return self._internal_checker
+
+    @property
+    def external_checker(self) -> ModelChecker:
+        if self._external_checker is None:
+            self._external_checker = ModelChecker(self.external.nfa)
+        return self._external_checker
+
     def internal_model_check(
         self, word_or_formula: Union[List[str], hml.Formula[str]]
     ) -> bool:
-        if self.internal is None:
-            raise ValueError(f"{errors.MODEL_CHECK_NO_INTERNAL_BEHAVIOR}")
-        return model_check(self.internal.nfa, word_or_formula)
+        return self.internal_checker(word_or_formula)
 
     def external_model_check(self, word_or_formula: Union[List[str], hml.Formula[str]]):
-        return model_check(self.external.nfa, word_or_formula)
+        return self.external_checker(word_or_formula)
 
     @classmethod
     def make(
@@ -917,6 +1821,13 @@ class AssembledDevice:
         known_devices: TKnownDevices,
         skip_checks: bool = False,
         check_ambiguity: bool = False,
+        antichain: bool = False,
+        jobs: int = 1,
+        ambiguity_engine: str = AMBIGUITY_DFA,
+        trigger_cache: Optional[TriggerCache] = None,
+        materialize: bool = False,
+        budget: Optional[Budget] = None,
+        bounded: Optional[int] = None,
     ) -> "AssembledDevice":
         """
         In order to assemble a device, the following steps are required:
@@ -927,6 +1838,14 @@ class AssembledDevice:
 
         :param dev: the device to be assembled
         :param known_devices: map of device type to checked device instance (NFA)
+        :param antichain: check the usage of each component with an antichain
+        :param jobs: check the usage of the components in this many processes
+        :param ambiguity_engine: how to check ambiguity (see AMBIGUITY_ENGINES)
+        :param trigger_cache: reuse the triggers determinized by previous compilations
+        :param materialize: explore the micro behavior once (see MicroBehavior.make)
+        :param budget: stop the checks when exceeded (see MicroBehavior.make)
+        :param bounded: only check the usages up to this many calls to
+        subsystems (see AssembledMicroBehavior.make)
         :return:
         """
         ensure_well_formed(dev)
@@ -948,9 +1867,18 @@ class AssembledDevice:
                 triggers=dev.triggers,
                 skip_checks=skip_checks,
                 check_ambiguity=check_ambiguity,
+                antichain=antichain,
+                jobs=jobs,
+                ambiguity_engine=ambiguity_engine,
+                trigger_cache=trigger_cache,
+                materialize=materialize,
+                budget=budget,
+                bounded=bounded,
             )
 
             if not skip_checks:
+                if budget is not None:
+                    budget.phase = "counterexample"
                 fail = micro.get_failure(known_devices, dev.components)
 
         return cls(
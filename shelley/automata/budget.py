@@ -0,0 +1,145 @@
+"""
+Budgets on the exploration of automata: a maximum number of states per
+explored automaton, and a deadline. Automata are watched by wrapping their
+transition functions, so the budget is checked whenever a state is expanded,
+whichever algorithm (ours or karakuri's) does the exploration.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+from karakuri.regular import DFA, NFA
+
+MAX_STATES: str = "max-states"
+TIMEOUT: str = "timeout"
+# how many transitions are computed between two checks of the deadline
+CLOCK_PERIOD: int = 256
+
+
+@dataclass(frozen=True)
+class Inconclusive:
+    """
+    The verdict of a verification that ran out of budget.
+    """
+
+    # the check that was running (e.g., "ambiguity", "usage of b")
+    phase: str
+    # either MAX_STATES or TIMEOUT
+    reason: str
+    # the states of the automaton being explored, when the budget ran out
+    explored: int
+    # the states found but not yet expanded
+    frontier: int
+
+    def __str__(self) -> str:
+        return (
+            f"Inconclusive ({self.reason} exceeded) while checking {self.phase}:"
+            f" {self.explored} states explored, {self.frontier} in the frontier"
+        )
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, verdict: Inconclusive):
+        super().__init__(verdict)
+        self.verdict = verdict
+
+    def __str__(self) -> str:
+        return str(self.verdict)
+
+
+@dataclass
+class Budget:
+    """
+    :param max_states: the maximum number of states of each explored automaton
+    :param deadline: a time.time() after which the verification stops (absolute,
+    so that a budget can be shared with other processes)
+    """
+
+    max_states: Optional[int] = None
+    deadline: Optional[float] = None
+    # set by the caller before each check, reported when the budget runs out
+    phase: str = field(default="integration")
+
+    @classmethod
+    def make(
+        cls, max_states: Optional[int] = None, timeout: Optional[float] = None
+    ) -> Optional["Budget"]:
+        """
+        :param timeout: in seconds, from now
+        :return: None when there is no limit
+        """
+        if max_states is None and timeout is None:
+            return None
+        return cls(
+            max_states=max_states,
+            deadline=None if timeout is None else time.time() + timeout,
+        )
+
+    def check_deadline(self, explored: int = 0, frontier: int = 0) -> None:
+        if self.deadline is not None and time.time() > self.deadline:
+            raise BudgetExceeded(Inconclusive(self.phase, TIMEOUT, explored, frontier))
+
+    def watch_nfa(self, nfa: NFA[Any, Any]) -> NFA[Any, Any]:
+        exploration = _Exploration(self, nfa.start_state)
+
+        def transition_func(src: Any, char: Optional[Any]) -> Any:
+            result = nfa.transition_func(src, char)
+            exploration.expand(src, result)
+            return result
+
+        return NFA(
+            alphabet=nfa.alphabet,
+            transition_func=transition_func,
+            start_state=nfa.start_state,
+            accepted_states=nfa.accepted_states,
+        )
+
+    def watch_dfa(self, dfa: DFA[Any, Any]) -> DFA[Any, Any]:
+        exploration = _Exploration(self, dfa.start_state)
+
+        def transition_func(src: Any, char: Any) -> Any:
+            result = dfa.transition_func(src, char)
+            exploration.expand(src, (result,))
+            return result
+
+        return DFA(
+            alphabet=dfa.alphabet,
+            transition_func=transition_func,
+            start_state=dfa.start_state,
+            accepted_states=dfa.accepted_states,
+        )
+
+
+class _Exploration:
+    """
+    The states of an automaton found so far, and which of them were expanded.
+    """
+
+    def __init__(self, budget: Budget, start_state: Any):
+        self.budget = budget
+        # state -> expanded
+        self.states: Dict[Any, bool] = {start_state: False}
+        self.expanded = 0
+        self.calls = 0
+
+    def expand(self, src: Any, dsts: Iterable[Any]) -> None:
+        states = self.states
+        if not states.get(src, False):
+            states[src] = True
+            self.expanded += 1
+        for dst in dsts:
+            if dst not in states:
+                states[dst] = False
+                max_states = self.budget.max_states
+                if max_states is not None and len(states) > max_states:
+                    raise BudgetExceeded(
+                        Inconclusive(
+                            self.budget.phase,
+                            MAX_STATES,
+                            len(states),
+                            len(states) - self.expanded,
+                        )
+                    )
+        if self.calls % CLOCK_PERIOD == 0:
+            self.budget.check_deadline(len(states), len(states) - self.expanded)
+        self.calls += 1
@@ -37,6 +37,8 @@ UNUSABLE_OPERATIONS_UNREACHABLE = lambda x: f"Unreachable operations: {', '.join
 UNUSABLE_OPERATIONS_NO_YIELD_POINT = (
     lambda x: f"These operations do not reach a yield point: {', '.join(x)}"
 )
+# SUO3: a witness of a loop of operations that never reaches a yield point
+UNUSABLE_OPERATIONS_DEAD_END_CYCLE = lambda x: f"Dead-end cycle: {x}"
 
 # Invalid integration
 TRIGGER_NONE_SMALLEST_ERROR = (
@@ -0,0 +1,362 @@
+"""
+Structural analysis of automata on an explicit adjacency index: forward
+reachability, co-reachability (to accepting states), and strongly connected
+components, all in linear time on the number of reachable edges. Explicit
+copies of automata (ExplicitNFA) are built on the same index, either as is or
+without epsilon edges.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from karakuri.regular import NFA
+
+TEdge = Tuple[Optional[Any], int]
+
+
+class AdjacencyIndex:
+    """
+    The part of an automaton that is reachable from its start state, with the
+    states numbered in breadth-first order (the start state is 0). Each state
+    keeps the breadth-first edge that discovered it, so the path to any state
+    is a shortest path.
+    """
+
+    def __init__(self, nfa: NFA[Any, Any]):
+        chars: List[Optional[Any]] = sorted(x for x in nfa.alphabet if x is not None)
+        chars.append(None)  # epsilon
+        self.alphabet = nfa.alphabet
+        self.states: List[Any] = [nfa.start_state]
+        self.index: Dict[Any, int] = {nfa.start_state: 0}
+        self.succ: List[List[TEdge]] = []
+        self.parent: List[Optional[TEdge]] = [None]
+        for src in self.states:  # grows while visiting
+            src_id = len(self.succ)
+            edges: List[TEdge] = []
+            for char in chars:
+                for dst in nfa.transition_func(src, char):
+                    dst_id = self.index.get(dst, None)
+                    if dst_id is None:
+                        self.index[dst] = dst_id = len(self.states)
+                        self.states.append(dst)
+                        self.parent.append((char, src_id))
+                    edges.append((char, dst_id))
+            self.succ.append(edges)
+        self.accepting: List[bool] = [
+            bool(nfa.accepted_states(st)) for st in self.states
+        ]
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def predecessors(self) -> List[List[int]]:
+        pred: List[List[int]] = [[] for _ in self.states]
+        for src, edges in enumerate(self.succ):
+            for (_, dst) in edges:
+                pred[dst].append(src)
+        return pred
+
+    def co_reachable(self) -> List[bool]:
+        """
+        Marks the states that reach some accepting state.
+        """
+        pred = self.predecessors()
+        result = list(self.accepting)
+        to_visit = [st for (st, acc) in enumerate(result) if acc]
+        while len(to_visit) > 0:
+            for src in pred[to_visit.pop()]:
+                if not result[src]:
+                    result[src] = True
+                    to_visit.append(src)
+        return result
+
+    def sccs(self) -> List[List[int]]:
+        """
+        The strongly connected components (Tarjan's algorithm, iterative), in
+        reverse topological order.
+        """
+        count = len(self.states)
+        index = [-1] * count
+        low = [0] * count
+        on_stack = [False] * count
+        stack: List[int] = []
+        result: List[List[int]] = []
+        counter = 0
+        for root in range(count):
+            if index[root] != -1:
+                continue
+            work = [(root, 0)]
+            while len(work) > 0:
+                node, pos = work.pop()
+                if pos == 0:
+                    index[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                edges = self.succ[node]
+                while pos < len(edges):
+                    dst = edges[pos][1]
+                    pos += 1
+                    if index[dst] == -1:
+                        work.append((node, pos))
+                        work.append((dst, 0))
+                        break
+                    elif on_stack[dst]:
+                        low[node] = min(low[node], index[dst])
+                else:
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            st = stack.pop()
+                            on_stack[st] = False
+                            component.append(st)
+                            if st == node:
+                                break
+                        result.append(component)
+                    if len(work) > 0:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+        return result
+
+    def word_to(self, state: int) -> Tuple[Any, ...]:
+        """
+        The shortest word that reaches the given state (epsilons are omitted).
+        """
+        word = []
+        edge = self.parent[state]
+        while edge is not None:
+            char, src = edge
+            if char is not None:
+                word.append(char)
+            edge = self.parent[src]
+        word.reverse()
+        return tuple(word)
+
+    def cycle_from(self, state: int, component: Set[int]) -> Tuple[Any, ...]:
+        """
+        The shortest word that loops from the given state back to itself,
+        without leaving its strongly connected component.
+        """
+        parents: Dict[int, Tuple[Optional[Any], int]] = dict()
+        frontier = [state]
+        while len(frontier) > 0:
+            next_frontier = []
+            for src in frontier:
+                for (char, dst) in self.succ[src]:
+                    if dst not in component or dst in parents:
+                        continue
+                    parents[dst] = (char, src)
+                    if dst == state:
+                        word = []
+                        node = state
+                        while True:
+                            char, node = parents[node]
+                            if char is not None:
+                                word.append(char)
+                            if node == state:
+                                break
+                        word.reverse()
+                        return tuple(word)
+                    next_frontier.append(dst)
+            frontier = next_frontier
+        raise ValueError(f"State {self.states[state]!r} is not in a cycle")
+
+    def num_all_edges(self) -> int:
+        """
+        The number of edges, epsilon edges included.
+        """
+        return sum(len(x) for x in self.succ)
+
+    def remove_epsilon(self) -> "ExplicitNFA":
+        """
+        An equivalent automaton without epsilon edges: only the start state and
+        the targets of labelled edges are kept, and each kept state takes the
+        labelled edges (and the acceptance) of its epsilon closure.
+        """
+        kept = [0]
+        is_kept = [False] * len(self.states)
+        is_kept[0] = True
+        for edges in self.succ:
+            for (char, dst) in edges:
+                if char is not None and not is_kept[dst]:
+                    is_kept[dst] = True
+                    kept.append(dst)
+        tsx: Dict[Tuple[Any, Any], Set[Any]] = dict()
+        accepted: Set[Any] = set()
+        for src in kept:
+            src_st = self.states[src]
+            closure = {src}
+            to_visit = [src]
+            while len(to_visit) > 0:
+                for (char, dst) in self.succ[to_visit.pop()]:
+                    if char is None and dst not in closure:
+                        closure.add(dst)
+                        to_visit.append(dst)
+            for st in closure:
+                if self.accepting[st]:
+                    accepted.add(src_st)
+                for (char, dst) in self.succ[st]:
+                    if char is not None:
+                        dsts = tsx.get((src_st, char), None)
+                        if dsts is None:
+                            tsx[(src_st, char)] = dsts = set()
+                        dsts.add(self.states[dst])
+        return ExplicitNFA(
+            NFA(
+                alphabet=self.alphabet,
+                transition_func=NFA.transition_table(tsx),
+                start_state=self.states[0],
+                accepted_states=frozenset(accepted),
+            )
+        )
+
+
+@dataclass(frozen=True)
+class DeadEndCycle:
+    """
+    A cycle from which no accepting state can be reached: the prefix reaches
+    the cycle, which can then be repeated forever.
+    """
+
+    prefix: Tuple[Any, ...]
+    cycle: Tuple[Any, ...]
+    states: FrozenSet[Any]
+
+    def __str__(self) -> str:
+        prefix = ", ".join(map(str, self.prefix))
+        cycle = ", ".join(map(str, self.cycle))
+        return f"{prefix}, ({cycle})*" if prefix else f"({cycle})*"
+
+
+@dataclass(frozen=True)
+class StructuralAnalysis:
+    reachable: FrozenSet[Any]
+    # the reachable states that cannot reach an accepting state
+    sinks: FrozenSet[Any]
+    dead_end_cycles: Tuple[DeadEndCycle, ...]
+
+    @property
+    def useful(self) -> FrozenSet[Any]:
+        return self.reachable - self.sinks
+
+
+def analyze(nfa: NFA[Any, Any]) -> StructuralAnalysis:
+    graph = AdjacencyIndex(nfa)
+    useful = graph.co_reachable()
+    cycles = []
+    for component in graph.sccs():
+        if useful[component[0]]:
+            continue  # an SCC is either entirely useful or entirely useless
+        members = set(component)
+        if len(component) == 1:
+            (st,) = component
+            if not any(dst == st for (_, dst) in graph.succ[st]):
+                continue  # not a cycle
+        entry = min(component)  # closest to the start state
+        cycles.append(
+            DeadEndCycle(
+                prefix=graph.word_to(entry),
+                cycle=graph.cycle_from(entry, members),
+                states=frozenset(graph.states[st] for st in component),
+            )
+        )
+    cycles.sort(key=lambda x: (len(x.prefix), x.prefix))
+    return StructuralAnalysis(
+        reachable=frozenset(graph.states),
+        sinks=frozenset(graph.states[st] for (st, u) in enumerate(useful) if not u),
+        dead_end_cycles=tuple(cycles),
+    )
+
+
+def remove_sink_states(nfa: NFA[Any, Any]) -> NFA[Any, Any]:
+    """
+    Restricts the automaton to the states that are reachable and that reach
+    some accepting state (the start state is always kept).
+    """
+    graph = AdjacencyIndex(nfa)
+    useful = graph.co_reachable()
+    tsx: Dict[Tuple[Any, Optional[Any]], Set[Any]] = dict()
+    for src, edges in enumerate(graph.succ):
+        if not useful[src]:
+            continue
+        for (char, dst) in edges:
+            if useful[dst]:
+                key = (graph.states[src], char)
+                dsts = tsx.get(key, None)
+                if dsts is None:
+                    tsx[key] = dsts = set()
+                dsts.add(graph.states[dst])
+    accepted = frozenset(st for (st, acc) in zip(graph.states, graph.accepting) if acc)
+    return NFA(
+        alphabet=graph.alphabet,
+        transition_func=NFA.transition_table(tsx),
+        start_state=graph.states[0],
+        accepted_states=accepted,
+    )
+
+
+class ExplicitNFA(AdjacencyIndex):
+    """
+    An NFA whose reachable states were explored once: the states are numbered,
+    and the epsilon edges are kept apart from the other edges. The NFA given
+    by as_nfa has the same states and language as the explored one, but its
+    transitions are table lookups, so it can be walked again cheaply (e.g., by
+    each check of a compilation).
+    """
+
+    def __init__(self, nfa: NFA[Any, Any]):
+        super().__init__(nfa)
+        self.epsilon: List[List[int]] = []
+        self.edges: List[List[Tuple[Any, int]]] = []
+        for succ in self.succ:
+            self.epsilon.append([dst for (char, dst) in succ if char is None])
+            self.edges.append([(char, dst) for (char, dst) in succ if char is not None])
+        self._rows: Dict[int, Dict[Optional[Any], FrozenSet[Any]]] = dict()
+
+    @property
+    def num_edges(self) -> int:
+        return sum(len(x) for x in self.edges)
+
+    @property
+    def num_epsilon_edges(self) -> int:
+        return sum(len(x) for x in self.epsilon)
+
+    def row(self, idx: int) -> Dict[Optional[Any], FrozenSet[Any]]:
+        row = self._rows.get(idx, None)
+        if row is None:
+            succs: Dict[Optional[Any], Set[Any]] = dict()
+            for (char, dst) in self.succ[idx]:
+                succs.setdefault(char, set()).add(self.states[dst])
+            self._rows[idx] = row = dict((k, frozenset(v)) for (k, v) in succs.items())
+        return row
+
+    def transition_func(self, src: Any, char: Optional[Any]) -> FrozenSet[Any]:
+        idx = self.index.get(src, None)
+        if idx is None:
+            return frozenset()
+        return self.row(idx).get(char, frozenset())
+
+    def as_nfa(self) -> NFA[Any, Any]:
+        return NFA(
+            alphabet=self.alphabet,
+            transition_func=self.transition_func,
+            start_state=self.states[0],
+            accepted_states=frozenset(
+                st for (st, acc) in zip(self.states, self.accepting) if acc
+            ),
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        The same representation as NFA.as_dict, without walking the NFA again.
+        """
+        return dict(
+            start_state=self.states[0],
+            accepted_states=[
+                st for (st, acc) in zip(self.states, self.accepting) if acc
+            ],
+            edges=[
+                dict(src=self.states[src], char=char, dst=self.states[dst])
+                for (src, succ) in enumerate(self.succ)
+                for (char, dst) in succ
+            ],
+        )
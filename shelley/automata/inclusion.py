@@ -0,0 +1,164 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from karakuri.regular import NFA
+
+A = TypeVar("A")
+
+
+class EpsilonClosure:
+    """
+    Memoized epsilon closure of the states of an NFA.
+    """
+
+    def __init__(self, nfa: NFA[Any, Any]):
+        self.nfa = nfa
+        self.table: Dict[Any, FrozenSet[Any]] = dict()
+
+    def __call__(self, state: Any) -> FrozenSet[Any]:
+        result = self.table.get(state, None)
+        if result is not None:
+            return result
+        visited = {state}
+        to_visit = [state]
+        while len(to_visit) > 0:
+            for dst in self.nfa.transition_func(to_visit.pop(), None):
+                if dst not in visited:
+                    visited.add(dst)
+                    to_visit.append(dst)
+        self.table[state] = result = frozenset(visited)
+        return result
+
+    def of_set(self, states: Iterable[Any]) -> FrozenSet[Any]:
+        result: Set[Any] = set()
+        for st in states:
+            result.update(self(st))
+        return frozenset(result)
+
+
+@dataclass
+class InclusionResult:
+    # the shortest word accepted by the left-hand side but not by the right-hand side
+    counterexample: Optional[Tuple[Any, ...]]
+    # the left-hand side accepts some (non-empty) word
+    accepts_any: bool
+
+    @property
+    def is_included(self) -> bool:
+        return self.counterexample is None
+
+
+class _Node:
+    __slots__ = ("state", "others", "parent", "char")
+
+    def __init__(
+        self,
+        state: Any,
+        others: FrozenSet[Any],
+        parent: Optional["_Node"],
+        char: Any,
+    ) -> None:
+        self.state = state
+        self.others = others
+        self.parent = parent
+        self.char = char
+
+    def word(self) -> Tuple[Any, ...]:
+        result = []
+        node = self
+        while node.parent is not None:
+            result.append(node.char)
+            node = node.parent
+        result.reverse()
+        return tuple(result)
+
+
+def check_inclusion(
+    left: NFA[Any, A],
+    right: NFA[Any, A],
+    alphabet: Optional[Iterable[A]] = None,
+    nonempty: bool = False,
+) -> InclusionResult:
+    """
+    Checks if the language of left is included in the language of right,
+    without determinizing left. Explores the product of the states of left
+    with the sets of states of right on the fly (breadth first, so the
+    counterexample is the shortest), and prunes a pair (p, S) when a pair
+    (p, T) with T a subset of S was already found (antichain).
+
+    :param alphabet: the characters to explore (defaults to the alphabet of left)
+    :param nonempty: ignore the empty word
+    """
+    chars: List[A] = sorted(left.alphabet if alphabet is None else alphabet)
+    left_closure = EpsilonClosure(left)
+    right_closure = EpsilonClosure(right)
+    post_table: Dict[Tuple[FrozenSet[Any], A], FrozenSet[Any]] = dict()
+
+    def post(states: FrozenSet[Any], char: A) -> FrozenSet[Any]:
+        key = (states, char)
+        result = post_table.get(key, None)
+        if result is None:
+            succ = set()
+            for st in states:
+                succ.update(right.transition_func(st, char))
+            post_table[key] = result = right_closure.of_set(succ)
+        return result
+
+    accepting_table: Dict[FrozenSet[Any], bool] = dict()
+
+    def right_accepts(states: FrozenSet[Any]) -> bool:
+        result = accepting_table.get(states, None)
+        if result is None:
+            accepting_table[states] = result = any(
+                right.accepted_states(st) for st in states
+            )
+        return result
+
+    antichain: Dict[Any, List[FrozenSet[Any]]] = dict()
+
+    def insert(state: Any, states: FrozenSet[Any]) -> bool:
+        found = antichain.get(state, None)
+        if found is None:
+            antichain[state] = [states]
+            return True
+        for other in found:
+            if other <= states:
+                # subsumed: a counterexample from (state, states) is also one from (state, other)
+                return False
+        found[:] = [other for other in found if not states <= other]
+        found.append(states)
+        return True
+
+    accepts_any = False
+    # the initial pair is not added to the antichain, as the empty word may be ignored
+    start = _Node(left.start_state, right_closure(right.start_state), None, None)
+    to_visit: Deque[_Node] = deque([start])
+    while len(to_visit) > 0:
+        node = to_visit.popleft()
+        check = node is not start or not nonempty
+        for st in left_closure(node.state):
+            if check and left.accepted_states(st):
+                accepts_any = True
+                if not right_accepts(node.others):
+                    return InclusionResult(node.word(), accepts_any)
+            for char in chars:
+                dsts = left.transition_func(st, char)
+                if len(dsts) == 0:
+                    continue
+                others = post(node.others, char)
+                for dst in dsts:
+                    if insert(dst, others):
+                        to_visit.append(_Node(dst, others, node, char))
+    return InclusionResult(None, accepts_any)
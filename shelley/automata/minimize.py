@@ -0,0 +1,237 @@
+"""
+DFA minimization (Hopcroft's partition refinement) on integer-coded DFAs.
+
+DFAs are partial: a missing transition rejects, so the sink state is never
+materialized, neither by the minimizer nor in its result (see IntDFA.to_dfa).
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, FrozenSet, List, Set, Tuple
+
+from karakuri.regular import DFA, NFA, nfa_to_dfa
+
+# the target of a missing transition
+REJECT: int = -1
+
+
+@dataclass(frozen=True)
+class IntDFA:
+    """
+    A partial DFA whose states are numbered from the start state (0), and
+    where transitions[st][i] is the successor of st by the i-th character of
+    the (sorted) alphabet, or REJECT.
+    """
+
+    alphabet: Tuple[str, ...]
+    transitions: Tuple[Tuple[int, ...], ...]
+    accepted: FrozenSet[int]
+
+    def __len__(self) -> int:
+        return len(self.transitions)
+
+    @property
+    def num_edges(self) -> int:
+        return sum(1 for row in self.transitions for dst in row if dst != REJECT)
+
+    @classmethod
+    def from_dfa(cls, dfa: DFA[Any, str]) -> "IntDFA":
+        """
+        Numbers the reachable states of a DFA in breadth-first order, and drops
+        the states that cannot reach an accepting state (e.g., the sink).
+        """
+        alphabet = tuple(sorted(dfa.alphabet))
+        ids: Dict[Any, int] = {dfa.start_state: 0}
+        states: List[Any] = [dfa.start_state]
+        rows: List[List[int]] = []
+        for src in states:  # grows while visiting
+            row = []
+            for char in alphabet:
+                dst = dfa.transition_func(src, char)
+                idx = ids.get(dst, None)
+                if idx is None:
+                    ids[dst] = idx = len(states)
+                    states.append(dst)
+                row.append(idx)
+            rows.append(row)
+        accepted = [bool(dfa.accepted_states(st)) for st in states]
+        return cls._trim(alphabet, rows, accepted)
+
+    @classmethod
+    def from_nfa(cls, nfa: NFA[Any, str]) -> "IntDFA":
+        return cls.from_dfa(nfa_to_dfa(nfa))
+
+    @classmethod
+    def _trim(
+        cls, alphabet: Tuple[str, ...], rows: List[List[int]], accepted: List[bool]
+    ) -> "IntDFA":
+        """
+        Keeps the states reachable from 0 that reach an accepting state, and
+        renumbers them in breadth-first order (characters in alphabet order).
+        """
+        pred: List[List[int]] = [[] for _ in rows]
+        for src, row in enumerate(rows):
+            for dst in row:
+                if dst != REJECT:
+                    pred[dst].append(src)
+        useful = list(accepted)
+        to_visit = [st for (st, acc) in enumerate(accepted) if acc]
+        while len(to_visit) > 0:
+            for src in pred[to_visit.pop()]:
+                if not useful[src]:
+                    useful[src] = True
+                    to_visit.append(src)
+        ids: Dict[int, int] = {0: 0}
+        order: List[int] = [0]
+        transitions: List[Tuple[int, ...]] = []
+        for src in order:  # grows while visiting
+            row = []
+            for dst in rows[src]:
+                if dst == REJECT or not useful[dst]:
+                    row.append(REJECT)
+                    continue
+                idx = ids.get(dst, None)
+                if idx is None:
+                    ids[dst] = idx = len(order)
+                    order.append(dst)
+                row.append(idx)
+            transitions.append(tuple(row))
+        return cls(
+            alphabet=alphabet,
+            transitions=tuple(transitions),
+            accepted=frozenset(ids[st] for st in order if accepted[st]),
+        )
+
+    def to_dfa(self) -> DFA[int, str]:
+        """
+        A (total) DFA of the same language: missing transitions go to REJECT,
+        which loops on every character.
+        """
+        index = dict((char, idx) for (idx, char) in enumerate(self.alphabet))
+        transitions = self.transitions
+
+        def transition_func(src: int, char: str) -> int:
+            if src == REJECT:
+                return REJECT
+            return transitions[src][index[char]]
+
+        return DFA(
+            alphabet=set(self.alphabet),
+            transition_func=transition_func,
+            start_state=0,
+            accepted_states=self.accepted.__contains__,
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        The same representation as NFA.as_dict (without the sink).
+        """
+        return dict(
+            start_state=0,
+            accepted_states=sorted(self.accepted),
+            edges=[
+                dict(src=src, char=char, dst=dst)
+                for (src, row) in enumerate(self.transitions)
+                for (char, dst) in zip(self.alphabet, row)
+                if dst != REJECT
+            ],
+        )
+
+
+def hopcroft(dfa: IntDFA) -> IntDFA:
+    """
+    The minimal DFA of the same language, numbered as in IntDFA.from_dfa.
+
+    The partition starts with the accepting and the other states, and is
+    refined by the splitters (block, character) of a queue: each splitter
+    separates, in every block, the states that have a transition into the
+    splitter block from those that do not. Once a block was a splitter, only
+    the smaller half of a split is queued. With partial DFAs both initial
+    blocks are splitters (the predecessors of all states are not all states),
+    and the input must not have useless states, which IntDFA ensures.
+    """
+    count = len(dfa)
+    num_chars = len(dfa.alphabet)
+    # inverse transitions: inverse[char][dst] lists the predecessors of dst
+    inverse: List[Dict[int, List[int]]] = [dict() for _ in range(num_chars)]
+    for src, row in enumerate(dfa.transitions):
+        for char, dst in enumerate(row):
+            if dst != REJECT:
+                preds = inverse[char].get(dst, None)
+                if preds is None:
+                    inverse[char][dst] = preds = []
+                preds.append(src)
+
+    blocks: List[Set[int]] = []
+    block_of: List[int] = [0] * count
+    for members in (
+        set(dfa.accepted),
+        set(st for st in range(count) if st not in dfa.accepted),
+    ):
+        if len(members) > 0:
+            for st in members:
+                block_of[st] = len(blocks)
+            blocks.append(members)
+
+    queue: Deque[Tuple[int, int]] = deque(
+        (block, char) for block in range(len(blocks)) for char in range(num_chars)
+    )
+
+    while len(queue) > 0:
+        block, char = queue.popleft()
+        # the states with a transition into the splitter, grouped by block
+        touched: Dict[int, Set[int]] = dict()
+        preds_of = inverse[char]
+        for dst in blocks[block]:
+            for src in preds_of.get(dst, ()):
+                group = touched.get(block_of[src], None)
+                if group is None:
+                    touched[block_of[src]] = group = set()
+                group.add(src)
+        for old, members in touched.items():
+            if len(members) == len(blocks[old]):
+                continue  # not split
+            rest = blocks[old] - members
+            # the new block gets the smaller half
+            if len(members) <= len(rest):
+                blocks[old], new_members = rest, members
+            else:
+                blocks[old], new_members = members, rest
+            new = len(blocks)
+            blocks.append(new_members)
+            for st in new_members:
+                block_of[st] = new
+            # if (old, other) is queued, both halves are now; otherwise the
+            # smaller half is enough
+            queue.extend((new, other) for other in range(num_chars))
+
+    # one state per block, numbered from the block of the start state
+    rows: List[List[int]] = []
+    accepted: List[bool] = []
+    ids: Dict[int, int] = {block_of[0]: 0}
+    order: List[int] = [block_of[0]]
+    for block in order:  # grows while visiting
+        rep = next(iter(blocks[block]))
+        new_row: List[int] = []
+        for dst in dfa.transitions[rep]:
+            if dst == REJECT:
+                new_row.append(REJECT)
+                continue
+            idx = ids.get(block_of[dst], None)
+            if idx is None:
+                ids[block_of[dst]] = idx = len(order)
+                order.append(block_of[dst])
+            new_row.append(idx)
+        rows.append(new_row)
+        accepted.append(rep in dfa.accepted)
+    return IntDFA(
+        alphabet=dfa.alphabet,
+        transitions=tuple(tuple(row) for row in rows),
+        accepted=frozenset(st for (st, acc) in enumerate(accepted) if acc),
+    )
+
+
+def minimize_dfa(dfa: DFA[Any, str]) -> DFA[int, str]:
+    """
+    The minimal DFA of the given DFA (see hopcroft).
+    """
+    return hopcroft(IntDFA.from_dfa(dfa)).to_dfa()
@@ -0,0 +1,155 @@
+"""
+Projections of an integration on its subsystems: the DFA of the operations of
+one subsystem, where the operations of the other subsystems are epsilon moves
+(see shelleyv.handle_fsm with a project_prefix). Every projection is built
+from a single exploration of the integration, and the epsilon closures of its
+states are shared by all projections.
+"""
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Union
+
+from karakuri.regular import NFA
+
+from shelley.automata.graph import AdjacencyIndex
+from shelley.automata.minimize import REJECT, IntDFA, hopcroft
+
+
+def instance_prefixes(alphabet: Iterable[Optional[str]]) -> List[str]:
+    """
+    The prefixes of the subsystem instances used by the operations of an
+    integration (e.g., "v." for "v.on").
+    """
+    return sorted(
+        set(char.split(".", 1)[0] + "." for char in alphabet if char and "." in char)
+    )
+
+
+def remove_empty_string(dfa: IntDFA) -> IntDFA:
+    """
+    The same language without the empty string: the start state is copied,
+    as a state that is not accepting.
+    """
+    if 0 not in dfa.accepted:
+        return dfa
+    shift = lambda dst: dst if dst == REJECT else dst + 1
+    rows = [list(map(shift, dfa.transitions[0]))]
+    rows.extend(list(map(shift, row)) for row in dfa.transitions)
+    accepted = [False] + [st in dfa.accepted for st in range(len(dfa))]
+    return IntDFA._trim(dfa.alphabet, rows, accepted)
+
+
+class Projections:
+    """
+    The integration is explored once, without its sink states (as with
+    nfa_no_sink). The projection on a subsystem is built by the subset
+    construction on the explored states, where the closure of a state follows
+    the shared epsilon closures and the operations of the other subsystems.
+    """
+
+    def __init__(self, nfa: Union[NFA[Any, str], AdjacencyIndex]):
+        graph = nfa if isinstance(nfa, AdjacencyIndex) else AdjacencyIndex(nfa)
+        self.graph = graph
+        useful = graph.co_reachable()
+        self.useful_count = sum(1 for x in useful if x)
+        # the edges of each state to useful states, by character
+        self.edges: List[Dict[Optional[str], List[int]]] = []
+        for succ in graph.succ:
+            edges: Dict[Optional[str], List[int]] = dict()
+            for (char, dst) in succ:
+                if useful[dst]:
+                    edges.setdefault(char, []).append(dst)
+            self.edges.append(edges)
+        self._epsilon: Dict[int, FrozenSet[int]] = dict()
+
+    def __len__(self) -> int:
+        return len(self.graph)
+
+    def epsilon_closure(self, st: int) -> FrozenSet[int]:
+        result = self._epsilon.get(st, None)
+        if result is None:
+            members = {st}
+            to_visit = [st]
+            while len(to_visit) > 0:
+                for dst in self.edges[to_visit.pop()].get(None, ()):
+                    if dst not in members:
+                        members.add(dst)
+                        to_visit.append(dst)
+            self._epsilon[st] = result = frozenset(members)
+        return result
+
+    def project(self, prefix: str) -> IntDFA:
+        """
+        The minimal DFA of the operations that start with the prefix (without
+        it), without the empty string.
+        """
+        own: Dict[str, str] = dict()
+        for char in self.graph.alphabet:
+            if char is not None and char.startswith(prefix):
+                own[char] = char[len(prefix) :]
+        alphabet = tuple(sorted(own.values()))
+        index = dict((name, idx) for (idx, name) in enumerate(alphabet))
+        # the closure of each state in the projection
+        closures: Dict[int, FrozenSet[int]] = dict()
+
+        def close_state(st: int) -> FrozenSet[int]:
+            result = closures.get(st, None)
+            if result is None:
+                members: Set[int] = set()
+                to_visit = [st]
+                while len(to_visit) > 0:
+                    src = to_visit.pop()
+                    if src in members:
+                        continue
+                    for member in self.epsilon_closure(src):
+                        if member in members:
+                            continue
+                        members.add(member)
+                        for (char, dsts) in self.edges[member].items():
+                            if char is not None and char not in own:
+                                to_visit.extend(dsts)
+                closures[st] = result = frozenset(members)
+            return result
+
+        def close(states: Iterable[int]) -> FrozenSet[int]:
+            result: Set[int] = set()
+            for st in states:
+                if st not in result:
+                    result.update(close_state(st))
+            return frozenset(result)
+
+        ids: Dict[FrozenSet[int], int] = dict()
+        order: List[FrozenSet[int]] = [close([0])]
+        ids[order[0]] = 0
+        rows: List[List[int]] = []
+        for subset in order:  # grows while visiting
+            targets: List[Set[int]] = [set() for _ in alphabet]
+            for member in subset:
+                for (char, dsts) in self.edges[member].items():
+                    name = own.get(char, None) if char is not None else None
+                    if name is not None:
+                        targets[index[name]].update(dsts)
+            row = []
+            for target in targets:
+                if len(target) == 0:
+                    row.append(REJECT)
+                    continue
+                dst = close(target)
+                idx = ids.get(dst, None)
+                if idx is None:
+                    ids[dst] = idx = len(order)
+                    order.append(dst)
+                row.append(idx)
+            rows.append(row)
+        accepting = self.graph.accepting
+        accepted = [any(accepting[st] for st in subset) for subset in order]
+        dfa = IntDFA._trim(alphabet, rows, accepted)
+        return hopcroft(remove_empty_string(dfa))
+
+
+def project_all(
+    nfa: Union[NFA[Any, str], AdjacencyIndex], prefixes: Iterable[str]
+) -> Dict[str, IntDFA]:
+    """
+    The projection of the integration on each prefix (see Projections).
+    """
+    projections = Projections(nfa)
+    return dict((prefix, projections.project(prefix)) for prefix in prefixes)
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Collection, FrozenSet, List, Optional, Tuple
+
+from karakuri.regular import DFA, Regex, nfa_to_dfa, regex_to_nfa
+
+logger = logging.getLogger("shelleyc")
+
+# Bump whenever the determinization of triggers changes, to invalidate old entries
+FORMAT_VERSION: int = 1
+ENTRY_EXT: str = "trigger"
+
+
+@dataclass(frozen=True)
+class TriggerDFA:
+    """
+    A determinized trigger, as a table: states are numbered in breadth-first
+    order from the start state (0), and transitions[st][i] is the successor of
+    st by the i-th character of the (sorted) alphabet.
+    """
+
+    alphabet: Tuple[str, ...]
+    transitions: Tuple[Tuple[int, ...], ...]
+    accepted: FrozenSet[int]
+
+    @classmethod
+    def from_dfa(cls, dfa: DFA[Any, str]) -> "TriggerDFA":
+        alphabet = tuple(sorted(dfa.alphabet))
+        ids: Dict[Any, int] = {dfa.start_state: 0}
+        states: List[Any] = [dfa.start_state]
+        transitions: List[Tuple[int, ...]] = []
+        for src in states:  # grows while visiting
+            row = []
+            for char in alphabet:
+                dst = dfa.transition_func(src, char)
+                idx = ids.get(dst, None)
+                if idx is None:
+                    ids[dst] = idx = len(states)
+                    states.append(dst)
+                row.append(idx)
+            transitions.append(tuple(row))
+        accepted = frozenset(ids[st] for st in states if dfa.accepted_states(st))
+        return cls(alphabet, tuple(transitions), accepted)
+
+    def to_dfa(self) -> DFA[int, str]:
+        index = dict((char, idx) for (idx, char) in enumerate(self.alphabet))
+        transitions = self.transitions
+
+        def transition_func(src: int, char: str) -> int:
+            return transitions[src][index[char]]
+
+        return DFA(
+            alphabet=set(self.alphabet),
+            transition_func=transition_func,
+            start_state=0,
+            accepted_states=self.accepted.__contains__,
+        )
+
+    def __len__(self) -> int:
+        return len(self.transitions)
+
+
+class TriggerCache:
+    """
+    On-disk store of determinized triggers, keyed by the structure of the
+    trigger (its regular expression) and by the alphabet of the integration.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def key(self, rule: Regex[str], alphabet: Collection[str]) -> str:
+        h = hashlib.sha256()
+        h.update(json.dumps([FORMAT_VERSION, sorted(alphabet)]).encode())
+        # regular expressions are dataclasses, their representation is structural
+        h.update(repr(rule).encode())
+        return h.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.path / f"{key}.{ENTRY_EXT}"
+
+    def load(self, key: str) -> Optional[TriggerDFA]:
+        entry = self._entry(key)
+        try:
+            with entry.open("rb") as f:
+                result = pickle.load(f)
+            if not isinstance(result, TriggerDFA):
+                raise ValueError(f"unexpected {type(result).__name__}")
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            logger.debug(f"Discarding invalid trigger cache entry {entry}: {err}")
+            entry.unlink(missing_ok=True)
+            return None
+        return result
+
+    def store(self, key: str, trigger: TriggerDFA) -> None:
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(trigger, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._entry(key))
+        except OSError as err:
+            logger.debug(f"Could not store trigger cache entry: {err}")
+
+    def entries(self) -> List[Path]:
+        return list(self.path.glob(f"*.{ENTRY_EXT}"))
+
+    def clear(self) -> None:
+        for entry in self.entries():
+            entry.unlink(missing_ok=True)
+
+
+def determinize_triggers(
+    triggers: Dict[str, Regex[str]],
+    alphabet: Collection[str],
+    cache: Optional[TriggerCache] = None,
+) -> Dict[str, DFA[int, str]]:
+    """
+    Determinizes each trigger over the given alphabet. Triggers that share the
+    same regular expression (the same object, see RegexTable, or a structurally
+    equal one) share the same DFA, and the DFAs are loaded from (and stored to)
+    the cache when one is given.
+    """
+    by_id: Dict[int, DFA[int, str]] = dict()
+    by_key: Dict[str, DFA[int, str]] = dict()
+    result: Dict[str, DFA[int, str]] = dict()
+    for name, rule in triggers.items():
+        dfa = by_id.get(id(rule), None)
+        if dfa is None:
+            key = repr(rule) if cache is None else cache.key(rule, alphabet)
+            dfa = by_key.get(key, None)
+            if dfa is None:
+                table = None if cache is None else cache.load(key)
+                if table is None:
+                    table = TriggerDFA.from_dfa(
+                        nfa_to_dfa(regex_to_nfa(rule, alphabet))
+                    )
+                    if cache is not None:
+                        cache.store(key, table)
+                by_key[key] = dfa = table.to_dfa()
+            by_id[id(rule)] = dfa
+        result[name] = dfa
+    return result
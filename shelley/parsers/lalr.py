@@ -0,0 +1,84 @@
+import os
+import logging
+from pathlib import Path
+from typing import Optional
+
+import lark
+from lark import Lark
+from lark.exceptions import UnexpectedInput
+
+logger = logging.getLogger("shelley.parsers")
+
+
+def _default_cache_dir() -> Optional[Path]:
+    # Set SHELLEY_CACHE_DIR to relocate the cache, or to an empty string to disable it
+    value = os.environ.get("SHELLEY_CACHE_DIR")
+    if value is None:
+        return Path.home() / ".cache" / "shelley"
+    return Path(value) if value else None
+
+
+CACHE_DIR: Optional[Path] = _default_cache_dir()
+
+
+def _cache_path(grammar: str) -> Optional[Path]:
+    if CACHE_DIR is None:
+        return None
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return CACHE_DIR / f"{Path(grammar).stem}-lark-{lark.__version__}.cache"
+
+
+def open_lalr(grammar: str, rel_to: str, start: str) -> Lark:
+    """
+    Builds an LALR parser, loading its tables from the on-disk cache when possible.
+    Lark invalidates a cache entry whenever the grammar (or any grammar it imports)
+    changes.
+    """
+    cache = _cache_path(grammar)
+    if cache is not None:
+        try:
+            return Lark.open(
+                grammar, rel_to=rel_to, start=start, parser="lalr", cache=str(cache)
+            )
+        except OSError as err:
+            logger.debug(f"Could not use parser cache {cache}: {err}")
+    return Lark.open(grammar, rel_to=rel_to, start=start, parser="lalr")
+
+
+class FallbackParser:
+    """
+    Parses with the LALR grammar and falls back to the Earley grammar when the
+    input is outside the LALR subset. Both parsers are only built on first use.
+    """
+
+    def __init__(self, lalr_grammar: str, earley_grammar: str, rel_to: str, start: str):
+        self.lalr_grammar = lalr_grammar
+        self.earley_grammar = earley_grammar
+        self.rel_to = rel_to
+        self.start = start
+        self._lalr: Optional[Lark] = None
+        self._earley: Optional[Lark] = None
+
+    @property
+    def lalr(self) -> Lark:
+        if self._lalr is None:
+            self._lalr = open_lalr(self.lalr_grammar, self.rel_to, self.start)
+        return self._lalr
+
+    @property
+    def earley(self) -> Lark:
+        if self._earley is None:
+            self._earley = Lark.open(
+                self.earley_grammar, rel_to=self.rel_to, start=self.start
+            )
+        return self._earley
+
+    def parse(self, text: str) -> lark.Tree:
+        try:
+            return self.lalr.parse(text)
+        except UnexpectedInput:
+            logger.debug("LALR parser rejected the input, falling back to Earley")
+        return self.earley.parse(text)
@@ -1,8 +1,10 @@
-from lark import Lark, Transformer
+from lark import Transformer
 from dataclasses import dataclass, field
 from io import StringIO
 from typing import List, Optional, IO
 
+from shelley.parsers.lalr import FallbackParser
+
 
 @dataclass
 class Formula:
@@ -329,7 +331,9 @@ def dump(formula: Formula, fp: IO, eos=None, nusvm_strict=True):
     rec(formula)
 
 
-def dumps(formula, eos=None, nusvm_strict=True):
+def dumps(
+    formula: Formula, eos: Optional[str] = None, nusvm_strict: bool = True
+) -> str:
     buffer = StringIO()
     dump(
         formula=formula,
@@ -340,7 +344,12 @@ def dumps(formula, eos=None, nusvm_strict=True):
     return buffer.getvalue()
 
 
-parser = Lark.open("ltlf_grammar.lark", rel_to=__file__, start="formula")
+parser = FallbackParser(
+    lalr_grammar="ltlf_grammar_lalr.lark",
+    earley_grammar="ltlf_grammar.lark",
+    rel_to=__file__,
+    start="formula",
+)
 
 
 class LTLParser(Transformer):
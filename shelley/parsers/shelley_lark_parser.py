@@ -1,5 +1,5 @@
 import copy
-from lark import Lark, Transformer
+from lark import Transformer
 from shelley.ast.rules import (
     TriggerRule,
     TriggerRuleEvent,
@@ -9,6 +9,7 @@ from shelley.ast.rules import (
     TriggerRuleFired,
 )
 from shelley.parsers import errors
+from shelley.parsers.lalr import FallbackParser
 from pathlib import Path
 from shelley.ast.triggers import Trigger, Triggers, TriggersListDuplicatedError
 from shelley.ast.components import Components
@@ -21,7 +22,12 @@ from dataclasses import dataclass
 INITIAL = 1
 FINAL = 2
 
-parser = Lark.open("shelley_grammar.lark", rel_to=__file__, start="sys")
+parser = FallbackParser(
+    lalr_grammar="shelley_grammar_lalr.lark",
+    earley_grammar="shelley_grammar.lark",
+    rel_to=__file__,
+    start="sys",
+)
 
 
 @dataclass
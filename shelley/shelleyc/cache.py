@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass, fields
+from datetime import timedelta
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from karakuri import regular
+
+from shelley.automata import CheckedDevice, Timings
+from shelley.automata.triggers import TriggerCache
+from shelley.parsers.lalr import CACHE_DIR
+
+logger = logging.getLogger("shelleyc")
+
+# Bump whenever the format of the entries changes, to invalidate old entries
+# (changes to the checks are caught by the digest of the sources, see key)
+FORMAT_VERSION: int = 2
+DEFAULT_MAX_SIZE: int = 128 * 1024 * 1024  # bytes
+ENTRY_EXT: str = "entry"
+
+
+def _package_version(name: str) -> str:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+# The files of the shelley package that the compiler reads: the sources and
+# the grammars of the parsers
+SOURCE_PATTERNS: List[str] = ["*.py", "*.lark"]
+
+
+@lru_cache(maxsize=None)
+def sources_digest() -> str:
+    """
+    A digest of the sources and grammars of the shelley package, since its
+    version does not change with the checks.
+    """
+    root = Path(__file__).parent.parent
+    paths = set(path for pattern in SOURCE_PATTERNS for path in root.rglob(pattern))
+    h = hashlib.sha256()
+    for path in sorted(paths):
+        h.update(path.relative_to(root).as_posix().encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def nfa_digest(nfa: regular.NFA[Any, str]) -> str:
+    """
+    A digest of the NFA that does not depend on the order of its edges.
+    """
+    data = nfa.as_dict()
+    canonical = dict(
+        start_state=repr(data["start_state"]),
+        accepted_states=sorted(repr(x) for x in data["accepted_states"]),
+        edges=sorted(
+            (repr(e["src"]), repr(e["char"]), repr(e["dst"])) for e in data["edges"]
+        ),
+    )
+    return hashlib.sha256(json.dumps(canonical).encode()).hexdigest()
+
+
+@dataclass
+class CachedDevice:
+    """
+    The outcome of a previous compilation: the external behavior and the
+    verification verdict. The internal behavior is not kept.
+    """
+
+    external: CheckedDevice
+    failure: Optional[str]
+    timings: Timings
+    internal: None = None
+
+    @property
+    def is_valid(self) -> bool:
+        return self.failure is None
+
+    def get_timings(self) -> Timings:
+        return self.timings
+
+
+class CompileCache:
+    """
+    Content-addressed store of compilation results. Entries are keyed by the
+    hash of the source, of the check flags, and of the dependencies; the least
+    recently used entries are evicted once the store exceeds max_size bytes.
+    The determinized triggers are kept in a separate store (see TriggerCache).
+    """
+
+    def __init__(self, path: Path, max_size: int = DEFAULT_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.triggers = TriggerCache(path / "triggers")
+
+    @classmethod
+    def default(cls) -> Optional["CompileCache"]:
+        if CACHE_DIR is None:
+            return None
+        return cls(CACHE_DIR / "compile")
+
+    def key(
+        self,
+        source: bytes,
+        dependencies: Iterable[str],
+        *,
+        skip_checks: bool,
+        skip_testing: bool,
+        check_ambiguity: bool,
+        ambiguity_engine: str,
+        antichain: bool,
+        minimize: bool = False,
+        bounded: Optional[int] = None,
+    ) -> str:
+        """
+        :param source: the text of the Shelley source
+        :param dependencies: the digests of the dependencies, in a stable order
+        """
+        h = hashlib.sha256()
+        header = dict(
+            format=FORMAT_VERSION,
+            shelley=_package_version("shelley"),
+            sources=sources_digest(),
+            karakuri=_package_version("karakuri"),
+            skip_checks=skip_checks,
+            skip_testing=skip_testing,
+            check_ambiguity=check_ambiguity,
+            ambiguity_engine=ambiguity_engine,
+            antichain=antichain,
+            minimize=minimize,
+            bounded=bounded,
+            dependencies=list(dependencies),
+        )
+        h.update(json.dumps(header).encode())
+        h.update(source)
+        return h.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.path / f"{key}.{ENTRY_EXT}"
+
+    def load(self, key: str) -> Optional[CachedDevice]:
+        entry = self._entry(key)
+        try:
+            with entry.open("rb") as f:
+                data: Dict[str, Any] = pickle.load(f)
+            device = CachedDevice(
+                external=CheckedDevice(regular.NFA.from_dict(data["external"])),
+                failure=data["failure"],
+                timings=Timings(**data["timings"]),
+            )
+            os.utime(entry)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            logger.debug(f"Discarding invalid cache entry {entry}: {err}")
+            entry.unlink(missing_ok=True)
+            return None
+        logger.debug(f"Cache hit: {entry}")
+        return device
+
+    def store(self, key: str, device: Any) -> None:
+        """
+        :param device: an AssembledDevice (or a CachedDevice)
+        """
+        timings = device.get_timings()
+        data = dict(
+            external=device.external.nfa.as_dict(),
+            failure=None if device.is_valid else str(device.failure),
+            timings=dict(
+                (f.name, getattr(timings, f.name)) for f in fields(timings) if f.init
+            ),
+        )
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            # write then rename, so that concurrent compilations never see partial entries
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._entry(key))
+        except OSError as err:
+            logger.debug(f"Could not store cache entry: {err}")
+            return
+        self.evict()
+
+    def entries(self) -> List[Path]:
+        return list(self.path.glob(f"*.{ENTRY_EXT}"))
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache fits max_size.
+        """
+        stats = []
+        for entry in self.entries():
+            try:
+                stats.append((entry, entry.stat()))
+            except FileNotFoundError:
+                pass
+        total = sum(st.st_size for (_, st) in stats)
+        for (entry, st) in sorted(stats, key=lambda x: x[1].st_mtime):
+            if total <= self.max_size:
+                break
+            entry.unlink(missing_ok=True)
+            total -= st.st_size
+            logger.debug(f"Evicted cache entry: {entry}")
+
+    def clear(self) -> None:
+        for entry in self.entries():
+            entry.unlink(missing_ok=True)
+        self.triggers.clear()
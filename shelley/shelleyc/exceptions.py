@@ -1,5 +1,20 @@
 # README: moved here because of module cyclic dependencies problems
+from shelley.automata.budget import Inconclusive
 
 
 class CompilationError(Exception):
     pass
+
+
+class InconclusiveError(CompilationError):
+    """
+    The checks ran out of budget (the verdict is a budget.Inconclusive).
+    """
+
+    def __init__(self, verdict: Inconclusive) -> None:
+        super().__init__(str(verdict))
+        self.verdict = verdict
+
+    def __reduce__(self):
+        # keep the verdict when sent from another process
+        return (InconclusiveError, (self.verdict,))
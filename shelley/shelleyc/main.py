@@ -6,12 +6,18 @@ import sys
 import yaml
 
 from shelley.shelleyc import settings
-from shelley.shelleyc.exceptions import CompilationError
+from shelley.shelleyc.exceptions import CompilationError, InconclusiveError
 from shelley.shelleyc import shelleyc
+from shelley.shelleyc import project
+from shelley.shelleyc.cache import CompileCache
+from shelley.automata import AMBIGUITY_DFA, AMBIGUITY_ENGINES
+from shelley.automata.budget import Budget
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("shelleyc")
 
+INCONCLUSIVE_EXIT_STATUS: int = 2
+
 
 def create_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Compile shelley files")
@@ -28,7 +34,18 @@ def create_parser() -> argparse.ArgumentParser:
         "--device",
         type=Path,
         help="Path to the input example yaml file",
-        required=True,
+    )
+    parser.add_argument(
+        "--project",
+        type=Path,
+        help="compile every system listed in this uses file, in dependency order",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of processes used to check the usage of subsystems (and to compile independent systems of a project)",
     )
     parser.add_argument(
         "-i",
@@ -64,6 +81,49 @@ def create_parser() -> argparse.ArgumentParser:
         help="Also check ambiguity.",
         action="store_true",
     )
+    parser.add_argument(
+        "--ambiguity-engine",
+        choices=AMBIGUITY_ENGINES,
+        default=AMBIGUITY_DFA,
+        help="how to check ambiguity: determinize the integration (dfa), or search the product of the integration with itself (product)",
+    )
+    parser.add_argument(
+        "--antichain",
+        help="check the usage of subsystems with an antichain-based inclusion check (does not determinize the integration)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--materialize",
+        help="explore the integration once into an explicit graph that every check reuses (uses more memory)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--minimize",
+        help="save the minimal behavior of each system (smaller, canonically numbered files)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--bounded",
+        type=int,
+        metavar="K",
+        help="only check the usage of subsystems on the traces with at most K subsystem calls (finds the shortest errors, but a valid system is only valid up to K)",
+    )
+    parser.add_argument(
+        "--max-states",
+        type=int,
+        help="give up (inconclusive, exit status 2) when an explored automaton exceeds this many states",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="give up (inconclusive, exit status 2) after this many seconds",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        help="always recompile, ignoring (and not updating) the compilation cache",
+        action="store_false",
+    )
     return parser
 
 
@@ -72,7 +132,14 @@ def get_args() -> argparse.Namespace:
 
 
 def parse() -> None:
-    args: argparse.Namespace = get_args()
+    parser = create_parser()
+    args: argparse.Namespace = parser.parse_args()
+    if args.device is None and args.project is None:
+        parser.error("one of the arguments -d/--device --project is required")
+    if args.project is not None and args.uses is not None:
+        parser.error("argument -u/--uses: not allowed with argument --project")
+    if args.bounded is not None and args.bounded < 0:
+        parser.error("argument --bounded: must not be negative")
 
     settings.VERBOSE = args.verbosity
     if settings.VERBOSE:
@@ -80,20 +147,57 @@ def parse() -> None:
 
     logger.debug("Input yaml file: {0}".format(args.device))
 
+    cache = CompileCache.default() if args.use_cache else None
+    budget = Budget.make(max_states=args.max_states, timeout=args.timeout)
+
     try:
-        shelleyc.compile_shelley(
-            src_path=args.device,
-            uses_path=args.uses,
-            dst_path=args.output,
-            binary=args.binary,
-            integration=args.integration,
-            dump_timings=args.dump_timings,
-            save_output=args.save_output,
-            skip_testing=args.skip_testing,
-            skip_checks=args.skip_checks,
-            check_ambiguity=args.check_ambiguity,
-        )
+        if args.project is not None:
+            project.compile_project(
+                uses_path=args.project,
+                src_path=args.device,
+                dst_path=args.output,
+                binary=args.binary,
+                integration=args.integration,
+                dump_timings=args.dump_timings,
+                save_output=args.save_output,
+                skip_testing=args.skip_testing,
+                skip_checks=args.skip_checks,
+                check_ambiguity=args.check_ambiguity,
+                ambiguity_engine=args.ambiguity_engine,
+                antichain=args.antichain,
+                jobs=args.jobs,
+                materialize=args.materialize,
+                minimize=args.minimize,
+                budget=budget,
+                bounded=args.bounded,
+                cache=cache,
+            )
+        else:
+            shelleyc.compile_shelley(
+                src_path=args.device,
+                uses_path=args.uses,
+                dst_path=args.output,
+                binary=args.binary,
+                integration=args.integration,
+                dump_timings=args.dump_timings,
+                save_output=args.save_output,
+                skip_testing=args.skip_testing,
+                skip_checks=args.skip_checks,
+                check_ambiguity=args.check_ambiguity,
+                ambiguity_engine=args.ambiguity_engine,
+                antichain=args.antichain,
+                jobs=args.jobs,
+                materialize=args.materialize,
+                minimize=args.minimize,
+                budget=budget,
+                bounded=args.bounded,
+                cache=cache,
+            )
         logger.debug("OK!")
+    except InconclusiveError as error:
+        print(str(error), file=sys.stderr)
+        logger.debug("INCONCLUSIVE!")
+        sys.exit(INCONCLUSIVE_EXIT_STATUS)
     except CompilationError as error:
         if settings.VERBOSE:
             logger.error(str(error), exc_info=settings.VERBOSE)
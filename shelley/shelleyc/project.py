@@ -0,0 +1,289 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, IO
+
+from karakuri import regular
+
+from shelley.automata import CheckedDevice, AMBIGUITY_DFA
+from shelley.automata.budget import Budget
+from shelley.ast.devices import Device as ShelleyDevice
+from shelley.shelleyc import settings
+from shelley.shelleyc.cache import CompileCache
+from shelley.shelleyc.exceptions import CompilationError
+from shelley.shelleyc.shelleyc import (
+    DeviceMapping,
+    compile_shelley,
+    parse_shelley,
+    _parse_uses,
+    _get_ext,
+)
+
+logger = logging.getLogger("shelleyc")
+
+
+@dataclass
+class ProjectSystem:
+    name: str
+    src_path: Path
+    dst_path: Path
+    device: ShelleyDevice
+
+    @property
+    def uses(self) -> List[str]:
+        return self.device.uses
+
+
+@dataclass
+class CompileOptions:
+    binary: bool = False
+    save_output: bool = True
+    skip_testing: bool = True
+    skip_checks: bool = False
+    check_ambiguity: bool = False
+    ambiguity_engine: str = AMBIGUITY_DFA
+    antichain: bool = False
+    jobs: int = 1
+    materialize: bool = False
+    minimize: bool = False
+    budget: Optional[Budget] = None
+    bounded: Optional[int] = None
+    cache: Optional[CompileCache] = None
+
+
+def _find_source(name: str, dst_path: Path, base_dir: Path) -> Path:
+    """
+    The uses file only lists compiled files, the source is expected to have the
+    same name, either next to the compiled file or next to the uses file.
+    """
+    exts = settings.EXT_SHELLEY_SOURCE_LARK + settings.EXT_SHELLEY_SOURCE_YAML
+    for folder in (dst_path.parent, base_dir):
+        for ext in exts:
+            src_path = folder / f"{dst_path.stem}.{ext}"
+            if src_path.exists():
+                return src_path
+    raise CompilationError(
+        f"Error loading system '{name}': source of {dst_path} not found"
+    )
+
+
+def load_project(uses_path: Path) -> Dict[str, ProjectSystem]:
+    """
+    Parses every system listed in the uses file.
+    """
+    base_dir = uses_path.parent
+    systems: Dict[str, ProjectSystem] = dict()
+    for name, compiled in _parse_uses(uses_path).items():
+        dst_path = Path(compiled)
+        if not dst_path.is_absolute():
+            dst_path = base_dir / dst_path
+        src_path = _find_source(name, dst_path, base_dir)
+        systems[name] = ProjectSystem(
+            name=name,
+            src_path=src_path,
+            dst_path=dst_path,
+            device=parse_shelley(src_path),
+        )
+    return systems
+
+
+def topological_order(systems: Dict[str, ProjectSystem]) -> List[str]:
+    """
+    Orders the systems so that every system comes after the systems it uses.
+    Uses that are not part of the project are ignored (they are reported when
+    compiling the system that needs them).
+    """
+    order: List[str] = []
+    visited: Dict[str, bool] = dict()  # False while visiting, True when done
+
+    def visit(name: str, path: List[str]) -> None:
+        done = visited.get(name, None)
+        if done is True:
+            return
+        if done is False:
+            cycle = path[path.index(name) :] + [name]
+            raise CompilationError(f"Cyclic dependency: {' -> '.join(cycle)}")
+        visited[name] = False
+        for dep in systems[name].uses:
+            if dep in systems:
+                visit(dep, path + [name])
+        visited[name] = True
+        order.append(name)
+
+    for name in systems:
+        visit(name, [])
+    return order
+
+
+def _compile_system(
+    system: ProjectSystem,
+    known_devices: DeviceMapping,
+    options: CompileOptions,
+    dst_path: Optional[Path] = None,
+    integration: Optional[Path] = None,
+    dump_timings: Optional[IO[str]] = None,
+) -> CheckedDevice:
+    dst_path = system.dst_path if dst_path is None else dst_path
+    if options.save_output:
+        dst_path.parent.mkdir(parents=True, exist_ok=True)
+    logger.debug(f"Compiling system {system.name}: {system.src_path}")
+    _, dev = compile_shelley(
+        src_path=system.src_path,
+        uses_path=None,
+        dst_path=dst_path,
+        binary=options.binary,
+        integration=integration,
+        dump_timings=dump_timings,
+        save_output=options.save_output,
+        skip_testing=options.skip_testing,
+        skip_checks=options.skip_checks,
+        check_ambiguity=options.check_ambiguity,
+        ambiguity_engine=options.ambiguity_engine,
+        antichain=options.antichain,
+        jobs=options.jobs,
+        materialize=options.materialize,
+        minimize=options.minimize,
+        budget=options.budget,
+        bounded=options.bounded,
+        shelley_device=system.device,
+        known_devices=known_devices,
+        cache=options.cache,
+    )
+    return dev.external
+
+
+def _compile_worker(
+    system: ProjectSystem, uses: Dict[str, Dict[str, Any]], options: CompileOptions
+) -> Dict[str, Any]:
+    # NFAs are not picklable, so dependencies are exchanged as dictionaries
+    known_devices = DeviceMapping(
+        loaded=dict(
+            (k, CheckedDevice(regular.NFA.from_dict(v))) for (k, v) in uses.items()
+        )
+    )
+    # the pool already runs in parallel, check the usages sequentially
+    options = replace(options, jobs=1)
+    return _compile_system(system, known_devices, options).nfa.as_dict()
+
+
+def _compile_parallel(
+    systems: Dict[str, ProjectSystem],
+    order: List[str],
+    options: CompileOptions,
+    jobs: int,
+) -> Dict[str, CheckedDevice]:
+    compiled: Dict[str, Dict[str, Any]] = dict()
+    missing = dict(
+        (name, set(dep for dep in systems[name].uses if dep in systems))
+        for name in order
+    )
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        running: Dict[Future, str] = dict()
+
+        def schedule() -> None:
+            for name in order:
+                if name in compiled or name in running.values():
+                    continue
+                if len(missing[name]) == 0:
+                    system = systems[name]
+                    uses = dict((k, compiled[k]) for k in system.uses if k in compiled)
+                    running[pool.submit(_compile_worker, system, uses, options)] = name
+
+        schedule()
+        while len(running) > 0:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                # on error, the pool waits for the running systems before re-raising
+                compiled[name] = future.result()
+                for deps in missing.values():
+                    deps.discard(name)
+            schedule()
+
+    return dict(
+        (name, CheckedDevice(regular.NFA.from_dict(compiled[name]))) for name in order
+    )
+
+
+def compile_project(
+    *,
+    uses_path: Path,
+    src_path: Optional[Path] = None,
+    dst_path: Optional[Path] = None,
+    binary: bool = False,
+    integration: Optional[Path] = None,
+    dump_timings: Optional[IO[str]] = None,
+    save_output: bool = True,
+    skip_testing: bool = True,
+    skip_checks: bool = False,
+    check_ambiguity: bool = False,
+    ambiguity_engine: str = AMBIGUITY_DFA,
+    antichain: bool = False,
+    jobs: int = 1,
+    materialize: bool = False,
+    minimize: bool = False,
+    budget: Optional[Budget] = None,
+    bounded: Optional[int] = None,
+    cache: Optional[CompileCache] = None,
+) -> Dict[str, CheckedDevice]:
+    """
+    Compiles every system of a uses file in dependency order, within a single
+    process. Compiled systems are kept in memory for the systems that use them
+    (they are still saved to disk, unless save_output is False).
+
+    :param uses_path: the uses file that lists the systems of the project
+    :param src_path: an optional system (not in the uses file) to compile last
+    :param dst_path: compiled file destination path of src_path
+    :param integration: dump the integration diagram of src_path
+    :param dump_timings: dump the verification timings of src_path
+    :param jobs: compile independent systems in a pool of this many processes (a
+    system compiled on its own checks the usage of its subsystems in parallel)
+    :param budget: shared by every system (the deadline applies to the whole project)
+    :param bounded: check the usages of every system up to this many subsystem calls
+    :param cache: reuse the results of previous compilations
+    :return: the compiled systems, by name
+    """
+    options = CompileOptions(
+        binary=binary,
+        save_output=save_output,
+        skip_testing=skip_testing,
+        skip_checks=skip_checks,
+        check_ambiguity=check_ambiguity,
+        ambiguity_engine=ambiguity_engine,
+        antichain=antichain,
+        jobs=jobs,
+        materialize=materialize,
+        minimize=minimize,
+        budget=budget,
+        bounded=bounded,
+        cache=cache,
+    )
+    systems = load_project(uses_path)
+    order = topological_order(systems)
+    logger.debug(f"Project compilation order: {', '.join(order)}")
+
+    if jobs > 1:
+        compiled = _compile_parallel(systems, order, options, jobs)
+    else:
+        compiled = dict()
+        for name in order:
+            known_devices = DeviceMapping(loaded=dict(compiled))
+            compiled[name] = _compile_system(systems[name], known_devices, options)
+
+    if src_path is not None:
+        device = parse_shelley(src_path)
+        if dst_path is None:
+            dst_path = src_path.parent / (src_path.stem + "." + _get_ext(binary))
+        system = ProjectSystem(
+            name=device.name, src_path=src_path, dst_path=dst_path, device=device
+        )
+        compiled[device.name] = _compile_system(
+            system,
+            DeviceMapping(loaded=dict(compiled)),
+            options,
+            integration=integration,
+            dump_timings=dump_timings,
+        )
+
+    return compiled
@@ -0,0 +1,280 @@
+"""
+Version 2 of the binary format of compiled devices (.scb).
+
+All states and characters are interned into tables, and transitions are
+stored as packed unsigned 32-bit arrays in CSR layout (the edges of state i
+are the entries offsets[i]:offsets[i + 1] of chars/dsts). All integers are
+little-endian, and every section is aligned to 4 bytes:
+
+    header
+    states table
+    chars table (the epsilon transition, if any, has a placeholder entry)
+    accepted states: uint32[n_accepted]
+    offsets:         uint32[n_states + 1]
+    chars:           uint32[n_edges]
+    dsts:            uint32[n_edges]
+
+A table is either a list of UTF-8 strings (uint32[n + 1] offsets followed by
+the encoded strings) or, when some value is not a string, a pickled list
+(uint32 length followed by the pickle).
+
+Files are memory-mapped when loaded, and the NFA only decodes the edges of a
+state when the state is first visited.
+"""
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple, cast
+
+from karakuri import regular
+
+MAGIC: bytes = b"SCB\x02"
+VERSION: int = 2
+NO_INDEX: int = 0xFFFFFFFF
+TABLE_STR: int = 0
+TABLE_PICKLE: int = 1
+# magic, version, n_states, n_chars, n_edges, n_accepted, start, epsilon, kinds of tables
+HEADER = struct.Struct("<4sIIIIIIIBB2x")
+UINT32 = struct.Struct("<I")
+
+
+def is_scb(path: Path) -> bool:
+    with path.open("rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 4)
+
+
+def _pack(values: Sequence[int]) -> bytes:
+    arr = array("I", values)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _encode_table(values: List[Any]) -> Tuple[int, bytes]:
+    if all(isinstance(x, str) for x in values):
+        encoded = [x.encode("utf-8") for x in values]
+        offsets = [0]
+        for x in encoded:
+            offsets.append(offsets[-1] + len(x))
+        return TABLE_STR, _pack(offsets) + _pad(b"".join(encoded))
+    data = pickle.dumps(values, pickle.HIGHEST_PROTOCOL)
+    return TABLE_PICKLE, UINT32.pack(len(data)) + _pad(data)
+
+
+def encode(device: Dict[str, Any]) -> bytes:
+    """
+    Encodes the dictionary representation of an NFA (see NFA.as_dict).
+    """
+    state_ids: Dict[Any, int] = dict()
+    char_ids: Dict[Any, int] = dict()
+
+    def intern(table: Dict[Any, int], value: Any) -> int:
+        idx = table.get(value, None)
+        if idx is None:
+            table[value] = idx = len(table)
+        return idx
+
+    start = intern(state_ids, device["start_state"])
+    accepted = [intern(state_ids, x) for x in device["accepted_states"]]
+    edges = [
+        (intern(state_ids, e["src"]), intern(char_ids, e["char"]), e["dst"])
+        for e in device["edges"]
+    ]
+    edges = [(src, char, intern(state_ids, dst)) for (src, char, dst) in edges]
+    edges.sort()
+
+    epsilon = char_ids.get(None, NO_INDEX)
+    chars = list(char_ids)
+    if epsilon != NO_INDEX:
+        chars[epsilon] = ""
+    states = list(state_ids)
+
+    offsets = [0] * (len(states) + 1)
+    for (src, _, _) in edges:
+        offsets[src + 1] += 1
+    for i in range(len(states)):
+        offsets[i + 1] += offsets[i]
+
+    states_kind, states_data = _encode_table(states)
+    chars_kind, chars_data = _encode_table(chars)
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        len(states),
+        len(chars),
+        len(edges),
+        len(accepted),
+        start,
+        epsilon,
+        states_kind,
+        chars_kind,
+    )
+    return b"".join(
+        [
+            header,
+            states_data,
+            chars_data,
+            _pack(accepted),
+            _pack(offsets),
+            _pack([char for (_, char, _) in edges]),
+            _pack([dst for (_, _, dst) in edges]),
+        ]
+    )
+
+
+def dump(path: Path, device: Dict[str, Any]) -> None:
+    data = encode(device)
+    # Replace the file atomically: a process that memory-mapped the previous
+    # version keeps reading it
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class _Reader:
+    def __init__(self, buffer: memoryview):
+        self.buffer = buffer
+        self.offset = 0
+
+    def uints(self, count: int) -> Sequence[int]:
+        start = self.offset
+        self.offset += 4 * count
+        view = self.buffer[start : self.offset]
+        if sys.byteorder == "little":
+            return view.cast("I")
+        arr = array("I", view)
+        arr.byteswap()
+        return arr
+
+    def raw(self, count: int) -> memoryview:
+        start = self.offset
+        self.offset += count + (-count % 4)
+        return self.buffer[start : start + count]
+
+    def table(self, kind: int, count: int) -> Sequence[Any]:
+        if kind == TABLE_STR:
+            offsets = self.uints(count + 1)
+            return _StringTable(offsets, self.raw(offsets[count]))
+        elif kind == TABLE_PICKLE:
+            (size,) = UINT32.unpack(self.raw(UINT32.size))
+            return cast(Sequence[Any], pickle.loads(self.raw(size)))
+        raise ValueError(f"Unknown table kind: {kind}")
+
+
+class _StringTable(Sequence[str]):
+    def __init__(self, offsets: Sequence[int], data: memoryview):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return str(self.data[self.offsets[idx] : self.offsets[idx + 1]], "utf-8")
+
+
+class BinaryDevice:
+    """
+    A compiled device backed by a (memory-mapped) buffer.
+    """
+
+    def __init__(self, buffer: memoryview):
+        (
+            magic,
+            version,
+            n_states,
+            n_chars,
+            n_edges,
+            n_accepted,
+            self.start,
+            self.epsilon,
+            states_kind,
+            chars_kind,
+        ) = HEADER.unpack(buffer[: HEADER.size])
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported binary format: {magic!r} {version}")
+        reader = _Reader(buffer)
+        reader.offset = HEADER.size
+        self.states: Sequence[Any] = reader.table(states_kind, n_states)
+        self.chars: Sequence[Any] = reader.table(chars_kind, n_chars)
+        self.accepted = reader.uints(n_accepted)
+        self.offsets = reader.uints(n_states + 1)
+        self.edge_chars = reader.uints(n_edges)
+        self.edge_dsts = reader.uints(n_edges)
+        self._index: Optional[Dict[Any, int]] = None
+        self._rows: Dict[int, Dict[Optional[str], FrozenSet[Any]]] = dict()
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_dsts)
+
+    def char(self, idx: int) -> Optional[str]:
+        return None if idx == self.epsilon else self.chars[idx]
+
+    @property
+    def alphabet(self) -> FrozenSet[str]:
+        return frozenset(
+            self.chars[i] for i in range(len(self.chars)) if i != self.epsilon
+        )
+
+    def index(self, state: Any) -> Optional[int]:
+        if self._index is None:
+            self._index = dict((st, i) for (i, st) in enumerate(self.states))
+        return self._index.get(state, None)
+
+    def row(self, idx: int) -> Dict[Optional[str], FrozenSet[Any]]:
+        row = self._rows.get(idx, None)
+        if row is None:
+            succs: Dict[Optional[str], Set[Any]] = dict()
+            for e in range(self.offsets[idx], self.offsets[idx + 1]):
+                dst = self.states[self.edge_dsts[e]]
+                succs.setdefault(self.char(self.edge_chars[e]), set()).add(dst)
+            self._rows[idx] = row = dict((k, frozenset(v)) for (k, v) in succs.items())
+        return row
+
+    def transition_func(self, src: Any, char: Optional[str]) -> FrozenSet[Any]:
+        idx = self.index(src)
+        if idx is None:
+            return frozenset()
+        return self.row(idx).get(char, frozenset())
+
+    def as_nfa(self) -> regular.NFA[Any, str]:
+        accepted = frozenset(self.states[i] for i in self.accepted)
+        return regular.NFA(
+            alphabet=self.alphabet,
+            transition_func=self.transition_func,
+            start_state=self.states[self.start],
+            accepted_states=accepted,
+        )
+
+
+def load(path: Path) -> BinaryDevice:
+    with path.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            raise ValueError(f"Empty file: {path}")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return BinaryDevice(memoryview(buffer))
+
+
+def load_nfa(path: Path) -> regular.NFA[Any, str]:
+    return load(path).as_nfa()
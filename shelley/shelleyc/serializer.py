@@ -11,6 +11,7 @@ from shelley.automata import CheckedDevice
 
 from shelley.shelleyc.exceptions import CompilationError
 from shelley.shelleyc import settings
+from shelley.shelleyc import scb
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -50,15 +51,37 @@ def _deserialize_checked_device(path: Path) -> CheckedDevice:
 
 
 def _serialize_checked_device_binary(path: Path, device: Dict[Any, Any]) -> None:
-    with path.open(mode="wb") as f:
-        pickle.dump(device, f, pickle.HIGHEST_PROTOCOL)
+    scb.dump(path, device)
 
 
-def _deserialize_checked_device_binary(path: Path) -> CheckedDevice:
+def _load_nfa_pickle(path: Path) -> regular.NFA[Any, str]:
+    # binary files written before the .scb v2 format
     with path.open(mode="rb") as f:
         load = pickle.load(f)
-    nfa = regular.NFA[Any, str].from_dict(load)
-    return CheckedDevice(nfa)
+    return regular.NFA[Any, str].from_dict(load)
+
+
+def _load_nfa_binary(path: Path) -> regular.NFA[Any, str]:
+    if scb.is_scb(path):
+        return scb.load_nfa(path)
+    return _load_nfa_pickle(path)
+
+
+def _deserialize_checked_device_binary(path: Path) -> CheckedDevice:
+    return CheckedDevice(_load_nfa_binary(path))
+
+
+def load_nfa(path: Path) -> regular.NFA[Any, str]:
+    """
+    Loads a compiled file (or an integration model), either binary or YAML,
+    regardless of its extension.
+    """
+    with path.open(mode="rb") as f:
+        magic = f.read(len(scb.MAGIC))
+    if magic == scb.MAGIC or magic[:1] == pickle.PROTO:
+        return _load_nfa_binary(path)
+    with path.open(mode="r") as f:
+        return regular.NFA[Any, str].from_dict(yaml.load(f, Loader=yaml.FullLoader))
 
 
 def serialize(path: Path, device: Dict[Any, Any], binary: bool = False) -> None:
@@ -1,20 +1,27 @@
+import hashlib
 import logging
 import os
-from typing import List, Dict, Optional, Any, cast, IO
+from typing import List, Dict, Optional, Any, cast, IO, Tuple, Union
 from pathlib import Path
 import yaml
+from karakuri import regular
 
 from shelley.shelleyc import settings
-from shelley.shelleyc.exceptions import CompilationError
+from shelley.shelleyc.exceptions import CompilationError, InconclusiveError
 from shelley.shelleyc.serializer import serialize, deserialize
 from shelley.shelleyc.stats import save_timings
+from shelley.shelleyc.cache import CompileCache, CachedDevice, nfa_digest
 
 from shelley.automata import (
     CheckedDevice,
     AssembledDevice,
     check_traces,
     AssembledMicroBehavior,
+    AMBIGUITY_DFA,
+    minimize_behavior,
 )
+from shelley.automata.budget import Budget, BudgetExceeded
+from shelley.automata.graph import ExplicitNFA
 from shelley.ast.devices import Device as ShelleyDevice
 from shelley.shelley2automata import shelley2automata
 
@@ -31,10 +38,11 @@ class DeviceMapping:
         files: Optional[Dict[str, Path]] = None,
         binary: bool = False,
         base_dir: Path = Path.cwd(),
+        loaded: Optional[Dict[str, CheckedDevice]] = None,
     ):
         self.files = dict() if files is None else files
         self.binary = binary
-        self.loaded: Dict[str, CheckedDevice] = dict()
+        self.loaded: Dict[str, CheckedDevice] = dict() if loaded is None else loaded
         self.base_dir = base_dir
 
     def __getitem__(self, key):
@@ -52,6 +60,23 @@ class DeviceMapping:
         except (KeyError, IOError) as err:
             raise CompilationError(f"Error loading system '{key}': {err}")
 
+    def digest(self, key: str) -> Optional[str]:
+        """
+        A digest of the compiled system, or None when it cannot be found.
+        """
+        fname = self.files.get(key, None)
+        if fname is not None:
+            if not fname.is_absolute():
+                fname = self.base_dir / fname
+            try:
+                return hashlib.sha256(fname.read_bytes()).hexdigest()
+            except IOError:
+                return None
+        dev = self.loaded.get(key, None)
+        if dev is not None:
+            return nfa_digest(dev.nfa)
+        return None
+
 
 def get_dest_path(
     args_binary: bool, args_output_dir: str, args_src_filepath: str, device_name: str
@@ -125,39 +150,49 @@ def _get_ext(binary: bool = False) -> str:
     )
 
 
-def dump_integration_model(dev: AssembledDevice, integration: Path, binary=False):
-    logger.debug("Generating integration diagram...")
-
+def _integration_graph(
+    dev: AssembledDevice, epsilon_free: bool
+) -> Union[ExplicitNFA, regular.NFA[Any, str]]:
     assert isinstance(dev.internal, AssembledMicroBehavior)
-    serialize(integration, dev.internal.nfa.as_dict(), binary)
+    micro = dev.internal.micro
+    if epsilon_free:
+        return micro.epsilon_free
+    elif micro.graph is not None:
+        return micro.graph
+    else:
+        return dev.internal.nfa
 
 
-def compile_shelley(
-    *,
-    src_path: Path,
-    uses_path: Path,
-    dst_path: Optional[Path] = None,
-    binary: bool = False,
-    integration: Optional[Path] = None,
-    dump_timings: Optional[IO[str]] = None,
-    save_output: bool = True,
-    skip_testing: bool = True,
-    skip_checks: bool = False,
-    check_ambiguity: bool = False,
-) -> AssembledDevice:
+def get_integration_model(
+    dev: AssembledDevice, epsilon_free=False
+) -> regular.NFA[Any, str]:
+    """
+    The integration of a compound device, as dumped by dump_integration_model,
+    without saving it.
     """
+    graph = _integration_graph(dev, epsilon_free)
+    return graph.as_nfa() if isinstance(graph, ExplicitNFA) else graph
 
-    :param src_path: Shelley device src path to be compiled (YAML file)
-    :param uses: list of paths to compiled dependencies (uses)
-    :param dst_path: compiled file destination path
-    :param binary: save as binary or as yaml
-    :return:
+
+def dump_integration_model(
+    dev: AssembledDevice, integration: Path, binary=False, epsilon_free=False
+):
+    """
+    :param epsilon_free: dump the integration without its epsilon moves (same
+    language, fewer states), e.g., when only its language is needed
     """
+    logger.debug("Generating integration diagram...")
+    serialize(integration, _integration_graph(dev, epsilon_free).as_dict(), binary)
+
 
+def parse_shelley(src_path: Path) -> ShelleyDevice:
+    """
+    Parses a Shelley source file (either YAML or Lark)
+    """
     src_ext = src_path.suffix.split(".")[1]
     if src_ext in settings.EXT_SHELLEY_SOURCE_YAML:
         try:
-            shelley_device: ShelleyDevice = yaml_parser.get_shelley_from_yaml(src_path)
+            return yaml_parser.get_shelley_from_yaml(src_path)
         except yaml_parser.ShelleyParserError as error:
             if settings.VERBOSE:
                 logger.exception(error)
@@ -165,7 +200,7 @@ def compile_shelley(
 
     elif src_ext in settings.EXT_SHELLEY_SOURCE_LARK:
         try:
-            shelley_device: ShelleyDevice = lark_parser.parse(src_path)
+            return lark_parser.parse(src_path)
         except Exception as error:
             if settings.VERBOSE:
                 logger.exception(error)
@@ -174,64 +209,199 @@ def compile_shelley(
     else:
         raise CompilationError(f"Unknown source type: {src_ext}")
 
+
+def _get_cache_key(
+    cache: CompileCache,
+    src_path: Path,
+    shelley_device: ShelleyDevice,
+    known_devices: DeviceMapping,
+    **flags: Any,
+) -> Optional[str]:
+    dependencies = []
+    for name in sorted(shelley_device.uses):
+        digest = known_devices.digest(name)
+        if digest is None:
+            # let the compiler report the missing dependency
+            return None
+        dependencies.append(f"{name}:{digest}")
+    try:
+        source = src_path.read_bytes()
+    except IOError:
+        return None
+    return cache.key(source, dependencies, **flags)
+
+
+def compile_shelley(
+    *,
+    src_path: Path,
+    uses_path: Optional[Path],
+    dst_path: Optional[Path] = None,
+    binary: bool = False,
+    integration: Optional[Path] = None,
+    dump_timings: Optional[IO[str]] = None,
+    save_output: bool = True,
+    skip_testing: bool = True,
+    skip_checks: bool = False,
+    check_ambiguity: bool = False,
+    ambiguity_engine: str = AMBIGUITY_DFA,
+    antichain: bool = False,
+    jobs: int = 1,
+    materialize: bool = False,
+    minimize: bool = False,
+    budget: Optional[Budget] = None,
+    bounded: Optional[int] = None,
+    shelley_device: Optional[ShelleyDevice] = None,
+    known_devices: Optional[DeviceMapping] = None,
+    cache: Optional[CompileCache] = None,
+) -> Tuple[ShelleyDevice, Union[AssembledDevice, CachedDevice]]:
+    """
+
+    :param src_path: Shelley device src path to be compiled (YAML file)
+    :param uses: list of paths to compiled dependencies (uses)
+    :param dst_path: compiled file destination path
+    :param binary: save as binary or as yaml
+    :param ambiguity_engine: how to check ambiguity (see AMBIGUITY_ENGINES)
+    :param antichain: check the usage of subsystems without determinizing the integration
+    :param jobs: check the usage of subsystems in this many processes
+    :param materialize: explore the integration once, and share it between the checks
+    :param minimize: save the minimal behavior of the device, canonically numbered
+    :param budget: stop the checks when exceeded, with an InconclusiveError
+    :param bounded: only check the usage of subsystems up to this many subsystem
+    calls (a bug finder: errors are real, but a valid device is only valid up to the bound)
+    :param shelley_device: the already parsed device (skips parsing src_path)
+    :param known_devices: the already loaded dependencies (skips reading uses_path)
+    :param cache: reuse the result of a previous compilation of the same source and dependencies
+    :return:
+    """
+
+    if shelley_device is None:
+        shelley_device = parse_shelley(src_path)
+
     if dst_path is None:
         dst_path = src_path.parent / (src_path.stem + "." + _get_ext(binary))
 
-    uses_base_dir = uses_path.parent if uses_path is not None else Path.cwd()
-    uses = _parse_uses(uses_path)
-    known_devices = DeviceMapping(
-        files=dict((k, Path(v)) for (k, v) in uses.items()),
-        binary=binary,
-        base_dir=uses_base_dir,
-    )
-    automata_device = shelley2automata(shelley_device)
+    if known_devices is None:
+        uses_base_dir = uses_path.parent if uses_path is not None else Path.cwd()
+        uses = _parse_uses(uses_path)
+        known_devices = DeviceMapping(
+            files=dict((k, Path(v)) for (k, v) in uses.items()),
+            binary=binary,
+            base_dir=uses_base_dir,
+        )
 
-    try:
-        dev = AssembledDevice.make(
-            automata_device, known_devices.__getitem__, skip_checks, check_ambiguity
+    cache_key: Optional[str] = None
+    dev: Union[AssembledDevice, CachedDevice, None] = None
+    if cache is not None:
+        cache_key = _get_cache_key(
+            cache,
+            src_path,
+            shelley_device,
+            known_devices,
+            skip_checks=skip_checks,
+            skip_testing=skip_testing,
+            check_ambiguity=check_ambiguity,
+            ambiguity_engine=ambiguity_engine,
+            antichain=antichain,
+            minimize=minimize,
+            bounded=bounded,
         )
-    except ValueError as error:
-        if settings.VERBOSE:
-            logger.exception(error)
-        raise CompilationError("Invalid device: {0}".format(str(error)))
-
-    if dump_timings is not None:
-        logger.debug("Dumping timings")
-        save_timings(dump_timings, dev)
-
-    if (
-        integration is not None and dev.internal is not None
-    ):  # do this only for compound devices
-        dump_integration_model(dev, integration)
-
-    if (skip_checks or dev.is_valid) and save_output:
-        logger.debug("Compiling device: {0}".format(shelley_device.name))
-        serialize(dst_path, dev.external.nfa.as_dict(), binary)
-        logger.debug("Compiled file: {0}".format(dst_path))
-
-    if skip_checks:
-        logger.debug("Skip direct checks")
-    else:
-        # Do not ignore checks
-        if dev.is_valid:
-            if skip_testing:
-                logger.debug("Skip testing traces")
-            else:
-                try:
-                    # test macro traces
-                    logger.debug("Testing macro traces")
-                    check_traces(
-                        dev.external_model_check, shelley_device.test_macro
-                    )  # macro
-
-                    # test micro traces
-                    logger.debug("Testing micro traces")
-                    check_traces(
-                        dev.internal_model_check, shelley_device.test_micro
-                    )  # micro
-                except ValueError as err:
-                    raise CompilationError(str(err))
+        # the integration model is not cached
+        if cache_key is not None and integration is None:
+            dev = cache.load(cache_key)
+    cached = dev is not None
+
+    if dev is None:
+        automata_device = shelley2automata(shelley_device)
+        try:
+            dev = AssembledDevice.make(
+                automata_device,
+                known_devices.__getitem__,
+                skip_checks,
+                check_ambiguity,
+                antichain=antichain,
+                jobs=jobs,
+                ambiguity_engine=ambiguity_engine,
+                trigger_cache=None if cache is None else cache.triggers,
+                materialize=materialize,
+                budget=budget,
+                bounded=bounded,
+            )
+        except BudgetExceeded as error:
+            raise InconclusiveError(error.verdict)
+        except ValueError as error:
+            if settings.VERBOSE:
+                logger.exception(error)
+            raise CompilationError("Invalid device: {0}".format(str(error)))
+
+    # dumping, minimizing and testing may explore the integration too
+    try:
+        if dump_timings is not None:
+            logger.debug("Dumping timings")
+            save_timings(dump_timings, dev, cached=cached)
+
+        if (
+            integration is not None and dev.internal is not None
+        ):  # do this only for compound devices
+            dump_integration_model(
+                dev,
+                integration,
+                binary=integration.suffix == "." + settings.EXT_SHELLEY_COMPILED_BIN,
+            )
+
+        external: Optional[Dict[str, Any]] = None
+        if minimize and (skip_checks or dev.is_valid):
+            logger.debug("Minimizing device: {0}".format(shelley_device.name))
+            # dependents and trace tests use the minimal behavior too
+            external = minimize_behavior(dev.external.nfa)
+            dev.external = CheckedDevice(regular.NFA.from_dict(external))
+
+        if (skip_checks or dev.is_valid) and save_output:
+            logger.debug("Compiling device: {0}".format(shelley_device.name))
+            if external is None:
+                external = dev.external.nfa.as_dict()
+            serialize(dst_path, external, binary)
+            logger.debug("Compiled file: {0}".format(dst_path))
+
+        if skip_checks:
+            logger.debug("Skip direct checks")
         else:
-            raise CompilationError("Invalid device: {0}".format(dev.failure))
+            # Do not ignore checks
+            if dev.is_valid:
+                if bounded is not None:
+                    logger.debug(f"No usage error within {bounded} subsystem calls")
+                if skip_testing:
+                    logger.debug("Skip testing traces")
+                elif isinstance(dev, CachedDevice):
+                    logger.debug("Traces already tested")
+                else:
+                    if budget is not None:
+                        budget.phase = "trace tests"
+                    try:
+                        # test macro traces
+                        logger.debug("Testing macro traces")
+                        check_traces(
+                            dev.external_checker, shelley_device.test_macro
+                        )  # macro
+
+                        # test micro traces
+                        logger.debug("Testing micro traces")
+                        check_traces(
+                            # base systems only fail if they have micro tests
+                            dev.internal_model_check
+                            if dev.internal is None
+                            else dev.internal_checker,
+                            shelley_device.test_micro,
+                        )  # micro
+                    except ValueError as err:
+                        raise CompilationError(str(err))
+            else:
+                if cache is not None and cache_key is not None and not cached:
+                    cache.store(cache_key, dev)
+                raise CompilationError("Invalid device: {0}".format(dev.failure))
+
+        if cache is not None and cache_key is not None and not cached:
+            cache.store(cache_key, dev)
+    except BudgetExceeded as error:
+        raise InconclusiveError(error.verdict)
 
     return shelley_device, dev
@@ -1,14 +1,23 @@
 import json
-from typing import IO
+from typing import IO, Union
 from dataclasses import asdict
+from datetime import timedelta
 
 from shelley.automata import AssembledDevice
+from shelley.shelleyc.cache import CachedDevice
 
 
-def save_timings(fp: IO[str], device: AssembledDevice) -> None:
+def save_timings(
+    fp: IO[str], device: Union[AssembledDevice, CachedDevice], cached: bool = False
+) -> None:
     # Print out the timings
     # The keys of the dictionary are timedelta objects, which we must
     # convert to strings so that humans can understand what they are
     timings = asdict(device.get_timings())
-    timings = dict((k, v.total_seconds()) for k, v in timings.items())
+    timings = dict(
+        (k, v.total_seconds() if isinstance(v, timedelta) else v)
+        for k, v in timings.items()
+    )
+    # the timings of the compilation that was cached, not of this one
+    timings["cached"] = cached
     json.dump(timings, fp)
@@ -1,24 +1,38 @@
 import logging
-from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+from karakuri import regular
 from shelley.parsers import shelley_lark_parser, ltlf_lark_parser
 import sys
 import yaml
 import argparse
 import subprocess
+import time
 from pathlib import Path
-from typing import List, Mapping, Optional
+from typing import List, Mapping, Optional, Union
 from shelley.shelleyc import shelleyc
 from shelley.ast.devices import Device
 from shelley.shelleyv import shelleyv
-from shelley.shelleymc import ltlf
-from dataclasses import dataclass, field
+from shelley.shelleymc import ltlf, native
+from dataclasses import dataclass, field, replace
 from shelley.shelleymc.ltlf import Spec, Formula, LTL_F, Next, LTL
+from shelley.automata.budget import Budget, BudgetExceeded, Inconclusive, TIMEOUT
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("shelleymc")
 logger_shelleyc = logging.getLogger("shelleyc")
 logger_shelleyv = logging.getLogger("shelleyv")
 VERBOSE: bool = False
+INCONCLUSIVE_EXIT_STATUS: int = 2
+# how to model check: generate SMV models for NuSMV, or check the DFAs natively
+BACKEND_NUSMV = "nusmv"
+BACKEND_NATIVE = "native"
+BACKENDS = (BACKEND_NUSMV, BACKEND_NATIVE)
+
+
+def inconclusive(verdict: Inconclusive):
+    print(verdict, file=sys.stderr)
+    sys.exit(INCONCLUSIVE_EXIT_STATUS)
 
 
 def get_instances(dev_path: Path, uses_path: Path):
@@ -32,7 +46,20 @@ def get_instances(dev_path: Path, uses_path: Path):
         yield (k, filename.parent / f"{filename.stem}.shy")
 
 
-def model_check(smv_path: Path):
+class NuSMVError(Exception):
+    """
+    NuSMV failed, the argument is its output.
+    """
+
+
+def model_check(smv_path: Path, budget: Optional[Budget] = None):
+    """
+    :raises BudgetExceeded: when NuSMV runs past the deadline of the budget
+    :raises NuSMVError: when NuSMV fails
+    """
+    timeout: Optional[float] = None
+    if budget is not None and budget.deadline is not None:
+        timeout = max(0.0, budget.deadline - time.time())
     try:
         nusmv_call = [
             "NuSMV",
@@ -40,12 +67,14 @@ def model_check(smv_path: Path):
         ]
         logger.debug(" ".join(nusmv_call))
         cp: subprocess.CompletedProcess = subprocess.run(
-            nusmv_call, capture_output=True, check=True
+            nusmv_call, capture_output=True, check=True, timeout=timeout
         )
         return check_nusmv_output(cp.stdout.decode())
+    except subprocess.TimeoutExpired:
+        # NuSMV does not report its progress
+        raise BudgetExceeded(Inconclusive(f"model checking {smv_path}", TIMEOUT, 0, 0))
     except subprocess.CalledProcessError as err:
-        print(err.output.decode() + err.stderr.decode())
-        sys.exit(255)
+        raise NuSMVError(err.output.decode() + err.stderr.decode())
 
 
 def parse_states(trace):
@@ -124,6 +153,7 @@ def check_nusmv_output(raw_output: str):
 class ModelChecker:
     file: Path
     specs: List[Spec] = field(default_factory=list)
+    budget: Optional[Budget] = None
 
     def add(self, spec: Spec):
         self.specs.append(spec)
@@ -132,15 +162,38 @@ class ModelChecker:
         return sum(len(s) for s in self.specs)
 
     def run(self):
+        self.report(self.check)
+
+    def check(self):
+        """
+        Appends the specs to the SMV model and model checks it.
+
+        :return: the result of check_nusmv_output (None when every spec holds)
+        """
         count = len(self)
         if count == 0:
             logger.debug(f"Skip model checking {self.file} (0 formulas)")
-            return
+            return None
         with self.file.open("a+") as fp:
             for spec in self.specs:
                 logger.debug(spec)
                 spec.dump(fp)
-        result = model_check(self.file)
+        return model_check(self.file, self.budget)
+
+    def report(self, get_result: Callable[[], Any]):
+        """
+        Exits on the first error found by the model checker.
+
+        :param get_result: returns the result of check (possibly computed by
+        another process)
+        """
+        try:
+            result = get_result()
+        except BudgetExceeded as err:
+            inconclusive(err.verdict)
+        except NuSMVError as err:
+            print(err)
+            sys.exit(255)
         if result is not None:
             specs = []
             for s in self.specs:  # [::-1]:  # NuSMV lists CTL before LTL
@@ -159,16 +212,105 @@ class ModelChecker:
                     sys.exit(255)
 
 
+@dataclass
+class ModelCheckTask:
+    """
+    The creation of an SMV model (see shelleyv.fsm2smv) and its model checking,
+    in a form that can be sent to another process (the FSM model is either a
+    file or an NFA). The generated structural
+    formulas are checked on the DFA of the SMV model (see
+    native.check_structural); with the native backend, every formula is.
+    """
+
+    mc: ModelChecker
+    fsm: shelleyv.FSMModel
+    project_prefix: Optional[str] = None
+    ctl_compatible: bool = False
+    backend: str = BACKEND_NUSMV
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # NFAs are not picklable, so they are sent as dictionaries
+        state = dict(self.__dict__)
+        if isinstance(self.fsm, regular.NFA):
+            state["fsm"] = self.fsm.as_dict()
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        if isinstance(state["fsm"], dict):
+            state["fsm"] = regular.NFA.from_dict(state["fsm"])
+        self.__dict__.update(state)
+
+    def run(self):
+        if self.backend == BACKEND_NATIVE:
+            logger.debug(f"Model checking natively: {self.mc.file.stem}")
+            if self.mc.budget is not None:
+                self.mc.budget.phase = f"model checking {self.mc.file.stem}"
+            return native.check_specs(
+                native.load_model(self.fsm, self.project_prefix),
+                self.mc.specs,
+                ctl_compatible=self.ctl_compatible,
+                budget=self.mc.budget,
+            )
+        fsm_stats = shelleyv.load_smv_model(self.fsm, self.project_prefix)
+        # only the claims of the user need NuSMV
+        (checked, rest) = native.check_structural(
+            native.from_fsm_stats(fsm_stats),
+            self.mc.specs,
+            ctl_compatible=self.ctl_compatible,
+        )
+        logger.debug(
+            f"Structural formulas of {self.mc.file.stem}: {len(checked)} checked natively"
+        )
+        logger.debug(f"Creating NuSMV model: {self.mc.file}")
+        shelleyv.fsm2smv(
+            fsm_model=self.fsm,
+            smv_model=self.mc.file,
+            project_prefix=self.project_prefix,
+            ctl_compatible=self.ctl_compatible,
+            fsm_stats=fsm_stats,
+        )
+        result = replace(self.mc, specs=rest).check()
+        return native.merge_results(self.mc.specs, checked, result)
+
+
+def _run_task(task: ModelCheckTask):
+    return task.run()
+
+
+def run_tasks(tasks: List[ModelCheckTask], jobs: int = 1) -> None:
+    """
+    Runs the model checking tasks in a pool of processes. The results are
+    reported in the order of the tasks, so that the reported error is the
+    same as in a sequential run (the tasks after it may still be running).
+    """
+    if jobs <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            task.mc.report(task.run)
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+        futures = [pool.submit(_run_task, task) for task in tasks]
+        try:
+            for task, future in zip(tasks, futures):
+                task.mc.report(future.result)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
 def create_fsm_system_model(
     spec: Path,
     uses: Path,
     fsm_system: Path,
     skip_direct_checks: bool = False,
+    jobs: int = 1,
+    budget: Optional[Budget] = None,
 ) -> Tuple[Device, shelleyc.AssembledDevice]:
     """
     Create integration model by running shelleyc tool
     input: system spec + uses
-    output: integration (FSM) (*-i.scy)
+    output: the compiled system (FSM) (*.scy), and its assembled device (the
+    integration is kept in memory)
     """
     if VERBOSE and not skip_direct_checks:
         dump_timings = sys.stdout
@@ -184,7 +326,13 @@ def create_fsm_system_model(
             dump_timings=dump_timings,
             skip_checks=skip_direct_checks,
             check_ambiguity=False,
+            jobs=jobs,
+            # the integration is walked by every check and then dumped
+            materialize=True,
+            budget=budget,
         )
+    except shelleyc.InconclusiveError as err:
+        inconclusive(err.verdict)
     except shelleyc.CompilationError as err:
         if VERBOSE:
             logger.error(err, exc_info=True)
@@ -192,6 +340,8 @@ def create_fsm_system_model(
             print(err)
         sys.exit(255)
 
+    # no cache is given, so the device is always assembled
+    assert isinstance(assembled_device, shelleyc.AssembledDevice)
     assert fsm_system.exists()
     logger.debug(f"Created FSM system model")
     if assembled_device.internal is not None:
@@ -200,8 +350,26 @@ def create_fsm_system_model(
     return device, assembled_device
 
 
-def check_system(dev: Device, fsm: Path, smv: Path, system_validity: bool = True):
-    mc = ModelChecker(smv)
+def check_system(
+    dev: Device,
+    fsm: shelleyv.FSMModel,
+    smv: Path,
+    system_validity: bool = True,
+    budget: Optional[Budget] = None,
+    backend: str = BACKEND_NUSMV,
+):
+    run_tasks(system_tasks(dev, fsm, smv, system_validity, budget, backend))
+
+
+def system_tasks(
+    dev: Device,
+    fsm: shelleyv.FSMModel,
+    smv: Path,
+    system_validity: bool = True,
+    budget: Optional[Budget] = None,
+    backend: str = BACKEND_NUSMV,
+) -> List[ModelCheckTask]:
+    mc = ModelChecker(smv, budget=budget)
     spec = Spec([], "SYSTEM CHECKS")
     mc.add(spec)
     for f in dev.system_formulae:
@@ -212,32 +380,60 @@ def check_system(dev: Device, fsm: Path, smv: Path, system_validity: bool = True
         else:
             spec.formulae.append(LTL_F(f))
     if system_validity:
-        logger.debug(f"Generating system specs: {fsm}")
+        logger.debug(f"Generating system specs: {dev.name}")
         mc.add(ltlf.generate_system_spec(dev))
-    if len(mc) > 0:
-        logger.debug(f"Creating NuSMV system model: {smv}")
-        shelleyv.fsm2smv(fsm, smv, ctl_compatible=system_validity)
-        mc.run()
-    else:
+    if len(mc) == 0:
         logger.debug("No model checking needed for system.")
+        return []
+    return [ModelCheckTask(mc, fsm, ctl_compatible=system_validity, backend=backend)]
 
 
 def check_usage(
     system_spec: Path,
-    integration: Path,
+    integration: Union[Path, regular.NFA[Any, str]],
     subsystems: Mapping[str, Device],
     subsystem_formulae: List[Tuple[str, Formula]],
     integration_validity: bool = True,
+    budget: Optional[Budget] = None,
+    backend: str = BACKEND_NUSMV,
 ) -> None:
+    run_tasks(
+        usage_tasks(
+            system_spec,
+            integration,
+            subsystems,
+            subsystem_formulae,
+            integration_validity,
+            budget,
+            backend,
+        )
+    )
+
+
+def usage_tasks(
+    system_spec: Path,
+    integration: Union[Path, regular.NFA[Any, str]],
+    subsystems: Mapping[str, Device],
+    subsystem_formulae: List[Tuple[str, Formula]],
+    integration_validity: bool = True,
+    budget: Optional[Budget] = None,
+    backend: str = BACKEND_NUSMV,
+) -> List[ModelCheckTask]:
+    """
+    One task per subsystem instance, in the order of subsystems. The models of
+    the instances are projected from the integration in a single pass (see
+    shelleyv.project_subsystems).
+    """
     if not integration_validity:
         logger.debug(
             f"Integration validity will *NOT* be enforced by the model checker."
         )
 
+    checkers: List[Tuple[str, ModelChecker]] = []
     for (instance_name, dev) in subsystems.items():
         # Create the integration SMV file
         smv_path = system_spec.parent / f"{system_spec.stem}-d-{instance_name}.smv"
-        mc = ModelChecker(smv_path)
+        mc = ModelChecker(smv_path, budget=budget)
         mc.add(ltlf.generate_subsystem_checks(subsystem_formulae, instance_name))
         if integration_validity:
             logger.debug(f"Adding integration check for {instance_name}")
@@ -246,35 +442,47 @@ def check_usage(
         if len(mc) == 0:
             logger.debug(f"Skip model checking usage (0 formulas): '{instance_name}'")
             continue
-        logger.debug(f"Creating usage behavior for '{instance_name}': {smv_path}")
-        shelleyv.fsm2smv(
-            fsm_model=integration,
-            smv_model=smv_path,
-            project_prefix=instance_name + ".",
-        )
+        checkers.append((instance_name, mc))
+    if len(checkers) == 0:
+        return []
+    models = shelleyv.project_subsystems(
+        integration, [instance_name + "." for (instance_name, _) in checkers]
+    )
+    tasks: List[ModelCheckTask] = []
+    for (instance_name, mc) in checkers:
         logger.debug(f"Model checking usage behavior: '{instance_name}'")
-        mc.run()
+        tasks.append(ModelCheckTask(mc, models[instance_name + "."], backend=backend))
+    return tasks
 
 
 def check_integration(
     dev: Device,
-    fsm: Path,
+    fsm: shelleyv.FSMModel,
     smv: Path,
+    budget: Optional[Budget] = None,
+    backend: str = BACKEND_NUSMV,
 ):
-    mc = ModelChecker(smv)
+    run_tasks(integration_tasks(dev, fsm, smv, budget, backend))
+
+
+def integration_tasks(
+    dev: Device,
+    fsm: shelleyv.FSMModel,
+    smv: Path,
+    budget: Optional[Budget] = None,
+    backend: str = BACKEND_NUSMV,
+) -> List[ModelCheckTask]:
+    mc = ModelChecker(smv, budget=budget)
     spec = ltlf.Spec(formulae=[], comment="INTEGRATION CHECKS")
     for entry in dev.integration_formulae:
         logger.debug(f"Appending LTL formula from integration checks: {entry}")
         spec.formulae.append(LTL_F(entry))
     mc.add(spec)
-    if len(mc) > 0:
-        # Create the integration SMV
-        logger.debug(f"Creating integration file: {smv}")
-        shelleyv.fsm2smv(fsm, smv)
-        logger.debug("Model checking integration...")
-        mc.run()
-    else:
+    if len(mc) == 0:
         logger.debug(f"Skip model checking integration (0 formulas)")
+        return []
+    logger.debug("Model checking integration...")
+    return [ModelCheckTask(mc, fsm, backend=backend)]
 
 
 def count_integration_claims(dev, subsystems):
@@ -294,6 +502,34 @@ def parse_command():
     parser.add_argument("--uses", "-u", type=Path, help="The uses YAML file.")
     parser.add_argument("--skip-mc", action="store_true")
     parser.add_argument("--skip-direct", action="store_true")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of processes used to check the usage of subsystems and to run NuSMV",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=BACKEND_NUSMV,
+        help="how to model check: with NuSMV, or natively on the DFAs of the models (no NuSMV needed)",
+    )
+    parser.add_argument(
+        "--dump-integration",
+        action="store_true",
+        help="save the FSM integration model (*-i.scy), e.g., for shelleyv (the models are checked from memory)",
+    )
+    parser.add_argument(
+        "--max-states",
+        type=int,
+        help="give up (inconclusive, exit status 2) when an automaton explored by the direct checks exceeds this many states",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="give up (inconclusive, exit status 2) after this many seconds, NuSMV included",
+    )
     parser.add_argument(
         "-v", "--verbosity", help="increase output verbosity", action="store_true"
     )
@@ -323,18 +559,30 @@ def main():
         print("ERROR! Choose one check-validity algorithm only!")
         sys.exit(255)
 
+    budget = Budget.make(max_states=args.max_states, timeout=args.timeout)
+
     # print(f"Running direct verification...", end="")
     device, assembled_device = create_fsm_system_model(
-        spec, uses, fsm_system, args.skip_direct
+        spec, uses, fsm_system, args.skip_direct, jobs=args.jobs, budget=budget
     )
 
     if args.skip_mc:
         logger.debug("Skipping model checking with --skip-mc.")
         return
 
-    check_system(device, fsm_system, smv_system, system_validity=args.skip_direct)
+    # the NuSMV models are created and checked together (see run_tasks), from
+    # the automata in memory
+    tasks = system_tasks(
+        device,
+        assembled_device.external.nfa,
+        smv_system,
+        system_validity=args.skip_direct,
+        budget=budget,
+        backend=args.backend,
+    )
     if assembled_device.internal is None:
         logger.debug("We found a base system, no integration to check needed.")
+        run_tasks(tasks, args.jobs)
         return
 
     subsystems: Mapping[str, Device] = dict(
@@ -347,25 +595,41 @@ def main():
     )
     if not args.skip_direct and user_claims == 0:
         logger.debug("No model checking needed for integration.")
+        run_tasks(tasks, args.jobs)
         return
 
-    fsm_integration: Path = spec.parent / (spec.stem + "-i.scy")
-    logger.debug(f"Saving FSM integration model to disk: {fsm_integration}")
-    shelleyc.dump_integration_model(assembled_device, fsm_integration)
-    assert fsm_integration.exists()
+    # the SMV models only depend on the language of the integration
+    fsm_integration = shelleyc.get_integration_model(
+        assembled_device, epsilon_free=True
+    )
+    if args.dump_integration:
+        integration_path: Path = spec.parent / (spec.stem + "-i.scy")
+        logger.debug(f"Saving FSM integration model to disk: {integration_path}")
+        shelleyc.dump_integration_model(
+            assembled_device, integration_path, epsilon_free=True
+        )
 
     logger.debug("Check the usage of each subsystem")
-    check_usage(
-        system_spec=spec,
-        integration=fsm_integration,
-        subsystems=subsystems,
-        integration_validity=args.skip_direct,
-        subsystem_formulae=device.subsystem_formulae,
+    tasks.extend(
+        usage_tasks(
+            system_spec=spec,
+            integration=fsm_integration,
+            subsystems=subsystems,
+            integration_validity=args.skip_direct,
+            subsystem_formulae=device.subsystem_formulae,
+            budget=budget,
+            backend=args.backend,
+        )
     )
 
     logger.debug("Check integration claims")
-    check_integration(
-        device,
-        fsm_integration,
-        smv_integration,
+    tasks.extend(
+        integration_tasks(
+            device,
+            fsm_integration,
+            smv_integration,
+            budget=budget,
+            backend=args.backend,
+        )
     )
+    run_tasks(tasks, args.jobs)
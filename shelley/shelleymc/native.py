@@ -0,0 +1,760 @@
+"""
+An explicit-state model checker for the specs of shelleymc, an alternative
+to NuSMV (shelleymc --backend native).
+
+The model is the DFA that shelleyv.fsm2smv gives to NuSMV, and the specs are
+translated with ltlf_to_ltl, as for NuSMV. The semantics is that of the SMV
+model (see shelleyv.smv_dump): a fair path reads a word of the DFA and then
+stays at the end of sequence (_eos) forever; with ctl_compatible, a dummy
+step (no action, not the end) comes first.
+
+LTL specs are checked by formula progression: the product of the DFA with
+the formulas obtained by progressing the spec through the word is explored
+breadth-first, so the counterexample is a shortest violating word. CTL specs
+(ExistsFinally only) are checked on the states of the SMV model.
+"""
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union
+
+from shelley.automata.budget import Budget, CLOCK_PERIOD
+from shelley.automata.minimize import IntDFA, REJECT
+from shelley.parsers.ltlf_lark_parser import (
+    Formula,
+    Bool,
+    Variable,
+    Not,
+    And,
+    Or,
+    Equal,
+    Implies,
+    Next,
+    Eventually,
+    Always,
+    Until,
+    ExistsFinally,
+    EndOfSequence,
+    Action,
+    CTL,
+    LTL,
+    LTL_F,
+    EOS,
+    ltlf_to_ltl,
+    dumps,
+)
+from shelley.shelleymc.ltlf import Spec
+from shelley.shelleyv.shelleyv import FSMModel, FSMStats, load_smv_model
+
+# Formulas in negation normal form, as hashable tuples:
+# ("true",), ("false",), ("eos",), ("neos",), ("act", name), ("nact", name),
+# ("and", frozenset), ("or", frozenset), ("X", f), ("F", f), ("G", f),
+# ("U", left, right), ("R", left, right)
+TFormula = Tuple[Any, ...]
+TRUE: TFormula = ("true",)
+FALSE: TFormula = ("false",)
+# the position of the dummy step of CTL-compatible models (see smv_dump)
+DUMMY: Optional[str] = None
+# a result as in modelcheck.check_nusmv_output
+TResult = Optional[List[Tuple[str, Optional[List[str]]]]]
+
+
+def load_model(fsm: FSMModel, project_prefix: Optional[str] = None) -> IntDFA:
+    """
+    The DFA of the SMV model that shelleyv.fsm2smv creates from an FSM model.
+    """
+    return from_fsm_stats(load_smv_model(fsm, project_prefix))
+
+
+def from_fsm_stats(fsm_stats: FSMStats) -> IntDFA:
+    # the model is shared with fsm2smv when NuSMV checks the other formulas
+    assert fsm_stats.result_dfa is not None
+    return IntDFA.from_dfa(fsm_stats.result_dfa)
+
+
+def to_act(char: str) -> str:
+    # the name of an action in the SMV model
+    return char.replace(".", "_")
+
+
+def _mk_and(args: List[TFormula]) -> TFormula:
+    result: Set[TFormula] = set()
+    for arg in args:
+        if arg == FALSE:
+            return FALSE
+        if arg[0] == "and":
+            result.update(arg[1])
+        elif arg != TRUE:
+            result.add(arg)
+    if len(result) == 0:
+        return TRUE
+    if len(result) == 1:
+        return next(iter(result))
+    return ("and", frozenset(result))
+
+
+def _mk_or(args: List[TFormula]) -> TFormula:
+    result: Set[TFormula] = set()
+    for arg in args:
+        if arg == TRUE:
+            return TRUE
+        if arg[0] == "or":
+            result.update(arg[1])
+        elif arg != FALSE:
+            result.add(arg)
+    if len(result) == 0:
+        return FALSE
+    if len(result) == 1:
+        return next(iter(result))
+    return ("or", frozenset(result))
+
+
+def convert(
+    formula: Formula, action: str = "_action", eos: str = "_eos", negate: bool = False
+) -> TFormula:
+    """
+    Converts an LTL formula (as given by ltlf_to_ltl) into negation normal form.
+    """
+    if isinstance(formula, Bool):
+        return TRUE if formula.value != negate else FALSE
+    if isinstance(formula, Variable) and formula.name == eos:
+        return ("neos",) if negate else ("eos",)
+    if (
+        isinstance(formula, Equal)
+        and isinstance(formula.left, Variable)
+        and formula.left.name == action
+        and isinstance(formula.right, Variable)
+    ):
+        return ("nact" if negate else "act", formula.right.name)
+
+    def rec(f: Formula, neg: bool = negate) -> TFormula:
+        return convert(f, action, eos, neg)
+
+    if isinstance(formula, Not):
+        return rec(formula.child, not negate)
+    if isinstance(formula, And):
+        args = [rec(formula.left), rec(formula.right)]
+        return _mk_or(args) if negate else _mk_and(args)
+    if isinstance(formula, Or):
+        args = [rec(formula.left), rec(formula.right)]
+        return _mk_and(args) if negate else _mk_or(args)
+    if isinstance(formula, Implies):
+        # !left | right
+        args = [rec(formula.left, not negate), rec(formula.right)]
+        return _mk_and(args) if negate else _mk_or(args)
+    if isinstance(formula, Equal):
+        # (left & right) | (!left & !right)
+        (left, right) = (rec(formula.left, False), rec(formula.right, False))
+        (nleft, nright) = (rec(formula.left, True), rec(formula.right, True))
+        if negate:
+            return _mk_and([_mk_or([nleft, nright]), _mk_or([left, right])])
+        return _mk_or([_mk_and([left, right]), _mk_and([nleft, nright])])
+    if isinstance(formula, Next):
+        return ("X", rec(formula.child))
+    if isinstance(formula, Eventually):
+        return ("G" if negate else "F", rec(formula.child))
+    if isinstance(formula, Always):
+        return ("F" if negate else "G", rec(formula.child))
+    if isinstance(formula, Until):
+        return ("R" if negate else "U", rec(formula.left), rec(formula.right))
+    raise ValueError(f"Unsupported by the native backend: {formula}")
+
+
+# An obligation is a formula in disjunctive normal form: a set of clauses,
+# whose elements are subformulas of the checked formula (but "and" and "or").
+# There are finitely many obligations, so the product with a DFA is finite.
+TObligation = FrozenSet[FrozenSet[TFormula]]
+VALID: TObligation = frozenset([frozenset()])
+UNSAT: TObligation = frozenset()
+
+
+def _minimal(clauses: Set[FrozenSet[TFormula]]) -> TObligation:
+    # drops the clauses that contain another clause
+    return frozenset(c for c in clauses if not any(o < c for o in clauses))
+
+
+def _dnf_or(args: Iterable[TObligation]) -> TObligation:
+    clauses: Set[FrozenSet[TFormula]] = set()
+    for arg in args:
+        clauses.update(arg)
+    return _minimal(clauses)
+
+
+def _dnf_and(args: Iterable[TObligation]) -> TObligation:
+    result = VALID
+    for arg in args:
+        result = _minimal(set(x | y for x in result for y in arg))
+        if len(result) == 0:
+            break
+    return result
+
+
+def to_dnf(formula: TFormula) -> TObligation:
+    kind = formula[0]
+    if kind == "true":
+        return VALID
+    if kind == "false":
+        return UNSAT
+    if kind == "and":
+        return _dnf_and(to_dnf(f) for f in formula[1])
+    if kind == "or":
+        return _dnf_or(to_dnf(f) for f in formula[1])
+    return frozenset([frozenset([formula])])
+
+
+class Progression:
+    """
+    Progresses obligations through the positions of a word (memoized).
+    """
+
+    def __init__(self) -> None:
+        self.table: Dict[Tuple[TObligation, Optional[str]], TObligation] = dict()
+        self.elements: Dict[Tuple[TFormula, Optional[str]], TObligation] = dict()
+
+    def __call__(self, obligation: TObligation, act: Optional[str]) -> TObligation:
+        """
+        :return: what the rest of the word must satisfy, for the word to
+        satisfy the obligation at a position with action act
+        """
+        key = (obligation, act)
+        result = self.table.get(key, None)
+        if result is None:
+            self.table[key] = result = _dnf_or(
+                _dnf_and(self._element(f, act) for f in clause) for clause in obligation
+            )
+        return result
+
+    def _element(self, formula: TFormula, act: Optional[str]) -> TObligation:
+        key = (formula, act)
+        result = self.elements.get(key, None)
+        if result is None:
+            self.elements[key] = result = self._progress(formula, act)
+        return result
+
+    def _progress(self, formula: TFormula, act: Optional[str]) -> TObligation:
+        kind = formula[0]
+        if kind == "eos":
+            return UNSAT
+        if kind == "neos":
+            return VALID
+        if kind == "act":
+            return VALID if formula[1] == act else UNSAT
+        if kind == "nact":
+            return UNSAT if formula[1] == act else VALID
+        if kind == "X":
+            return to_dnf(formula[1])
+        this = to_dnf(formula)
+        if kind == "F":
+            return _dnf_or([self(to_dnf(formula[1]), act), this])
+        if kind == "G":
+            return _dnf_and([self(to_dnf(formula[1]), act), this])
+        if kind == "U":
+            left = self(to_dnf(formula[1]), act)
+            right = self(to_dnf(formula[2]), act)
+            return _dnf_or([right, _dnf_and([left, this])])
+        if kind == "R":
+            left = self(to_dnf(formula[1]), act)
+            right = self(to_dnf(formula[2]), act)
+            return _dnf_and([right, _dnf_or([left, this])])
+        raise ValueError(formula)
+
+
+def holds_at_end(formula: TFormula) -> bool:
+    """
+    Whether the formula holds once the sequence ended (every position is then
+    the same: _eos holds and no action happens).
+    """
+    kind = formula[0]
+    if kind == "true" or kind == "eos" or kind == "nact":
+        return True
+    if kind == "false" or kind == "neos" or kind == "act":
+        return False
+    if kind == "and":
+        return all(holds_at_end(f) for f in formula[1])
+    if kind == "or":
+        return any(holds_at_end(f) for f in formula[1])
+    if kind == "X" or kind == "F" or kind == "G":
+        return holds_at_end(formula[1])
+    if kind == "U" or kind == "R":
+        return holds_at_end(formula[2])
+    raise ValueError(formula)
+
+
+def _obligation_holds_at_end(obligation: TObligation) -> bool:
+    return any(all(holds_at_end(f) for f in clause) for clause in obligation)
+
+
+def _tick(budget: Optional[Budget], count: int, explored: int, frontier: int) -> None:
+    if budget is not None and count % CLOCK_PERIOD == 0:
+        budget.check_deadline(explored, frontier)
+
+
+def check_ltl(
+    dfa: IntDFA,
+    formula: TFormula,
+    ctl_compatible: bool = False,
+    budget: Optional[Budget] = None,
+) -> Optional[List[str]]:
+    """
+    :return: a shortest word of the DFA that violates the formula (as SMV
+    actions), or None if every word satisfies it
+    """
+    acts = [to_act(char) for char in dfa.alphabet]
+    progress = Progression()
+    obligation = to_dnf(formula)
+    if ctl_compatible:
+        obligation = progress(obligation, DUMMY)
+    TNode = Tuple[int, TObligation]
+    start: TNode = (0, obligation)
+    parents: Dict[TNode, Optional[Tuple[TNode, int]]] = {start: None}
+
+    def get_trace(node: TNode) -> List[str]:
+        trace: List[str] = []
+        parent = parents[node]
+        while parent is not None:
+            node, char = parent
+            trace.append(acts[char])
+            parent = parents[node]
+        trace.reverse()
+        return trace
+
+    # the empty word (the dummy step cannot end the sequence)
+    if (
+        not ctl_compatible
+        and 0 in dfa.accepted
+        and not _obligation_holds_at_end(obligation)
+    ):
+        return []
+    layer: List[TNode] = [start]
+    count = 0
+    while len(layer) > 0:
+        next_layer: List[TNode] = []
+        for node in layer:
+            _tick(budget, count, len(parents), len(layer) + len(next_layer))
+            count += 1
+            (src, obligation) = node
+            for char, dst in enumerate(dfa.transitions[src]):
+                if dst == REJECT:
+                    continue
+                rest = progress(obligation, acts[char])
+                if rest == VALID:
+                    continue  # every continuation satisfies the formula
+                if dst in dfa.accepted and not _obligation_holds_at_end(rest):
+                    # checked before visiting: the start node is visited
+                    # without checking the empty word
+                    return get_trace(node) + [acts[char]]
+                succ = (dst, rest)
+                if succ not in parents:
+                    parents[succ] = (node, char)
+                    next_layer.append(succ)
+        layer = next_layer
+    return None
+
+
+# A state of the SMV model: the dummy step (None), the action at a DFA state
+# (as (state, char)), or the end of the sequence at a DFA state (as (state, None))
+TKripkeState = Union[None, Tuple[int, Optional[int]]]
+
+
+class Kripke:
+    """
+    The fair states of the SMV model of a DFA (see shelleyv.smv_dump): every
+    state of a trimmed DFA can reach the end of the sequence.
+    """
+
+    def __init__(self, dfa: IntDFA, ctl_compatible: bool = False):
+        self.dfa = dfa
+        self.acts = [to_act(char) for char in dfa.alphabet]
+        self.states: List[TKripkeState] = []
+        self.succ: Dict[TKripkeState, List[TKripkeState]] = dict()
+        for src, row in enumerate(dfa.transitions):
+            for char, dst in enumerate(row):
+                if dst != REJECT:
+                    self.states.append((src, char))
+                    self.succ[(src, char)] = self._starting_at(
+                        dst, end=dst in dfa.accepted
+                    )
+            if src in dfa.accepted:
+                self.states.append((src, None))
+                self.succ[(src, None)] = [(src, None)]
+        self.initial: List[TKripkeState]
+        if ctl_compatible:
+            self.states.append(None)
+            self.succ[None] = self._starting_at(0, end=False)
+            self.initial = [None] if len(self.succ[None]) > 0 else []
+        else:
+            self.initial = self._starting_at(0, end=0 in dfa.accepted)
+
+    def _starting_at(self, st: int, end: bool) -> List[TKripkeState]:
+        result: List[TKripkeState] = [
+            (st, char)
+            for (char, dst) in enumerate(self.dfa.transitions[st])
+            if dst != REJECT
+        ]
+        if end:
+            result.append((st, None))
+        return result
+
+    def act(self, state: TKripkeState) -> Optional[str]:
+        if state is None or state[1] is None:
+            return None
+        return self.acts[state[1]]
+
+    def is_end(self, state: TKripkeState) -> bool:
+        return state is not None and state[1] is None
+
+    def sat(self, formula: TFormula) -> FrozenSet[TKripkeState]:
+        """
+        The states that satisfy a (CTL) state formula; ("EF", f) is the only
+        temporal operator.
+        """
+        kind = formula[0]
+        if kind == "and":
+            result = frozenset(self.states)
+            for f in formula[1]:
+                result &= self.sat(f)
+            return result
+        if kind == "or":
+            result = frozenset()
+            for f in formula[1]:
+                result |= self.sat(f)
+            return result
+        if kind == "EF":
+            return self._reach(self.sat(formula[1]))
+        if kind == "not":
+            return frozenset(self.states) - self.sat(formula[1])
+        if kind == "true":
+            return frozenset(self.states)
+        if kind == "false":
+            return frozenset()
+        if kind == "eos":
+            return frozenset(st for st in self.states if self.is_end(st))
+        if kind == "neos":
+            return frozenset(st for st in self.states if not self.is_end(st))
+        if kind == "act":
+            return frozenset(st for st in self.states if self.act(st) == formula[1])
+        if kind == "nact":
+            return frozenset(st for st in self.states if self.act(st) != formula[1])
+        raise ValueError(f"Unsupported by the native backend: {formula}")
+
+    def _reach(self, targets: FrozenSet[TKripkeState]) -> FrozenSet[TKripkeState]:
+        pred: Dict[TKripkeState, List[TKripkeState]] = dict()
+        for src, dsts in self.succ.items():
+            for dst in dsts:
+                pred.setdefault(dst, []).append(src)
+        result = set(targets)
+        to_visit = list(targets)
+        while len(to_visit) > 0:
+            for src in pred.get(to_visit.pop(), ()):
+                if src not in result:
+                    result.add(src)
+                    to_visit.append(src)
+        return frozenset(result)
+
+    def check(self, formula: TFormula) -> bool:
+        sat = self.sat(formula)
+        return all(st in sat for st in self.initial)
+
+
+def convert_ctl(
+    formula: Formula, action: str = "_action", eos: str = "_eos"
+) -> TFormula:
+    """
+    Converts a CTL formula (as given by ltlf_to_ltl) with ExistsFinally as the
+    only temporal operator.
+    """
+    if isinstance(formula, ExistsFinally):
+        return ("EF", convert_ctl(formula.child, action, eos))
+    if isinstance(formula, Not):
+        return ("not", convert_ctl(formula.child, action, eos))
+    if isinstance(formula, And) or isinstance(formula, Or):
+        args = [
+            convert_ctl(formula.left, action, eos),
+            convert_ctl(formula.right, action, eos),
+        ]
+        return _mk_and(args) if isinstance(formula, And) else _mk_or(args)
+    if isinstance(formula, Implies):
+        return _mk_or(
+            [
+                ("not", convert_ctl(formula.left, action, eos)),
+                convert_ctl(formula.right, action, eos),
+            ]
+        )
+    if isinstance(formula, (Next, Eventually, Always, Until)):
+        raise ValueError(f"Unsupported by the native backend: {formula}")
+    # a propositional formula
+    return convert(formula, action, eos)
+
+
+def _action_name(formula: Formula) -> Optional[str]:
+    # the SMV action of an Action (see ltlf_to_ltl)
+    if type(formula) is not Action:
+        return None
+    if formula.prefix is None:
+        return formula.name
+    return formula.prefix + "_" + formula.name
+
+
+def _alternatives(
+    formula: Formula, ltlf: bool = False
+) -> Optional[Tuple[FrozenSet[str], bool]]:
+    """
+    The actions of a disjunction of actions and of the end of the sequence
+    (LTLf atoms), and whether the end is one of them.
+    """
+    if isinstance(formula, LTL_F):
+        return _alternatives(formula.formula, ltlf=True)
+    if isinstance(formula, Or):
+        left = _alternatives(formula.left, ltlf)
+        right = _alternatives(formula.right, ltlf)
+        if left is None or right is None:
+            return None
+        return left[0] | right[0], left[1] or right[1]
+    if not ltlf:
+        return None
+    if isinstance(formula, EndOfSequence):
+        return frozenset(), True
+    name = _action_name(formula)
+    if name is None:
+        return None
+    return frozenset([name]), False
+
+
+def _used_action(formula: Formula) -> Optional[str]:
+    # the action of a formula made by ltlf.generate_system_spec
+    if not (
+        isinstance(formula, CTL)
+        and isinstance(formula.formula, ExistsFinally)
+        and isinstance(formula.formula.child, And)
+        and isinstance(formula.formula.child.left, LTL_F)
+        and formula.formula.child.right == ExistsFinally(LTL_F(EOS))
+    ):
+        return None
+    return _action_name(formula.formula.child.left.formula)
+
+
+class StructuralChecker:
+    """
+    Checks the specs generated by ltlf.generate_system_spec (each operation
+    is used) and by ltlf.generate_usage_validity (the first action, and the
+    successors of each action) with searches on the graph of the DFA, in
+    linear time. Counterexamples are shortest.
+    """
+
+    def __init__(self, dfa: IntDFA, ctl_compatible: bool = False):
+        self.dfa = dfa
+        self.ctl_compatible = ctl_compatible
+        self.acts = [to_act(char) for char in dfa.alphabet]
+        # shortest paths from the start state: state -> (src, char)
+        self.parent: Dict[int, Optional[Tuple[int, int]]] = {0: None}
+        self.depth: Dict[int, int] = {0: 0}
+        pred: List[List[Tuple[int, int]]] = [[] for _ in dfa.transitions]
+        order = [0]
+        for src in order:  # grows while visiting
+            for char, dst in enumerate(dfa.transitions[src]):
+                if dst == REJECT:
+                    continue
+                pred[dst].append((src, char))
+                if dst not in self.parent:
+                    self.parent[dst] = (src, char)
+                    self.depth[dst] = self.depth[src] + 1
+                    order.append(dst)
+        # shortest paths to an accepting state: state -> (char, dst)
+        self.to_end: Dict[int, Optional[Tuple[int, int]]] = dict()
+        self.end_depth: Dict[int, int] = dict()
+        order = sorted(dfa.accepted)
+        for st in order:
+            self.to_end[st] = None
+            self.end_depth[st] = 0
+        for dst in order:  # grows while visiting
+            for src, char in pred[dst]:
+                if src not in self.to_end:
+                    self.to_end[src] = (char, dst)
+                    self.end_depth[src] = self.end_depth[dst] + 1
+                    order.append(src)
+
+    def _path_to(self, st: int) -> List[str]:
+        trace: List[str] = []
+        parent = self.parent[st]
+        while parent is not None:
+            st, char = parent
+            trace.append(self.acts[char])
+            parent = self.parent[st]
+        trace.reverse()
+        return trace
+
+    def _path_from(self, st: int) -> List[str]:
+        trace: List[str] = []
+        step = self.to_end[st]
+        while step is not None:
+            char, st = step
+            trace.append(self.acts[char])
+            step = self.to_end[st]
+        return trace
+
+    def _edges(self) -> Iterable[Tuple[int, int, int]]:
+        # the transitions on some accepted word
+        for src in self.parent:
+            for char, dst in enumerate(self.dfa.transitions[src]):
+                if dst in self.to_end:
+                    yield src, char, dst
+
+    def check(self, formula: Formula) -> Tuple[bool, Optional[List[str]]]:
+        """
+        :return: whether the formula is structural (otherwise it is not
+        checked), and its counterexample (None if it holds)
+        """
+        name = _used_action(formula)
+        if self.ctl_compatible and name is not None:
+            # EF (a & EF _eos): some accepted word uses a (vacuous without
+            # any fair path, the dummy state must be followed by an action)
+            if all(dst not in self.to_end for dst in self.dfa.transitions[0]):
+                return True, None
+            used = any(self.acts[char] == name for (_, char, _) in self._edges())
+            return True, None if used else []
+        if not self.ctl_compatible and isinstance(formula, LTL_F):
+            alternatives = _alternatives(formula)
+            if alternatives is not None:
+                return True, self._check_first(*alternatives)
+        if (
+            isinstance(formula, LTL)
+            and isinstance(formula.formula, Always)
+            and isinstance(formula.formula.child, Implies)
+            and isinstance(formula.formula.child.left, LTL_F)
+            and isinstance(formula.formula.child.right, Next)
+        ):
+            name = _action_name(formula.formula.child.left.formula)
+            alternatives = _alternatives(formula.formula.child.right.child)
+            if name is not None and alternatives is not None:
+                return True, self._check_successors(name, *alternatives)
+        return False, None
+
+    def _check_first(self, names: FrozenSet[str], end: bool) -> Optional[List[str]]:
+        # every word starts with one of the names (or is empty, if end)
+        if 0 in self.dfa.accepted and not end:
+            return []
+        best: Optional[Tuple[int, int, int]] = None
+        for char, dst in enumerate(self.dfa.transitions[0]):
+            if dst in self.to_end and self.acts[char] not in names:
+                if best is None or self.end_depth[dst] < self.end_depth[best[1]]:
+                    best = (char, dst, 0)
+        if best is None:
+            return None
+        return [self.acts[best[0]]] + self._path_from(best[1])
+
+    def _check_successors(
+        self, name: str, names: FrozenSet[str], end: bool
+    ) -> Optional[List[str]]:
+        # G (name -> X (names | end)): after name comes one of the names
+        # (or the end of the sequence, if end)
+        best: Optional[Tuple[int, List[Tuple[int, int, int]]]] = None
+        for (src, char, dst) in self._edges():
+            if self.acts[char] != name:
+                continue
+            length = self.depth[src] + 1
+            if dst in self.dfa.accepted and not end:
+                if best is None or length < best[0]:
+                    best = (length, [(src, char, dst)])
+            for (char2, dst2) in enumerate(self.dfa.transitions[dst]):
+                if dst2 not in self.to_end or self.acts[char2] in names:
+                    continue
+                total = length + 1 + self.end_depth[dst2]
+                if best is None or total < best[0]:
+                    best = (total, [(src, char, dst), (dst, char2, dst2)])
+        if best is None:
+            return None
+        (_, steps) = best
+        trace = self._path_to(steps[0][0])
+        trace.extend(self.acts[char] for (_, char, _) in steps)
+        return trace + self._path_from(steps[-1][2])
+
+
+def check_structural(
+    dfa: IntDFA, specs: List[Spec], ctl_compatible: bool = False
+) -> Tuple[Dict[int, Optional[List[str]]], List[Spec]]:
+    """
+    Checks the structural formulas of the specs (see StructuralChecker), so
+    that only the other formulas are given to NuSMV.
+
+    :return: the counterexample of each structural formula (None if it
+    holds), by position in the specs; and the specs of the other formulas
+    """
+    structural = StructuralChecker(dfa, ctl_compatible)
+    checked: Dict[int, Optional[List[str]]] = dict()
+    rest: List[Spec] = []
+    index = 0
+    for spec in specs:
+        formulae = []
+        for f in spec.formulae:
+            (is_structural, trace) = structural.check(f)
+            if is_structural:
+                checked[index] = trace
+            else:
+                formulae.append(f)
+            index += 1
+        if len(formulae) > 0:
+            rest.append(Spec(formulae, comment=spec.comment))
+    return checked, rest
+
+
+def merge_results(
+    specs: List[Spec], checked: Dict[int, Optional[List[str]]], result: TResult
+) -> TResult:
+    """
+    Merges the results of check_structural with the result of model checking
+    the other formulas (in the same order).
+    """
+    action = Variable("_action")
+    eos = Variable("_eos")
+    others = iter([] if result is None else result)
+    results: List[Tuple[str, Optional[List[str]]]] = []
+    error = False
+    index = 0
+    for spec in specs:
+        for f in spec.formulae:
+            ltl = dumps(ltlf_to_ltl(f, eos=eos, action=action))
+            if index in checked:
+                trace = checked[index]
+            elif result is not None:
+                (ltl, trace) = next(others)
+            else:
+                trace = None
+            error = error or trace is not None
+            results.append((ltl, trace))
+            index += 1
+    return results if error else None
+
+
+def check_specs(
+    dfa: IntDFA,
+    specs: List[Spec],
+    ctl_compatible: bool = False,
+    budget: Optional[Budget] = None,
+) -> TResult:
+    """
+    Checks the specs on the SMV model of the DFA.
+
+    :return: as modelcheck.check_nusmv_output: None when every formula holds,
+    otherwise each formula (in the order of the specs) with its counterexample
+    (None if it holds)
+    """
+    action = Variable("_action")
+    eos = Variable("_eos")
+    kripke: Optional[Kripke] = None
+    (checked, rest) = check_structural(dfa, specs, ctl_compatible)
+    results: List[Tuple[str, Optional[List[str]]]] = []
+    error = False
+    for spec in rest:
+        for f in spec.formulae:
+            ltl = ltlf_to_ltl(f, eos=eos, action=action)
+            trace: Optional[List[str]]
+            if isinstance(f, CTL):
+                if kripke is None:
+                    kripke = Kripke(dfa, ctl_compatible)
+                # NuSMV gives no trace for existential properties
+                formula = convert_ctl(ltl, action.name, eos.name)
+                trace = None if kripke.check(formula) else []
+            else:
+                formula = convert(ltl, action.name, eos.name)
+                trace = check_ltl(dfa, formula, ctl_compatible, budget)
+            error = error or trace is not None
+            results.append((dumps(ltl), trace))
+    return merge_results(specs, checked, results if error else None)
@@ -6,6 +6,8 @@ from pathlib import Path
 import json
 from dataclasses import dataclass, asdict
 
+from shelley.automata.minimize import IntDFA, hopcroft
+
 
 @dataclass
 class Stats:
@@ -80,8 +82,8 @@ def handle_fsm(
                 stats.int_dfa = len(d)
 
                 if int_dfa_min_no_sink:
-                    d = d.minimize()
-                    stats.int_dfa_min_no_sink = len(d)
+                    # the minimized DFA is partial, it has no sink state
+                    stats.int_dfa_min_no_sink = len(hopcroft(IntDFA.from_dfa(d)))
 
 
 def main() -> None:
@@ -1,14 +1,16 @@
 import yaml
 import argparse
 import sys
-from typing import Any
+from typing import Any, Optional
 from karakuri import regular
 from pathlib import Path
 import json
 import logging
 
+from shelley.automata.projection import instance_prefixes
 from shelley.automata.view import fsm2dot, fsm2tex
 from shelley.shelleyv import shelleyv
+from shelley.shelleyc.serializer import load_nfa
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("shelleyv")
@@ -60,6 +62,11 @@ def create_parser() -> argparse.ArgumentParser:
         default=None,
         help="Work with operations from a specific subsystem only",
     )
+    parser.add_argument(
+        "--all-subsystems",
+        action="store_true",
+        help="Generate the minimized DFA of every subsystem at once (as with --dfa --dfa-no-empty-string --minimize --subsystem_name), one output file per subsystem named after --output (e.g., app-d-v.png for app-d.png)",
+    )
     parser.add_argument(
         "-v", "--verbosity", help="increase output verbosity", action="store_true"
     )
@@ -93,11 +100,26 @@ def main(unparsed_args=None) -> None:
     if args.dfa_no_sink and not args.dfa:
         parser.error("The '--dfa-no-sink' option requires '--dfa'")
 
-    with args.input.open() as fp:
-        d = yaml.load(fp, Loader=yaml.FullLoader)
+    if args.all_subsystems:
+        if args.output is None:
+            parser.error("The '--all-subsystems' option requires '--output'")
+        if args.subsystem_name is not None or args.filter is not None:
+            parser.error(
+                "The '--all-subsystems' option excludes '--subsystem_name' and '--filter'"
+            )
+        n = load_nfa(args.input)
+        prefixes = instance_prefixes(n.alphabet)
+        for (prefix, dfa) in shelleyv.project_subsystems(n, prefixes).items():
+            subsystem_stats = shelleyv.projection_stats(dfa)
+            output = args.output.parent / (
+                f"{args.output.stem}-{prefix[:-1]}{args.output.suffix}"
+            )
+            logger.debug(f"Subsystem {prefix[:-1]}: {subsystem_stats}")
+            dump_fsm(parser, args, subsystem_stats.result, output)
+        return
 
     fsm_stats: shelleyv.FSMStats = shelleyv.handle_fsm(
-        n=regular.NFA.from_dict(d),
+        n=load_nfa(args.input),
         filter=args.filter,
         dfa=args.dfa,
         dfa_no_empty_string=args.dfa_no_empty_string,
@@ -108,11 +130,20 @@ def main(unparsed_args=None) -> None:
         project_prefix=args.subsystem_name,
     )
 
-    n: regular.NFA[Any, str] = fsm_stats.result
-
     logger.debug(str(fsm_stats))
 
-    fp = sys.stdout if args.output is None else open(args.output, "w")
+    dump_fsm(parser, args, fsm_stats.result, args.output)
+
+
+def dump_fsm(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    n: regular.NFA[Any, str],
+    output: Optional[Path],
+) -> None:
+    # a DFA, from --dfa or --all-subsystems
+    dfa = args.dfa or args.all_subsystems
+    fp = sys.stdout if output is None else open(output, "w")
 
     if args.format == "json":
         json.dump(n.as_dict(flatten=True), fp)
@@ -121,7 +152,7 @@ def main(unparsed_args=None) -> None:
         yaml.dump(n.as_dict(flatten=True), fp)
         return
     if args.format == "fsm":
-        if not args.no_epsilon and not args.dfa:
+        if not args.no_epsilon and not dfa:
             parser.error(
                 "Option '--output fsm' requires either '--dfa' or '--no-epsilon'"
             )
@@ -131,7 +162,7 @@ def main(unparsed_args=None) -> None:
         shelleyv.mclr2_dump(n.as_dict(flatten=True), fp)
         return
     if args.format == "smv":
-        if not args.dfa:
+        if not dfa:
             parser.error("Option '--output smv' requires '--dfa'")
         shelleyv.smv_dump(state_diagram=n.as_dict(flatten=True), fp=fp)
         return
@@ -142,16 +173,16 @@ def main(unparsed_args=None) -> None:
         dot = fsm2dot(n)
     dot.format = "dot" if args.format == "tex" else args.format
     if dot.format == "dot":
-        if args.output is None:
+        if output is None:
             print(dot, file=sys.stdout)
         else:
-            with args.output.open("w") as fp:
+            with output.open("w") as fp:
                 print(dot, file=fp)
     else:
-        if args.output is None:
+        if output is None:
             sys.stdout.buffer.write(dot.pipe())
         else:
-            with args.output.open("wb") as fp:
+            with output.open("wb") as fp:
                 fp.write(dot.pipe())
     #
 
@@ -1,38 +1,85 @@
 import re
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Union
 from karakuri import regular
 from pathlib import Path
 import yaml
 import logging
 from dataclasses import dataclass
 
+from shelley.shelleyc.serializer import load_nfa
+from shelley.automata.graph import remove_sink_states
+from shelley.automata.minimize import IntDFA, minimize_dfa
+from shelley.automata.projection import project_all
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("shelleyv")
 
+# an FSM model, either a file (.scy or .scb), an NFA already in memory, or an
+# already projected subsystem (see project_subsystems)
+FSMModel = Union[Path, regular.NFA[Any, str], IntDFA]
+
+
+def load_smv_model(
+    fsm_model: FSMModel, project_prefix: Optional[str] = None
+) -> "FSMStats":
+    """
+    Loads an FSM model as converted by fsm2smv: determinized, without the
+    empty string (result_dfa), and as an NFA (result).
+    """
+    if isinstance(fsm_model, IntDFA):
+        assert project_prefix is None
+        return projection_stats(fsm_model)
+    return handle_fsm(
+        load_nfa(fsm_model) if isinstance(fsm_model, Path) else fsm_model,
+        dfa=True,
+        dfa_no_empty_string=True,
+        nfa_no_sink=True,
+        project_prefix=project_prefix,
+    )
+
+
+def project_subsystems(
+    fsm_model: Union[Path, regular.NFA[Any, str]], prefixes: List[str]
+) -> Dict[str, IntDFA]:
+    """
+    The minimal DFA of each subsystem of an integration, without the empty
+    string, from a single exploration of the integration (see
+    shelley.automata.projection).
+
+    @param prefixes: the prefix of each subsystem instance (e.g., "v.")
+    """
+    n = load_nfa(fsm_model) if isinstance(fsm_model, Path) else fsm_model
+    return project_all(n, prefixes)
+
+
+def projection_stats(dfa: IntDFA) -> "FSMStats":
+    """
+    A projected subsystem, as given by handle_fsm (without the sink state).
+    """
+    fsm_stats = FSMStats()
+    fsm_stats.dfa_min = len(dfa)
+    fsm_stats.result_dfa = dfa.to_dfa()
+    fsm_stats.result = regular.NFA.from_dict(dfa.as_dict())
+    return fsm_stats
+
 
 def fsm2smv(
-    fsm_model: Path,
+    fsm_model: FSMModel,
     smv_model: Path,
     project_prefix: Optional[str] = None,
     ctl_compatible: bool = False,
+    fsm_stats: Optional["FSMStats"] = None,
 ) -> None:
     """
-    Convert an FSM model (.scy) to an SMV model (.smv).
-    @param fsm_model: path to the input .scy file
+    Convert an FSM model (.scy or .scb) to an SMV model (.smv).
+    @param fsm_model: path to the input .scy or .scb file, or its NFA
     @param smv_model: path to the output .smv file
     @param filter_instance:
+    @param fsm_stats: the model, if already loaded (see load_smv_model)
     """
 
-    with fsm_model.open("r") as fp:
-        fsm_dict = yaml.load(fp, Loader=yaml.FullLoader)
-
-    fsm_stats: FSMStats = handle_fsm(
-        regular.NFA.from_dict(fsm_dict),
-        dfa=True,
-        dfa_no_empty_string=True,
-        nfa_no_sink=True,
-        project_prefix=project_prefix,
-    )
+    if fsm_stats is None:
+        fsm_stats = load_smv_model(fsm_model, project_prefix)
 
     logger.debug(str(fsm_stats))
 
@@ -332,7 +379,7 @@ def handle_fsm(
         # NOTE: If minimizing DFA, by removing sink states before there
         # is a unique sink state when we convert to DFA; this is a quick
         # way of making the resulting DFA smaller
-        n = n.remove_sink_states()
+        n = remove_sink_states(n)
         fsm_stats.nfa_no_sink = len(n)
 
     if no_epsilon:
@@ -344,7 +391,7 @@ def handle_fsm(
         fsm_stats.dfa = len(d)
 
         if dfa_minimize:
-            d = d.flatten(minimize=True)
+            d = minimize_dfa(d)
             fsm_stats.dfa_min = len(d)
         else:
             d = d.flatten()
@@ -359,7 +406,7 @@ def handle_fsm(
         fsm_stats.result = regular.dfa_to_nfa(d)
 
         if dfa_no_sink:
-            fsm_stats.result = fsm_stats.result.remove_sink_states()
+            fsm_stats.result = remove_sink_states(fsm_stats.result)
 
     else:
         fsm_stats.result = n
@@ -15,7 +15,9 @@ def create_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "subsystem_name",
         type=str,
-        help="Work with operations from a specific subsystem only",
+        nargs="?",
+        default=None,
+        help="Work with operations from a specific subsystem only (defaults to every subsystem, from a single pass over the integration)",
     )
 
     parser.add_argument(
@@ -31,6 +33,16 @@ def create_parser() -> argparse.ArgumentParser:
 def main() -> None:
     parser = create_parser()
     args: argparse.Namespace = parser.parse_args()
+    if args.subsystem_name is None:
+        shelleyv_main(
+            [
+                "--all-subsystems",
+                f"--format={args.format}",
+                f"{args.input}-i.scy",
+                f"-o={args.input}-d.{args.format}",
+            ]
+        )
+        return
     shelleyv_main(
         [
             "--dfa",
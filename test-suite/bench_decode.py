@@ -0,0 +1,89 @@
+"""
+Benchmark of the micro-to-macro decoding of counterexamples: enumerating the
+derivations of the micro trace (the previous decoder) against tracking the
+reachable (micro state, external state) pairs (decode_micro_trace).
+
+The micro behavior has nondeterministic triggers (a single or a double
+`m.x`), so the number of derivations of `m.x^n; m.y` grows exponentially
+with n, while only those that end with operation `c` are valid.
+
+    python bench_decode.py
+    python bench_decode.py -n 10 20 40 80 --max-legacy 20
+"""
+import argparse
+import time
+from typing import List, Optional, Sequence
+
+from karakuri.regular import Char, Concat
+
+from shelley.automata import (
+    MacroState,
+    MacroTrace,
+    MicroBehavior,
+    build_external_behavior,
+    decode_micro_trace,
+)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the trace decoder")
+    parser.add_argument(
+        "-n",
+        nargs="*",
+        type=int,
+        default=[5, 10, 15, 20, 25, 100, 400],
+        help="lengths of the micro traces",
+    )
+    parser.add_argument(
+        "--max-legacy",
+        type=int,
+        default=25,
+        help="only run the previous decoder up to this length",
+    )
+    return parser
+
+
+def create_micro_behavior() -> MicroBehavior:
+    events = ["a", "b", "c"]
+    behavior = [(x, y) for x in ["a", "b"] for y in events]
+    external = build_external_behavior(behavior, events, ["c"], events)
+    triggers = {
+        "a": Char("m.x"),
+        "b": Concat(Char("m.x"), Char("m.x")),
+        "c": Concat(Char("m.x"), Char("m.y")),
+    }
+    return MicroBehavior.make(external, triggers, {"m.x", "m.y"}, skip_checks=True)
+
+
+def legacy_decode(micro: MicroBehavior, seq: Sequence[str]) -> Optional[MacroTrace]:
+    for der in micro.nfa.get_derivations(seq):
+        rest: List[str] = []
+        for st in der:
+            if isinstance(st, MacroState) and st.event is not None:
+                rest.append(st.event)
+        if rest in micro.system:
+            return tuple(rest)
+    return None
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    micro = create_micro_behavior()
+    for n in args.n:
+        seq = ["m.x"] * n + ["m.y"]
+        start = time.perf_counter()
+        result = decode_micro_trace(micro.nfa, micro.system, seq)
+        dp_time = time.perf_counter() - start
+        assert result is not None and result[-1] == "c", result
+        line = f"n={n}: pairs {dp_time:.4f}s"
+        if n <= args.max_legacy:
+            start = time.perf_counter()
+            legacy = legacy_decode(micro, seq)
+            legacy_time = time.perf_counter() - start
+            assert legacy is not None and legacy[-1] == "c", legacy
+            line += f", derivations {legacy_time:.4f}s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark of DFA minimization: karakuri's DFA.minimize against the Hopcroft
+minimizer of shelley (shelley.automata.minimize).
+
+Each integration model is prepared as in `shelleyv --dfa --minimize` (sink
+states removed, then determinized), and both minimizers run on the same
+DFA. Arguments are example folders (each system that is not used by another
+one is compiled, and its integration is dumped) or integration models
+(-i.scy or -i.scb files).
+
+    python bench_minimize.py
+    python bench_minimize.py ../demos/paper_aquamote_example 2controllers_v3_hard
+    python bench_minimize.py path/to/app-i.scy -o minimize-times.json
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from karakuri import regular
+
+from bench_usage import find_examples
+from shelley.automata.graph import remove_sink_states
+from shelley.automata.minimize import IntDFA, hopcroft
+from shelley.shelleyc.exceptions import CompilationError
+from shelley.shelleyc.project import compile_project
+from shelley.shelleyc.serializer import load_nfa
+
+BASE_DIR = Path(__file__).parent
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark DFA minimization")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        help="example folders or integration models (defaults to every example of the test-suite and of the demos)",
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, help="dump per-model timings as JSON"
+    )
+    return parser
+
+
+def find_models(
+    paths: List[Path], tmp_dir: Path
+) -> Iterator[Tuple[str, regular.NFA[Any, str]]]:
+    folders = [p for p in paths if p.is_dir()]
+    for path in paths:
+        if not path.is_dir():
+            yield str(path), load_nfa(path)
+    for (uses_path, src_path) in find_examples(folders):
+        integration = tmp_dir / f"{src_path.stem}-i.scy"
+        try:
+            compile_project(
+                uses_path=uses_path,
+                src_path=src_path,
+                integration=integration,
+                save_output=False,
+                skip_checks=True,
+            )
+        except CompilationError as err:
+            print(f"{src_path}: skipped ({err})")
+            continue
+        if integration.exists():  # only systems with subsystems
+            yield str(src_path), load_nfa(integration)
+            integration.unlink()
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    paths = args.paths
+    if len(paths) == 0:
+        paths = sorted(p for p in BASE_DIR.iterdir() if p.is_dir())
+        paths.extend(sorted(p for p in (BASE_DIR.parent / "demos").iterdir()))
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for (name, nfa) in find_models(paths, Path(tmp_dir)):
+            dfa = regular.nfa_to_dfa(remove_sink_states(nfa)).flatten()
+
+            start = time.perf_counter()
+            theirs = dfa.minimize()
+            karakuri_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            ours = hopcroft(IntDFA.from_dfa(dfa))
+            hopcroft_time = time.perf_counter() - start
+
+            equivalent = ours.to_dfa().is_equivalent_to(theirs)
+            results.append(
+                dict(
+                    file=name,
+                    dfa=len(dfa),
+                    karakuri_states=len(theirs),
+                    hopcroft_states=len(ours),
+                    karakuri=karakuri_time,
+                    hopcroft=hopcroft_time,
+                    equivalent=equivalent,
+                )
+            )
+            print(
+                f"{name}: DFA {len(dfa)} states -> {len(ours)} states (no sink);"
+                f" karakuri {karakuri_time:.3f}s, hopcroft {hopcroft_time:.3f}s"
+                f"{'' if equivalent else ' (MISMATCH)'}"
+            )
+
+    karakuri_total = sum(r["karakuri"] for r in results)
+    hopcroft_total = sum(r["hopcroft"] for r in results)
+    print(f"Models: {len(results)}")
+    if hopcroft_total > 0:
+        print(
+            f"Total: karakuri {karakuri_total:.3f}s, hopcroft {hopcroft_total:.3f}s"
+            f" ({karakuri_total / hopcroft_total:.1f}x)"
+        )
+
+    if args.output is not None:
+        with args.output.open("w") as fp:
+            json.dump(results, fp, indent=2)
+
+    if not all(r["equivalent"] for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
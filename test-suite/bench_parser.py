@@ -0,0 +1,122 @@
+"""
+Parse-time benchmark of the LALR fast path against the Earley grammar.
+
+Parses every .shy file under the given folders (defaults to the test-suite)
+with both parsers, checks that the LALR trees match the Earley trees, and
+reports which files had to fall back to Earley.
+
+    python bench_parser.py
+    python bench_parser.py ../demos -o parse-times.json
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from lark import Tree
+from lark.exceptions import LarkError
+
+from shelley.parsers import shelley_lark_parser
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the Shelley parsers")
+    parser.add_argument(
+        "folders",
+        nargs="*",
+        type=Path,
+        default=[Path(__file__).parent],
+        help="folders to search for .shy files (defaults to the test-suite)",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="parse each file this many times"
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, help="dump per-file timings as JSON"
+    )
+    return parser
+
+
+def normalize(tree: Any) -> Any:
+    # The LALR grammar has no empty user claims and its tokens are namespaced
+    # differently; neither reaches the transformer.
+    if not isinstance(tree, Tree):
+        return str(tree)
+    children = [
+        normalize(child)
+        for child in tree.children
+        if not (
+            isinstance(child, Tree)
+            and child.data in ("user_claim", "user_claim_base")
+            and len(child.children) == 0
+        )
+    ]
+    return Tree(tree.data, children)
+
+
+def timed_parse(parser, source: str, repeat: int):
+    best = None
+    tree = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            tree = parser.parse(source)
+        except LarkError:
+            return None, None
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return tree, best
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    parser = shelley_lark_parser.parser
+
+    start = time.perf_counter()
+    parser.lalr
+    lalr_load = time.perf_counter() - start
+    start = time.perf_counter()
+    parser.earley
+    earley_load = time.perf_counter() - start
+
+    results: List[Dict[str, Any]] = []
+    for folder in args.folders:
+        for path in sorted(folder.glob("**/*.shy")):
+            source = path.read_text()
+            earley_tree, earley_time = timed_parse(parser.earley, source, args.repeat)
+            lalr_tree, lalr_time = timed_parse(parser.lalr, source, args.repeat)
+            if lalr_tree is None:
+                status = "fallback"
+            elif earley_tree is None or normalize(lalr_tree) != normalize(earley_tree):
+                status = "mismatch"
+            else:
+                status = "ok"
+            results.append(
+                dict(file=str(path), status=status, earley=earley_time, lalr=lalr_time)
+            )
+
+    ok = [r for r in results if r["status"] == "ok"]
+    earley_total = sum(r["earley"] for r in ok)
+    lalr_total = sum(r["lalr"] for r in ok)
+    print(f"Grammar load: LALR {lalr_load:.3f}s, Earley {earley_load:.3f}s")
+    print(f"Files: {len(results)} (LALR: {len(ok)})")
+    if lalr_total > 0:
+        print(
+            f"Parse time (LALR files): Earley {earley_total:.3f}s, LALR {lalr_total:.3f}s"
+            f" ({earley_total / lalr_total:.1f}x)"
+        )
+    for r in results:
+        if r["status"] != "ok":
+            print(f"{r['status'].upper()}: {r['file']}")
+
+    if args.output is not None:
+        with args.output.open("w") as fp:
+            json.dump(results, fp, indent=2)
+
+    if any(r["status"] == "mismatch" for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark of the usage checks: determinization (default) against the
+antichain-based inclusion check (shelleyc --antichain).
+
+Compiles every example of the test-suite (each folder with a uses.yml) with
+both algorithms, checks that they reach the same verdict, and reports the
+compilation times.
+
+    python bench_usage.py
+    python bench_usage.py 2controllers_v3_hard -o usage-times.json
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from shelley.shelleyc.exceptions import CompilationError
+from shelley.shelleyc.project import compile_project
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the usage checks")
+    parser.add_argument(
+        "folders",
+        nargs="*",
+        type=Path,
+        help="example folders (defaults to every example of the test-suite)",
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, help="dump per-example timings as JSON"
+    )
+    return parser
+
+
+def find_examples(folders: List[Path]) -> List[Tuple[Path, Path]]:
+    """
+    Every system of an example that is not used by another one
+    """
+    examples = []
+    for folder in folders:
+        uses_path = folder / "uses.yml"
+        if not uses_path.exists():
+            continue
+        with uses_path.open() as f:
+            uses = yaml.safe_load(f) or dict()
+        used = set(Path(x).stem for x in uses.values())
+        for src_path in sorted(folder.glob("*.shy")):
+            if src_path.stem not in used:
+                examples.append((uses_path, src_path))
+    return examples
+
+
+def timed_compile(
+    uses_path: Path, src_path: Path, antichain: bool
+) -> Tuple[float, Optional[str]]:
+    start = time.perf_counter()
+    try:
+        compile_project(
+            uses_path=uses_path,
+            src_path=src_path,
+            save_output=False,
+            antichain=antichain,
+        )
+        error = None
+    except CompilationError as err:
+        error = str(err)
+    return time.perf_counter() - start, error
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    folders = args.folders
+    if len(folders) == 0:
+        folders = sorted(p for p in Path(__file__).parent.iterdir() if p.is_dir())
+
+    results: List[Dict[str, Any]] = []
+    for (uses_path, src_path) in find_examples(folders):
+        dfa_time, dfa_error = timed_compile(uses_path, src_path, antichain=False)
+        ac_time, ac_error = timed_compile(uses_path, src_path, antichain=True)
+        if (dfa_error is None) != (ac_error is None):
+            status = "mismatch"
+        elif dfa_error != ac_error:
+            # same verdict, but another (equally short) counterexample
+            status = "other-error"
+        else:
+            status = "ok"
+        results.append(
+            dict(
+                file=str(src_path),
+                status=status,
+                dfa=dfa_time,
+                antichain=ac_time,
+                valid=dfa_error is None,
+            )
+        )
+        print(
+            f"{src_path}: DFA {dfa_time:.3f}s, antichain {ac_time:.3f}s"
+            f" ({status.upper()})"
+        )
+
+    dfa_total = sum(r["dfa"] for r in results)
+    ac_total = sum(r["antichain"] for r in results)
+    print(f"Examples: {len(results)}")
+    if ac_total > 0:
+        print(
+            f"Total: DFA {dfa_total:.3f}s, antichain {ac_total:.3f}s"
+            f" ({dfa_total / ac_total:.1f}x)"
+        )
+
+    if args.output is not None:
+        with args.output.open("w") as fp:
+            json.dump(results, fp, indent=2)
+
+    if any(r["status"] == "mismatch" for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
+import pickle
 import pytest
-from typing import Dict, cast, List, Any, Callable
+from typing import Dict, cast, List, Any, Callable, Optional
 from karakuri.regular import (
     NFA,
     DFA,
@@ -26,6 +27,12 @@ from shelley.automata import (
     Component,
 )
 from shelley import automata
+from shelley.automata.budget import MAX_STATES, Budget, BudgetExceeded
+from shelley.automata.graph import analyze, remove_sink_states
+from shelley.automata.inclusion import check_inclusion
+from shelley.automata.minimize import REJECT, IntDFA, hopcroft, minimize_dfa
+from shelley.automata.projection import instance_prefixes, project_all
+from shelley.automata.triggers import TriggerCache, TriggerDFA, determinize_triggers
 
 B_P: str = "b.pressed"
 B_R: str = "b.released"
@@ -348,7 +355,8 @@ def test_encode2() -> None:
     assert be.contains(expected)
 
 
-def test_ambiguity_1() -> None:
+@pytest.mark.parametrize("engine", automata.AMBIGUITY_ENGINES)
+def test_ambiguity_1(engine: str) -> None:
     behavior = Union(Char(LEVEL1), Star(Concat(Char(LEVEL1), Char(LEVEL2))))
     n_behavior = dfa_to_nfa(nfa_to_dfa(regex_to_nfa(behavior)).minimize())
     triggers: Dict[str, Regex[str]] = {
@@ -357,7 +365,7 @@ def test_ambiguity_1() -> None:
     }
     components = {"b": create_button_b()}
     res = automata.AssembledMicroBehavior.make(
-        components, n_behavior, triggers, check_ambiguity=True
+        components, n_behavior, triggers, check_ambiguity=True, ambiguity_engine=engine
     )
     assert not res.micro.is_valid
     fail = res.micro.failure
@@ -366,6 +374,23 @@ def test_ambiguity_1() -> None:
     assert sorted(fail.macro_traces) == sorted([(LEVEL2,), (LEVEL1,)])
 
 
+def test_ambiguity_product_valid() -> None:
+    behavior = Star(Concat(Char(LEVEL1), Char(LEVEL2)))
+    triggers: Dict[str, Regex[str]] = {
+        LEVEL1: Char(B_P),
+        LEVEL2: Char(B_R),
+    }
+    micro = automata.MicroBehavior.make(
+        regex_to_nfa(behavior),
+        triggers,
+        {B_P, B_R},
+        check_ambiguity=True,
+        ambiguity_engine=automata.AMBIGUITY_PRODUCT,
+    )
+    assert micro.is_valid
+    assert micro.failure is None
+
+
 def test_subsystem_not_used() -> None:
     behavior = Union(
         Char(LEVEL1),
@@ -483,6 +508,111 @@ def test_components() -> None:
     assert t.behavior == create_timer_t_nfa()
 
 
+def test_component_dfa_shared_by_type() -> None:
+    led = create_led_dev()
+    led_a = Component("ledA", led)
+    led_b = Component("ledB", led)
+    # the device type is determinized only once
+    assert led_a.system.dfa is led_b.system.dfa
+    assert_equiv_dfa(nfa_to_dfa(create_led_a_nfa()), led_a.dfa)
+    assert_equiv_dfa(nfa_to_dfa(create_led_b_nfa()), led_b.dfa)
+
+
+def test_minimize_behavior() -> None:
+    behavior = automata.build_external_behavior(
+        [("a", "b"), ("b", "a")], ["a"], ["a", "b"], ["a", "b"]
+    )
+    # the same language, with redundant states
+    unrolled = NFA(
+        alphabet=["a", "b"],
+        transition_func=NFA.transition_edges(
+            [(0, ["a"], 1), (1, ["b"], 2), (2, ["a"], 3), (3, ["b"], 2)]
+        ),
+        start_state=0,
+        accepted_states=[1, 2, 3],
+    )
+    expected = dict(
+        start_state=0,
+        accepted_states=[1, 2],
+        edges=[
+            dict(src=0, char="a", dst=1),
+            dict(src=1, char="b", dst=2),
+            dict(src=2, char="a", dst=1),
+        ],
+    )
+    assert automata.minimize_behavior(behavior) == expected
+    assert automata.minimize_behavior(unrolled) == expected
+    assert_equiv_dfa(nfa_to_dfa(NFA.from_dict(expected)), nfa_to_dfa(behavior))
+    # operation c only leads to the sink, which is then kept
+    behavior = automata.build_external_behavior(
+        [("a", "b"), ("a", "c")], ["a"], ["b"], ["a", "b", "c"]
+    )
+    given = automata.minimize_behavior(behavior)
+    assert set(e["char"] for e in given["edges"]) == {"a", "b", "c"}
+
+
+def test_hopcroft() -> None:
+    # (ab)* with redundant states, and a dead state 4
+    nfa = NFA(
+        alphabet=["a", "b"],
+        transition_func=NFA.transition_edges(
+            [
+                (0, ["a"], 1),
+                (1, ["b"], 2),
+                (2, ["a"], 3),
+                (3, ["b"], 0),
+                (3, ["a"], 4),
+                (4, ["a", "b"], 4),
+            ]
+        ),
+        start_state=0,
+        accepted_states=[0, 2],
+    )
+    dfa = nfa_to_dfa(nfa)
+    given = hopcroft(IntDFA.from_dfa(dfa))
+    # the sink is not materialized
+    assert given == IntDFA(
+        alphabet=("a", "b"),
+        transitions=((1, REJECT), (REJECT, 0)),
+        accepted=frozenset([0]),
+    )
+    assert_equiv_dfa(given.to_dfa(), dfa)
+    assert_equiv_dfa(minimize_dfa(dfa), dfa.minimize())
+    assert hopcroft(given) == given
+
+
+def test_project_all() -> None:
+    # (v.on t.start v.off t.stop)+, with an epsilon move and a dead state 6
+    nfa = NFA(
+        alphabet=["v.on", "v.off", "t.start", "t.stop"],
+        transition_func=NFA.transition_edges(
+            [
+                (0, ["v.on"], 1),
+                (1, ["t.start"], 2),
+                (2, [None], 5),
+                (5, ["v.off"], 3),
+                (3, ["t.stop"], 4),
+                (4, ["v.on"], 1),
+                (4, ["t.start"], 6),
+            ]
+        ),
+        start_state=0,
+        accepted_states=[4],
+    )
+    assert instance_prefixes(nfa.alphabet) == ["t.", "v."]
+    given = project_all(nfa, ["t.", "v."])
+    assert given["v."] == IntDFA(
+        alphabet=("off", "on"),
+        transitions=((REJECT, 1), (2, REJECT), (REJECT, 1)),
+        accepted=frozenset([2]),
+    )
+    assert given["t."] == IntDFA(
+        alphabet=("start", "stop"),
+        transitions=((1, REJECT), (REJECT, 2), (1, REJECT)),
+        accepted=frozenset([2]),
+    )
+
+
 def test_build_nfa_transitions() -> None:
     start_events = ["level1"]
     behavior = [
@@ -697,7 +827,10 @@ def get_basic_known_devices() -> Callable[[str], CheckedDevice]:
     ).__getitem__
 
 
-def test_invalid_behavior_1() -> None:
+@pytest.mark.parametrize("bounded", [None, 4])
+@pytest.mark.parametrize("jobs", [1, 2])
+@pytest.mark.parametrize("antichain", [False, True])
+def test_invalid_behavior_1(antichain: bool, jobs: int, bounded: Optional[int]) -> None:
     device = Device(
         start_events=["level1"],
         final_events=["level1", "level2", "standby1", "standby2"],
@@ -724,7 +857,13 @@ def test_invalid_behavior_1() -> None:
             ),
         },
     )
-    given = AssembledDevice.make(device, get_basic_known_devices())
+    given = AssembledDevice.make(
+        device,
+        get_basic_known_devices(),
+        antichain=antichain,
+        jobs=jobs,
+        bounded=bounded,
+    )
     assert not given.is_valid
     assert isinstance(given.failure, automata.TriggerIntegrationFailure)
     assert given.failure.macro_trace == (LEVEL1,)
@@ -930,6 +1069,33 @@ def test_projection_class() -> None:
     assert not proj.is_valid
 
 
+def test_projection_class_antichain() -> None:
+    def make(trace: List[str]) -> ComponentUsageFailure:
+        micro_nfa = NFA[int, str](
+            alphabet=[B_P, B_R],
+            transition_func=NFA.transition_table(
+                dict(
+                    ((idx, ch), frozenset([idx + 1])) for (idx, ch) in enumerate(trace)
+                )
+            ),
+            accepted_states=[len(trace)],
+            start_state=0,
+        )
+        return ComponentUsageFailure.make(
+            micro_nfa, create_button_b_nfa(), "b", antichain=True
+        )
+
+    proj1 = make([B_R, B_P])
+    proj2 = make([B_R, B_P])
+    other = make([B_P, B_P])
+    # no DFAs are built, the counterexamples are compared instead
+    assert proj1.projected is None and proj1.component is None
+    assert proj1.is_equivalent_to(proj2)
+    assert proj1.__equals__(proj2)
+    assert not proj1.is_equivalent_to(other)
+    assert not proj1.__equals__(other)
+
+
 def assert_equiv_nfa(self: NFA[Any, str], other: NFA[Any, str]):
     assert_equiv_dfa(nfa_to_dfa(self), nfa_to_dfa(other))
 
@@ -1063,7 +1229,8 @@ def test_invalid_behavior_3() -> None:
     assert not check.is_valid
 
 
-def test_valid_behavior_3() -> None:
+@pytest.mark.parametrize("antichain", [False, True])
+def test_valid_behavior_3(antichain: bool) -> None:
     # Projected triggers to Button
     triggers: Dict[str, Regex[str]] = {
         LEVEL1: Concat.from_list(map(Char, [B_P, B_R, B_P, B_R,],)),
@@ -1077,13 +1244,36 @@ def test_valid_behavior_3() -> None:
         components={"b": "Button",},
         triggers=triggers,
     )
-    given = AssembledDevice.make(device, get_basic_known_devices())
+    given = AssembledDevice.make(device, get_basic_known_devices(), antichain=antichain)
     assert given.is_valid
     check = AssembledDevice.make(device, get_basic_known_devices())
     assert isinstance(check.internal, AssembledMicroBehavior)
     assert check.is_valid
 
 
+def test_bounded() -> None:
+    device = Device(
+        start_events=["level1"],
+        final_events=["level1"],
+        events=["level1"],
+        behavior=[("level1", "level1")],
+        components={"b": "Button"},
+        triggers={LEVEL1: concat(Char(B_P), Char(B_P))},
+    )
+    # the shortest error has two subsystem calls
+    given = AssembledDevice.make(device, get_basic_known_devices(), bounded=1)
+    assert given.is_valid
+    given = AssembledDevice.make(device, get_basic_known_devices(), bounded=2)
+    assert not given.is_valid
+    assert isinstance(given.failure, automata.TriggerIntegrationFailure)
+    assert given.failure.micro_trace == (B_P, B_P)
+    assert given.failure.component_errors == {"b": (("pressed", "pressed"), 1)}
+    # the micro behavior is neither determinized nor fully explored
+    assert given.internal is not None
+    assert given.internal.micro._dfa is None
+    assert given.internal.micro._epsilon_free is None
+
+
 def test_projection() -> None:
     n1 = NFA(
         alphabet="abc",
@@ -1141,3 +1331,313 @@ def test_device_led_and_button() -> None:
     )
     expected = AssembledDevice.make(device, empty_devices).external.nfa
     assert_equiv_nfa(create_prefixed_led_and_button(), expected)
+
+
+def test_state_table() -> None:
+    table = automata.StateTable()
+    start = table.macro("$START")
+    assert table.macro("$START") is start
+    micro = table.micro("on", "on", frozenset([0]))
+    assert micro.advance_micro(frozenset([0])) is micro
+    assert micro.advance_macro() is table.macro("on", "on")
+    assert len(table) == 3
+    # interned states are equal to their non-interned counterpart
+    assert start == automata.MacroState("$START")
+    assert hash(micro) == hash(automata.MicroState("on", "on", frozenset([0])))
+    assert micro != automata.MicroState("on", "on", frozenset([1]))
+    # but copies are not interned
+    copy = pickle.loads(pickle.dumps(micro))
+    assert copy == micro and copy is not micro
+    assert repr(start) == "MacroState(state='$START', event=None)"
+
+
+def test_transition_memo() -> None:
+    calls = []
+
+    def tsx(src, char):
+        calls.append((src, char))
+        return frozenset([src + 1])
+
+    memo = automata.TransitionMemo(tsx, max_size=2)
+    assert memo(0, "a") == {1}
+    assert memo(0, "a") == {1}
+    assert (memo.hits, memo.misses) == (1, 1)
+    memo(1, "a")
+    memo(2, "a")  # evicts the oldest entry
+    assert len(memo.table) == 2
+    memo(0, "a")
+    assert (memo.hits, memo.misses) == (1, 4)
+    assert len(calls) == 4
+
+
+def test_transition_memo_frozen() -> None:
+    succ = {1}
+    memo = automata.TransitionMemo(lambda src, char: succ)
+    result = memo(0, "a")
+    assert isinstance(result, frozenset)
+    # the cached successors do not change with the set returned by the function
+    succ.add(2)
+    assert memo(0, "a") == {1}
+
+
+def test_determinize_triggers(tmp_path) -> None:
+    seq = Concat(Char(B_P), Char(B_R))
+    triggers: Dict[str, Regex[str]] = {
+        LEVEL1: seq,
+        LEVEL2: Concat(Char(B_P), Char(B_R)),  # structurally equal
+        STANDBY1: NIL,
+    }
+    alphabet = {B_P, B_R}
+    dfas = determinize_triggers(triggers, alphabet)
+    assert dfas[LEVEL1] is dfas[LEVEL2]
+    assert dfas[LEVEL1] is not dfas[STANDBY1]
+    assert_equiv_dfa(nfa_to_dfa(regex_to_nfa(seq, alphabet)), dfas[LEVEL1])
+
+    cache = TriggerCache(tmp_path)
+    determinize_triggers(triggers, alphabet, cache)
+    assert len(cache.entries()) == 2
+    key = cache.key(seq, alphabet)
+    table = cache.load(key)
+    assert table == TriggerDFA.from_dfa(dfas[LEVEL1])
+    # the alphabet is part of the key
+    assert key != cache.key(seq, alphabet | {"b.other"})
+    cached = determinize_triggers(triggers, alphabet, cache)
+    assert_equiv_dfa(dfas[STANDBY1], cached[STANDBY1])
+
+
+def test_model_checker_accepts_all() -> None:
+    checker = automata.ModelChecker(create_button_nfa())
+    words = {
+        "empty": [],
+        "press": ["pressed"],
+        "press_release": ["pressed", "released"],
+        "release": ["released"],
+        "release_press": ["released", "pressed"],
+    }
+    assert checker.accepts_all(words) == dict(
+        (k, checker.nfa.accepts(w)) for (k, w) in words.items()
+    )
+    with pytest.raises(ValueError):
+        checker.accepts_all({"bad": ["toggled"]})
+
+
+def test_check_traces_reports_all() -> None:
+    checker = automata.ModelChecker(create_button_nfa())
+    tests = {
+        "ok": {"good": ["pressed"], "bad1": ["released"]},
+        "fail": {"bad2": ["pressed", "released"], "good2": ["released"]},
+    }
+    with pytest.raises(ValueError) as exc_info:
+        automata.check_traces(checker, tests)
+    assert str(exc_info.value).split("\n") == [
+        "Unaccepted valid trace 'bad1': ['released']",
+        "Unexpected invalid trace 'bad2': ['pressed', 'released']",
+    ]
+    # a plain function gives the same outcome
+    with pytest.raises(ValueError) as exc_info2:
+        automata.check_traces(checker.nfa.accepts, tests)
+    assert str(exc_info2.value) == str(exc_info.value)
+
+
+def test_structural_analysis() -> None:
+    # fmt: off
+    nfa = NFA(
+        alphabet=["a", "b", "c"],
+        transition_func=NFA.transition_edges(
+            [
+                (0, ["a"], 1),
+                (1, ["b"], 2),
+                (2, ["c"], 3),
+                (3, ["b"], 2),
+                (1, ["c"], 4),
+                (5, ["a"], 1),
+            ]
+        ),
+        start_state=0,
+        accepted_states=[4],
+    )
+    # fmt: on
+    analysis = analyze(nfa)
+    assert analysis.reachable == {0, 1, 2, 3, 4}
+    assert analysis.sinks == {2, 3}
+    assert analysis.useful == {0, 1, 4}
+    (cycle,) = analysis.dead_end_cycles
+    assert cycle.prefix == ("a", "b")
+    assert cycle.cycle == ("c", "b")
+    assert cycle.states == {2, 3}
+    assert str(cycle) == "a, b, (c, b)*"
+    assert set(remove_sink_states(nfa).states) == {0, 1, 4}
+
+
+def test_dead_end_cycle_failure() -> None:
+    device = Device(
+        start_events=["level1"],
+        final_events=["level1"],
+        events=["level1", "level2", "level3"],
+        behavior=[("level1", "level2"), ("level2", "level3"), ("level3", "level2")],
+        components={},
+        triggers={"level1": NIL, "level2": NIL, "level3": NIL},
+    )
+    given = AssembledDevice.make(device, get_basic_known_devices())
+    assert not given.is_valid
+    assert given.sink_operations == {"level2", "level3"}
+    assert given.failure.dead_end_cycles == given.dead_end_cycles
+    assert [x.prefix for x in given.dead_end_cycles] == [("level1", "level2")]
+
+
+def test_decode_micro_trace() -> None:
+    events = ["a", "b", "c"]
+    behavior = [(x, y) for x in ["a", "b"] for y in events]
+    external = automata.build_external_behavior(behavior, events, ["c"], events)
+    triggers: Dict[str, Regex[str]] = {
+        "a": Char(B_P),
+        "b": Concat(Char(B_P), Char(B_P)),
+        "c": Concat(Char(B_P), Char(B_R)),
+    }
+    micro = automata.MicroBehavior.make(
+        external, triggers, {B_P, B_R}, skip_checks=True
+    )
+    seq = [B_P] * 30 + [B_R]
+    macro = micro.convert_micro_to_macro(seq)
+    assert macro[-1] == "c"
+    assert list(macro) in external
+    assert automata.decode_micro_trace(micro.nfa, micro.system, [B_R]) is None
+    with pytest.raises(ValueError):
+        micro.convert_micro_to_macro([B_P])  # ends in a non-final operation
+
+
+def test_materialize() -> None:
+    events = ["a", "b", "c"]
+    behavior = [(x, y) for x in ["a", "b"] for y in events]
+    external = automata.build_external_behavior(behavior, events, ["c"], events)
+    triggers: Dict[str, Regex[str]] = {
+        "a": Char(B_P),
+        "b": Concat(Char(B_P), Char(B_P)),
+        "c": Concat(Char(B_P), Char(B_R)),
+    }
+    lazy = automata.MicroBehavior.make(external, triggers, {B_P, B_R})
+    given = automata.MicroBehavior.make(
+        external, triggers, {B_P, B_R}, materialize=True
+    )
+    assert lazy.graph is None
+    assert given.graph is not None
+    assert given.is_valid == lazy.is_valid
+    assert_equiv_dfa(given.dfa, lazy.dfa)
+    expected = lazy.nfa.as_dict()
+    data = given.graph.as_dict()
+    assert data["start_state"] == expected["start_state"]
+    assert set(data["accepted_states"]) == set(expected["accepted_states"])
+    assert len(data["edges"]) == len(expected["edges"])
+    assert len(data["edges"]) == given.graph.num_edges + given.graph.num_epsilon_edges
+    assert set(given.nfa.states) == set(given.graph.states)
+
+
+def test_epsilon_free() -> None:
+    events = ["a", "b", "c"]
+    behavior = [(x, y) for x in ["a", "b"] for y in events]
+    external = automata.build_external_behavior(behavior, events, ["c"], events)
+    triggers: Dict[str, Regex[str]] = {
+        "a": Char(B_P),
+        "b": Concat(Char(B_P), Char(B_P)),
+        "c": Concat(Char(B_P), Char(B_R)),
+    }
+    micro = automata.MicroBehavior.make(external, triggers, {B_P, B_R})
+    given = micro.epsilon_free
+    assert given is micro.epsilon_free
+    assert given.num_epsilon_edges == 0
+    states, edges = micro.explored_size
+    assert len(given) < states
+    assert given.num_edges < edges
+    assert_equiv_dfa(nfa_to_dfa(given.as_nfa()), micro.dfa)
+
+
+def test_timings_sizes() -> None:
+    device = Device(
+        start_events=["level1"],
+        final_events=["level1", "level2"],
+        events=["level1", "level2"],
+        behavior=[("level1", "level2")],
+        components={"b": "Button"},
+        triggers={LEVEL1: Char(B_R), LEVEL2: Char(B_P)},
+    )
+    given = AssembledDevice.make(device, get_basic_known_devices())
+    timings = given.get_timings()
+    assert 0 < timings.epsilon_free_states < timings.integration_states
+    assert 0 < timings.epsilon_free_edges < timings.integration_edges
+    # measuring the sizes does not change the statistics of the checks
+    assert given.get_timings() == timings
+
+
+def test_budget() -> None:
+    device = Device(
+        start_events=["level1"],
+        final_events=["level1", "level2"],
+        events=["level1", "level2"],
+        behavior=[("level1", "level2")],
+        components={"b": "Button"},
+        triggers={LEVEL1: Char(B_R), LEVEL2: Char(B_P)},
+    )
+    expected = AssembledDevice.make(device, get_basic_known_devices())
+    given = AssembledDevice.make(
+        device, get_basic_known_devices(), budget=Budget(max_states=1000)
+    )
+    assert given.is_valid == expected.is_valid
+    assert str(given.failure) == str(expected.failure)
+    with pytest.raises(BudgetExceeded) as exc_info:
+        AssembledDevice.make(
+            device, get_basic_known_devices(), budget=Budget(max_states=2)
+        )
+    verdict = exc_info.value.verdict
+    assert verdict.reason == MAX_STATES
+    assert verdict.explored == 3
+    assert 0 < verdict.frontier <= verdict.explored
+
+
+def test_timings_transitions_memo() -> None:
+    device = Device(
+        start_events=["level1"],
+        final_events=["level1", "level2"],
+        events=["level1", "level2"],
+        behavior=[("level1", "level2")],
+        components={"b": "Button"},
+        triggers={LEVEL1: Char(B_R), LEVEL2: Char(B_P)},
+    )
+    given = AssembledDevice.make(device, get_basic_known_devices())
+    timings = given.get_timings()
+    # the micro behavior is expanded by the ambiguity DFA and by its epsilon-free
+    # copy (shared by the usage checks)
+    assert timings.transitions_memo_misses > 0
+    assert timings.transitions_memo_hits > 0
+    assert 0 < timings.transitions_memo_hit_rate < 1
+
+
+def test_check_inclusion() -> None:
+    # (ab)*
+    left = NFA(
+        alphabet=["a", "b"],
+        transition_func=NFA.transition_edges([(0, ["a"], 1), (1, ["b"], 0)]),
+        start_state=0,
+        accepted_states=[0],
+    )
+    # (ab)* but at most two a's
+    right = NFA(
+        alphabet=["a", "b"],
+        transition_func=NFA.transition_edges(
+            [(0, ["a"], 1), (1, ["b"], 2), (2, ["a"], 3), (3, ["b"], 4)]
+        ),
+        start_state=0,
+        accepted_states=[0, 2, 4],
+    )
+    result = check_inclusion(left, right)
+    assert result.counterexample == ("a", "b", "a", "b", "a", "b")
+    assert result.accepts_any
+    assert check_inclusion(right, left).is_included
+    # ignore the empty word
+    empty = NFA(
+        alphabet=["a"],
+        transition_func=NFA.transition_edges([]),
+        start_state=0,
+        accepted_states=[0],
+    )
+    result = check_inclusion(empty, right, nonempty=True)
+    assert result.is_included and not result.accepts_any
@@ -0,0 +1,198 @@
+import io
+import json
+import shutil
+import pytest
+from pathlib import Path
+from typing import Optional
+
+from shelley.automata.budget import Budget, MAX_STATES
+from shelley.shelleyc import cache as cache_module
+from shelley.shelleyc import exceptions
+from shelley.shelleyc import shelleyc
+from shelley.shelleyc.cache import CompileCache, CachedDevice
+
+EXAMPLES_PATH = Path() / Path(__file__).parent / "input"
+
+
+def compile_device(
+    src_path: Path, cache: Optional[CompileCache], uses_path: Optional[Path] = None, **kwargs
+):
+    _, dev = shelleyc.compile_shelley(
+        src_path=src_path,
+        uses_path=uses_path,
+        dst_path=src_path.with_suffix(".scy"),
+        cache=cache,
+        **kwargs,
+    )
+    return dev
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> CompileCache:
+    return CompileCache(tmp_path / "cache")
+
+
+def test_cache_hit(tmp_path: Path, cache: CompileCache) -> None:
+    src_path = tmp_path / "led.shy"
+    shutil.copy(EXAMPLES_PATH / "led.shy", src_path)
+    dev = compile_device(src_path, cache)
+    assert not isinstance(dev, CachedDevice)
+    assert len(cache.entries()) == 1
+
+    src_path.with_suffix(".scy").unlink()
+    cached = compile_device(src_path, cache)
+    assert isinstance(cached, CachedDevice)
+    assert cached.is_valid
+    assert cached.get_timings() == dev.get_timings()
+    # the output is still created on a cache hit
+    assert src_path.with_suffix(".scy").exists()
+
+
+def test_cache_dump_timings(tmp_path: Path, cache: CompileCache) -> None:
+    src_path = tmp_path / "led.shy"
+    shutil.copy(EXAMPLES_PATH / "led.shy", src_path)
+    dumped = []
+    for _ in range(2):
+        fp = io.StringIO()
+        compile_device(src_path, cache, dump_timings=fp)
+        dumped.append(json.loads(fp.getvalue()))
+    # the timings of a cache hit are those of the first compilation
+    assert [timings.pop("cached") for timings in dumped] == [False, True]
+    assert dumped[0] == dumped[1]
+
+
+def test_cache_miss_on_change(tmp_path: Path, cache: CompileCache) -> None:
+    src_path = tmp_path / "led.shy"
+    shutil.copy(EXAMPLES_PATH / "led.shy", src_path)
+    compile_device(src_path, cache)
+    # different flags
+    dev = compile_device(src_path, cache, check_ambiguity=True)
+    assert not isinstance(dev, CachedDevice)
+    # different source
+    src_path.write_text(src_path.read_text() + "\n")
+    dev = compile_device(src_path, cache)
+    assert not isinstance(dev, CachedDevice)
+    assert len(cache.entries()) == 3
+
+
+def test_cache_dependency_change(tmp_path: Path, cache: CompileCache) -> None:
+    for name in ["button", "smartbutton1"]:
+        shutil.copy(EXAMPLES_PATH / (name + ".shy"), tmp_path)
+    uses_path = tmp_path / "uses.yml"
+    uses_path.write_text("Button: button.scy\n")
+    src_path = tmp_path / "smartbutton1.shy"
+
+    compile_device(tmp_path / "button.shy", cache)
+    compile_device(src_path, cache, uses_path=uses_path)
+    dev = compile_device(src_path, cache, uses_path=uses_path)
+    assert isinstance(dev, CachedDevice)
+
+    # any change to a compiled dependency invalidates the entry
+    button = tmp_path / "button.scy"
+    button.write_text(button.read_text() + "\n")
+    dev = compile_device(src_path, cache, uses_path=uses_path)
+    assert not isinstance(dev, CachedDevice)
+
+
+def test_cache_invalid_device(tmp_path: Path, cache: CompileCache) -> None:
+    for name in ["simple_button", "ambiguous"]:
+        shutil.copy(EXAMPLES_PATH / (name + ".shy"), tmp_path)
+    uses_path = tmp_path / "uses.yml"
+    uses_path.write_text("SimpleButton: simple_button.scy\n")
+    compile_device(tmp_path / "simple_button.shy", cache)
+
+    errors = []
+    for _ in range(2):
+        with pytest.raises(exceptions.CompilationError) as exc_info:
+            compile_device(
+                tmp_path / "ambiguous.shy",
+                cache,
+                uses_path=uses_path,
+                check_ambiguity=True,
+            )
+        errors.append(str(exc_info.value))
+    assert errors[0] == errors[1]
+    assert "Invalid device: AmbiguityFailure" in errors[0]
+    assert len(cache.entries()) == 2
+
+
+def test_cache_budget(tmp_path: Path, cache: CompileCache) -> None:
+    for name in ["button", "smartbutton1"]:
+        shutil.copy(EXAMPLES_PATH / (name + ".shy"), tmp_path)
+    uses_path = tmp_path / "uses.yml"
+    uses_path.write_text("Button: button.scy\n")
+    src_path = tmp_path / "smartbutton1.shy"
+    compile_device(tmp_path / "button.shy", cache)
+
+    # storing the result does not explore the integration
+    dev = compile_device(
+        src_path,
+        cache,
+        uses_path=uses_path,
+        skip_checks=True,
+        budget=Budget(max_states=1),
+    )
+    assert not isinstance(dev, CachedDevice)
+    assert len(cache.entries()) == 2
+
+    # an inconclusive compilation is not stored
+    with pytest.raises(exceptions.InconclusiveError) as exc_info:
+        compile_device(
+            src_path, cache, uses_path=uses_path, budget=Budget(max_states=1)
+        )
+    assert exc_info.value.verdict.reason == MAX_STATES
+    assert len(cache.entries()) == 2
+
+
+def test_cache_bounded(tmp_path: Path, cache: CompileCache) -> None:
+    for name in ["button", "smartbutton1"]:
+        shutil.copy(EXAMPLES_PATH / (name + ".shy"), tmp_path)
+    uses_path = tmp_path / "uses.yml"
+    uses_path.write_text("Button: button.scy\n")
+    compile_device(tmp_path / "button.shy", cache)
+    dev = compile_device(
+        tmp_path / "smartbutton1.shy", cache, uses_path=uses_path, bounded=4
+    )
+    assert len(cache.entries()) == 2
+    # the bounded checks (and storing their result) do not copy the integration
+    assert dev.internal.micro._epsilon_free is None
+
+
+def test_sources_digest_grammar(tmp_path: Path, monkeypatch) -> None:
+    root = tmp_path / "shelley"
+    (root / "shelleyc").mkdir(parents=True)
+    (root / "parsers").mkdir()
+    (root / "shelleyc" / "cache.py").write_text("")
+    grammar = root / "parsers" / "grammar.lark"
+    grammar.write_text("start: A")
+    monkeypatch.setattr(cache_module, "__file__", str(root / "shelleyc" / "cache.py"))
+    cache_module.sources_digest.cache_clear()
+    try:
+        digest = cache_module.sources_digest()
+        cache_module.sources_digest.cache_clear()
+        grammar.write_text("start: B")
+        # editing a grammar invalidates the entries
+        assert cache_module.sources_digest() != digest
+    finally:
+        cache_module.sources_digest.cache_clear()
+
+
+def test_cache_eviction(tmp_path: Path) -> None:
+    cache = CompileCache(tmp_path / "cache", max_size=0)
+    src_path = tmp_path / "led.shy"
+    shutil.copy(EXAMPLES_PATH / "led.shy", src_path)
+    compile_device(src_path, cache)
+    assert len(cache.entries()) == 0
+
+
+def test_minimize(tmp_path: Path) -> None:
+    src_path = tmp_path / "led.shy"
+    shutil.copy(EXAMPLES_PATH / "led.shy", src_path)
+    dst_path = src_path.with_suffix(".scy")
+    dev = compile_device(src_path, None, minimize=True)
+    first = dst_path.read_bytes()
+    assert dev.external.nfa.start_state == 0
+    # the output does not depend on the build
+    dst_path.unlink()
+    compile_device(src_path, None, minimize=True)
+    assert dst_path.read_bytes() == first
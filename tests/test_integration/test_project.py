@@ -0,0 +1,98 @@
+import shutil
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+
+from shelley.shelleyc import main
+from shelley.shelleyc import exceptions
+from shelley.shelleyc import project
+
+EXAMPLES_PATH = Path() / Path(__file__).parent / "input"
+
+SOURCES = ["button", "led", "timer", "desklamp"]
+
+
+def make_project(tmp_path: Path) -> Path:
+    for name in SOURCES:
+        shutil.copy(EXAMPLES_PATH / (name + ".shy"), tmp_path)
+    uses_path = tmp_path / "uses.yml"
+    uses_path.write_text(
+        "DeskLamp: compiled/desklamp.scy\n"
+        "Button: compiled/button.scy\n"
+        "Led: compiled/led.scy\n"
+        "Timer: compiled/timer.scy\n"
+    )
+    return uses_path
+
+
+def make_system(name: str, *uses: str) -> project.ProjectSystem:
+    return project.ProjectSystem(
+        name=name,
+        src_path=Path(name + ".shy"),
+        dst_path=Path(name + ".scy"),
+        device=SimpleNamespace(uses=list(uses)),
+    )
+
+
+def test_load_project(tmp_path: Path) -> None:
+    systems = project.load_project(make_project(tmp_path))
+    assert list(systems) == ["DeskLamp", "Button", "Led", "Timer"]
+    assert systems["DeskLamp"].src_path == tmp_path / "desklamp.shy"
+    assert systems["DeskLamp"].dst_path == tmp_path / "compiled" / "desklamp.scy"
+
+
+def test_load_project_source_not_found(tmp_path: Path) -> None:
+    uses_path = tmp_path / "uses.yml"
+    uses_path.write_text("Button: compiled/button.scy\n")
+    with pytest.raises(exceptions.CompilationError) as exc_info:
+        project.load_project(uses_path)
+    assert str(exc_info.value).startswith("Error loading system 'Button'")
+
+
+def test_topological_order() -> None:
+    systems = dict(
+        (s.name, s)
+        for s in [
+            make_system("A", "B", "C"),
+            make_system("B", "C"),
+            make_system("C"),
+            make_system("D", "Unknown"),
+        ]
+    )
+    assert project.topological_order(systems) == ["C", "B", "A", "D"]
+
+
+def test_topological_order_cycle() -> None:
+    systems = dict(
+        (s.name, s)
+        for s in [make_system("A", "B"), make_system("B", "C"), make_system("C", "A")]
+    )
+    with pytest.raises(exceptions.CompilationError) as exc_info:
+        project.topological_order(systems)
+    assert str(exc_info.value) == "Cyclic dependency: A -> B -> C -> A"
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_compile_project(tmp_path: Path, jobs: int) -> None:
+    uses_path = make_project(tmp_path)
+    compiled = project.compile_project(uses_path=uses_path, jobs=jobs)
+    assert set(compiled) == {"DeskLamp", "Button", "Led", "Timer"}
+    for name in SOURCES:
+        assert (tmp_path / "compiled" / (name + ".scy")).exists()
+
+
+def test_compile_project_device(tmp_path: Path) -> None:
+    shutil.copy(EXAMPLES_PATH / "smartbutton1.shy", tmp_path)
+    uses_path = make_project(tmp_path)
+    project.compile_project(
+        uses_path=uses_path, src_path=tmp_path / "smartbutton1.shy", save_output=False
+    )
+    assert not (tmp_path / "compiled").exists()
+
+
+def test_project_arguments() -> None:
+    parser = main.create_parser()
+    args = parser.parse_args(["--project", "uses.yml", "-j", "4"])
+    assert args.project == Path("uses.yml")
+    assert args.jobs == 4
+    assert args.device is None
@@ -0,0 +1,96 @@
+import pickle
+import shutil
+from pathlib import Path
+from typing import Any, Dict
+
+from karakuri import regular
+
+from shelley.shelleyc import scb
+from shelley.shelleyc import shelleyc
+from shelley.shelleyc.serializer import deserialize, load_nfa, serialize
+
+EXAMPLES_PATH = Path() / Path(__file__).parent / "input"
+
+EXAMPLE = {
+    "start_state": "$START",
+    "accepted_states": ["on"],
+    "edges": [
+        {"src": "$START", "char": "on", "dst": "on"},
+        {"src": "on", "char": "off", "dst": "off"},
+        {"src": "off", "char": "on", "dst": "on"},
+        {"src": "off", "char": None, "dst": "on"},
+    ],
+}
+
+
+def as_set(nfa: regular.NFA) -> Dict[str, Any]:
+    d = nfa.as_dict()
+    return {
+        "start_state": d["start_state"],
+        "accepted_states": frozenset(d["accepted_states"]),
+        "edges": frozenset((e["src"], e["char"], e["dst"]) for e in d["edges"]),
+    }
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / "example.scb"
+    serialize(path, EXAMPLE, binary=True)
+    assert scb.is_scb(path)
+    dev = scb.load(path)
+    assert len(dev) == 3
+    assert dev.num_edges == 4
+    assert dev.alphabet == {"on", "off"}
+    assert dev.transition_func("off", None) == {"on"}
+    assert dev.transition_func("off", "off") == frozenset()
+    assert dev.transition_func("unknown", "on") == frozenset()
+    expected = as_set(regular.NFA.from_dict(EXAMPLE))
+    assert as_set(deserialize(path, binary=True).nfa) == expected
+    assert as_set(load_nfa(path)) == expected
+
+
+def test_non_string_states(tmp_path: Path) -> None:
+    example = {
+        "start_state": (0, "a"),
+        "accepted_states": [(1, "b")],
+        "edges": [{"src": (0, "a"), "char": "x", "dst": (1, "b")}],
+    }
+    path = tmp_path / "example.scb"
+    scb.dump(path, example)
+    dev = scb.load(path)
+    assert dev.transition_func((0, "a"), "x") == {(1, "b")}
+    assert as_set(dev.as_nfa()) == as_set(regular.NFA.from_dict(example))
+
+
+def test_legacy_pickle(tmp_path: Path) -> None:
+    path = tmp_path / "example.scb"
+    with path.open("wb") as f:
+        pickle.dump(EXAMPLE, f, pickle.HIGHEST_PROTOCOL)
+    expected = as_set(regular.NFA.from_dict(EXAMPLE))
+    assert as_set(deserialize(path, binary=True).nfa) == expected
+    assert as_set(load_nfa(path)) == expected
+
+
+def test_load_yaml(tmp_path: Path) -> None:
+    path = tmp_path / "example.scy"
+    serialize(path, EXAMPLE)
+    assert not scb.is_scb(path)
+    assert as_set(load_nfa(path)) == as_set(regular.NFA.from_dict(EXAMPLE))
+
+
+def test_compile_binary(tmp_path: Path) -> None:
+    for name in ["button", "smartbutton1"]:
+        shutil.copy(EXAMPLES_PATH / (name + ".shy"), tmp_path)
+    uses_path = tmp_path / "uses.yml"
+    uses_path.write_text("Button: button.scb\n")
+    shelleyc.compile_shelley(
+        src_path=tmp_path / "button.shy", uses_path=None, binary=True
+    )
+    assert scb.is_scb(tmp_path / "button.scb")
+    _, dev = shelleyc.compile_shelley(
+        src_path=tmp_path / "smartbutton1.shy",
+        uses_path=uses_path,
+        binary=True,
+        integration=tmp_path / "smartbutton1-i.scb",
+    )
+    assert as_set(load_nfa(tmp_path / "smartbutton1.scb")) == as_set(dev.external.nfa)
+    assert scb.is_scb(tmp_path / "smartbutton1-i.scb")
@@ -7,6 +7,7 @@ import argparse
 from shelley.shelleyc import main
 from shelley.shelleyc import exceptions
 from shelley.shelleyc import shelleyc
+from shelley.automata.budget import Budget, MAX_STATES, TIMEOUT
 
 EXAMPLES_PATH = Path() / Path(__file__).parent / "input"
 COMPILED_PATH = EXAMPLES_PATH / "compiled"
@@ -204,7 +205,8 @@ def test_compile_desklamp_dependency_not_found_2() -> None:
     _remove_compiled_dir()
 
 
-def test_compile_ambiguous() -> None:
+@pytest.mark.parametrize("engine", ["dfa", "product"])
+def test_compile_ambiguous(engine: str) -> None:
     COMPILED_PATH.mkdir(parents=True, exist_ok=True)
     _compile_simple_device("simple_button")
 
@@ -213,13 +215,36 @@ def test_compile_ambiguous() -> None:
     args = make_args(src_path, uses_path)
 
     with pytest.raises(exceptions.CompilationError) as exc_info:
-        call_shelleyc(args)
+        call_shelleyc(args, ambiguity_engine=engine)
 
     assert "Invalid device: AmbiguityFailure" in str(exc_info.value)
 
     _remove_compiled_dir()
 
 
+@pytest.mark.parametrize(
+    "budget, reason",
+    [(Budget(max_states=1), MAX_STATES), (Budget(deadline=0), TIMEOUT)],
+)
+def test_compile_inconclusive(budget: Budget, reason: str) -> None:
+    COMPILED_PATH.mkdir(parents=True, exist_ok=True)
+    _compile_simple_device("simple_button")
+
+    src_path = EXAMPLES_PATH / "ambiguous.shy"
+    uses_path = EXAMPLES_PATH / "uses.yml"
+    args = make_args(src_path, uses_path)
+
+    with pytest.raises(exceptions.InconclusiveError) as exc_info:
+        call_shelleyc(args, budget=budget)
+
+    verdict = exc_info.value.verdict
+    assert verdict.reason == reason
+    assert verdict.phase == "ambiguity"
+    assert str(exc_info.value) == str(verdict)
+
+    _remove_compiled_dir()
+
+
 @pytest.fixture(scope="session", autouse=True)
 def cleanup():
     _remove_compiled_dir()
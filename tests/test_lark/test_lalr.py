@@ -0,0 +1,93 @@
+import pytest
+from pathlib import Path
+from lark import Tree
+from lark.exceptions import UnexpectedInput
+
+from shelley.parsers import ltlf_lark_parser
+from shelley.parsers.ltlf_lark_parser import LTLParser
+from shelley.parsers.shelley_lark_parser import parser as lark_parser, ShelleyLanguage
+
+INPUT_PATH = Path() / Path(__file__).parent.parent / "input"
+
+
+def normalize(tree):
+    if not isinstance(tree, Tree):
+        return str(tree)
+    children = [
+        normalize(child)
+        for child in tree.children
+        if not (
+            isinstance(child, Tree)
+            and child.data in ("user_claim", "user_claim_base")
+            and len(child.children) == 0
+        )
+    ]
+    return Tree(tree.data, children)
+
+
+@pytest.mark.parametrize(
+    "formula",
+    [
+        "a",
+        "! a",
+        "X ! a.b",
+        "a & X b",
+        "(F a) | (F b)",
+        "G ((a.open -> (F (t.wait & (F a.close)))) & (b.open -> X b.close))",
+        "G ( (! (http.get | http.post) ) -> X ! gprs.write)",
+        "F (c.sleep & END)",
+        "a = b",
+        "L",
+    ],
+)
+def test_ltlf_lalr_matches_earley(formula: str) -> None:
+    parser = ltlf_lark_parser.parser
+    assert parser.lalr.parse(formula) == parser.earley.parse(formula)
+
+
+@pytest.mark.parametrize(
+    "formula",
+    [
+        # mixing prefix and binary operators is ambiguous, let Earley decide
+        "! a & b",
+        # chains of binary operators are ambiguous too
+        "F a | F b | F c",
+    ],
+)
+def test_ltlf_lalr_rejects_ambiguous(formula: str) -> None:
+    parser = ltlf_lark_parser.parser
+    with pytest.raises(UnexpectedInput):
+        parser.lalr.parse(formula)
+    expected = LTLParser().transform(parser.earley.parse(formula))
+    assert LTLParser().transform(parser.parse(formula)) == expected
+
+
+@pytest.mark.parametrize("path", sorted(INPUT_PATH.glob("**/*.shy")), ids=str)
+def test_shelley_lalr_matches_earley(path: Path) -> None:
+    source = path.read_text()
+    try:
+        tree = lark_parser.lalr.parse(source)
+    except UnexpectedInput:
+        pytest.skip("outside of the LALR subset")
+    assert normalize(tree) == normalize(lark_parser.earley.parse(source))
+
+
+def test_fallback_to_earley() -> None:
+    source = """base Sectors {
+  initial final a -> b;
+  final b -> a;
+  system check F a | F b | F a;
+}"""
+    with pytest.raises(UnexpectedInput):
+        lark_parser.lalr.parse(source)
+    device = ShelleyLanguage().transform(lark_parser.parse(source))
+    assert len(device.system_formulae) == 1
+
+
+def test_empty_body() -> None:
+    source = """Controller (a: Valve) {
+  initial final a -> a { }
+}"""
+    assert normalize(lark_parser.lalr.parse(source)) == normalize(
+        lark_parser.earley.parse(source)
+    )
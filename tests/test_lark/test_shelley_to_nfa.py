@@ -260,3 +260,21 @@ ClickButtonVariation (B: Button, T: Timer) {
     given = shelley2automata(ShelleyLanguage().transform(lark_parser.parse(source)))
 
     assert expected == given
+
+
+def test_shared_triggers() -> None:
+
+    source = """
+SmartButton (b: Button) {
+ initial final on -> off {
+  b.pressed; b.released;
+ }
+ final off -> on {
+  b.pressed; b.released;
+ }
+}"""
+
+    dev = shelley2automata(ShelleyLanguage().transform(lark_parser.parse(source)))
+    # structurally equal triggers are the same object
+    assert dev.triggers["on"] is dev.triggers["off"]
+    assert dev.triggers["on"] == Concat(Char("b.pressed"), Char("b.released"))
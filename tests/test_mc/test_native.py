@@ -0,0 +1,115 @@
+import pickle
+from pathlib import Path
+
+from karakuri import regular
+
+from shelley.automata.minimize import IntDFA, REJECT
+from shelley.parsers import shelley_lark_parser
+from shelley.parsers.ltlf_lark_parser import (
+    Action,
+    Always,
+    And,
+    CTL,
+    EOS,
+    Eventually,
+    ExistsFinally,
+    Last,
+    LTL,
+    LTL_F,
+    Next,
+)
+from shelley.shelleymc import ltlf
+from shelley.shelleymc.ltlf import Spec
+from shelley.shelleymc.modelcheck import ModelChecker, ModelCheckTask
+from shelley.shelleymc.native import check_specs, check_structural, load_model
+
+VALVE_PATH = (
+    Path(__file__).parent.parent / "input" / "thesis_aquamote_example" / "valve.shy"
+)
+
+# the usage of valve v, as in an integration
+INTEGRATION = {
+    "start_state": 0,
+    "accepted_states": [2],
+    "edges": [
+        {"src": 0, "char": "v.on", "dst": 1},
+        {"src": 1, "char": "v.off", "dst": 2},
+        {"src": 2, "char": "v.on", "dst": 1},
+    ],
+}
+
+
+def valve_dfa(on_twice: bool = False) -> IntDFA:
+    # initial on -> off; final off -> on
+    return IntDFA(
+        alphabet=("off", "on"),
+        transitions=(
+            (REJECT, 1),
+            (2, 1 if on_twice else REJECT),
+            (REJECT, 1),
+        ),
+        accepted=frozenset([2]),
+    )
+
+
+def system_claim(formula):
+    # as in modelcheck.check_system, for CTL-compatible models
+    return LTL(Next(LTL_F(formula)))
+
+
+def test_ltl_holds() -> None:
+    spec = Spec(
+        [
+            system_claim(Action("on")),
+            system_claim(Eventually(And(Action("off"), Last()))),
+        ]
+    )
+    assert check_specs(valve_dfa(), [spec], ctl_compatible=True) is None
+
+
+def test_ltl_counterexample() -> None:
+    spec = Spec([system_claim(Action("on")), system_claim(Always(Action("on")))])
+    result = check_specs(valve_dfa(), [spec], ctl_compatible=True)
+    assert result is not None
+    assert [trace for (_, trace) in result] == [None, ["on", "off"]]
+
+
+def test_ctl() -> None:
+    def used(name):
+        return CTL(ExistsFinally(And(LTL_F(Action(name)), ExistsFinally(LTL_F(EOS)))))
+
+    spec = Spec([used("on"), used("off")])
+    assert check_specs(valve_dfa(), [spec], ctl_compatible=True) is None
+    result = check_specs(valve_dfa(), [Spec([used("other")])], ctl_compatible=True)
+    assert result is not None
+    assert [trace for (_, trace) in result] == [[]]
+
+
+def test_usage_validity() -> None:
+    dev = shelley_lark_parser.parse(VALVE_PATH)
+    spec = ltlf.generate_usage_validity(dev, prefix="v")
+    assert check_specs(valve_dfa(), [spec]) is None
+    result = check_specs(valve_dfa(on_twice=True), [spec])
+    assert result is not None
+    assert ["on", "on", "off"] in [trace for (_, trace) in result]
+
+
+def test_structural() -> None:
+    dev = shelley_lark_parser.parse(VALVE_PATH)
+    usage = ltlf.generate_usage_validity(dev, prefix="v")
+    claim = Spec([system_claim(Action("on"))], comment="claim")
+    checked, rest = check_structural(valve_dfa(on_twice=True), [usage, claim])
+    # only the claim is left to the model checker
+    assert len(checked) == len(usage)
+    assert rest == [claim]
+    assert ["on", "on", "off"] in checked.values()
+
+
+def test_in_memory_model(tmp_path: Path) -> None:
+    nfa = regular.NFA.from_dict(INTEGRATION)
+    assert load_model(nfa, project_prefix="v.") == valve_dfa()
+    # sent to another process as a dictionary
+    task = ModelCheckTask(ModelChecker(tmp_path / "v.smv"), nfa, project_prefix="v.")
+    task = pickle.loads(pickle.dumps(task))
+    assert isinstance(task.fsm, regular.NFA)
+    assert load_model(task.fsm, project_prefix="v.") == valve_dfa()